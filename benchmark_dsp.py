@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+DSP Benchmark Script
+--------------------
+Measures the per-frame cost of the NumPy EQ/gain/limiter engine (DSPAudio)
+against Discord's 20 ms frame budget, and the cost of retuning it while
+playing. Uses synthetic PCM, so neither ffmpeg nor network access is needed.
+
+    python benchmark_dsp.py --frames 3000 --presets normal kalin ince parti
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from music_audio import DSPAudio, BlockEqualizer, eq_bands, FRAME_SAMPLES
+
+FRAME_BUDGET_MS = 20.0
+
+# /yardım'daki önerilen ayarlar: (bas, tizlik, ses)
+PRESETS = {
+    'normal': (100, 100, 1.0),
+    'kalin': (150, 0, 1.0),
+    'ince': (60, 200, 1.0),
+    'bas': (300, 80, 1.0),
+    'parti': (200, 120, 1.5),
+}
+
+
+class SyntheticPCM:
+    """Önceden üretilmiş 16-bit stereo çerçeveleri sırayla döndürür"""
+    def __init__(self, frames, seed=0):
+        rng = np.random.default_rng(seed)
+        t = np.arange(FRAME_SAMPLES * 50) / 48000
+        # Bas, orta ve tiz bileşenli sinyal + gürültü; limiter'ın da çalışması için yüksek seviyeli
+        signal = 0.3 * np.sin(2 * np.pi * 80 * t) + 0.2 * np.sin(2 * np.pi * 1000 * t) + 0.1 * np.sin(2 * np.pi * 6000 * t)
+        signal = signal + 0.05 * rng.standard_normal(len(t))
+        pcm = (np.repeat(signal[:, None], 2, axis=1) * 32767).astype(np.int16)
+        self.blocks = [pcm[i:i + FRAME_SAMPLES].tobytes() for i in range(0, len(pcm), FRAME_SAMPLES)]
+        self.remaining = frames
+
+    def read(self):
+        if self.remaining <= 0:
+            return b''
+        self.remaining -= 1
+        return self.blocks[self.remaining % len(self.blocks)]
+
+    def cleanup(self):
+        pass
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_preset(name, frames):
+    bas, tizlik, volume = PRESETS[name]
+    source = DSPAudio(SyntheticPCM(frames), bas=bas, tizlik=tizlik, volume=volume)
+    timings = []
+    while True:
+        started = time.perf_counter()
+        data = source.read()
+        if not data:
+            break
+        timings.append(time.perf_counter() - started)
+    return {
+        'preset': name,
+        'bands': len(eq_bands(bas, tizlik)),
+        'mean_ms': sum(timings) / len(timings) * 1000,
+        'p99_ms': percentile(timings, 99) * 1000,
+        'max_ms': max(timings) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="NumPy DSP per-frame cost benchmark")
+    parser.add_argument('--frames', type=int, default=3000, help="Preset başına çerçeve sayısı (3000 = 60 sn ses)")
+    parser.add_argument('--presets', nargs='+', default=list(PRESETS), choices=list(PRESETS))
+    parser.add_argument('--retunes', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]} | NumPy {np.__version__} | {args.frames} çerçeve/preset "
+          f"({args.frames * FRAME_BUDGET_MS / 1000:.0f} sn ses)\n")
+    print(f"{'preset':<10}{'bant':>6}{'ort.':>12}{'p99':>12}{'max':>12}{'bütçe %':>10}")
+    for name in args.presets:
+        r = run_preset(name, args.frames)
+        print(f"{r['preset']:<10}{r['bands']:>6}{r['mean_ms']:>10.3f}ms{r['p99_ms']:>10.3f}ms{r['max_ms']:>10.3f}ms"
+              f"{r['mean_ms'] / FRAME_BUDGET_MS * 100:>9.1f}%")
+
+    timings = []
+    for i in range(args.retunes):
+        started = time.perf_counter()
+        BlockEqualizer(eq_bands(100 + i * 10, i * 4))
+        timings.append(time.perf_counter() - started)
+    print(f"\nYeniden ayarlama (matris hazırlama): ort. {sum(timings) / len(timings) * 1000:.1f} ms, "
+          f"max {max(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
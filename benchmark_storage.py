@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""
+Storage Benchmark Script
+------------------------
+Replays synthetic messages through Statistics.on_message against each
+storage backend and reports throughput and event-loop stalls.
+
+    python benchmark_storage.py --messages 2000000 --backends sqlite memory
+"""
+
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import database
+from cogs.statistics import Statistics
+
+
+class FakeBot:
+    async def wait_until_ready(self):
+        # Sıkıştırma görevi benchmark sırasında çalışmasın
+        await asyncio.Event().wait()
+
+
+async def sample_loop_lag(samples, interval=0.001):
+    """Event loop'un ne kadar geç uyandığını ölçer"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run_backend(backend, args):
+    tmp_dir = tempfile.mkdtemp(prefix="sezar_bench_")
+    database.init_db(os.path.join(tmp_dir, 'bench.db'), backend=backend)
+    try:
+        cog = Statistics(FakeBot())
+        await cog.cog_load()
+
+        guilds = [SimpleNamespace(id=1000 + i) for i in range(args.guilds)]
+        channels = [SimpleNamespace(id=5000 + i) for i in range(args.channels)]
+        authors = [SimpleNamespace(id=10_000 + i, bot=False) for i in range(args.users)]
+        start_time = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=args.days)
+        step = datetime.timedelta(days=args.days) / args.messages
+
+        lag_samples = []
+        sampler = asyncio.create_task(sample_loop_lag(lag_samples))
+        started = time.perf_counter()
+
+        for i in range(args.messages):
+            message = SimpleNamespace(
+                author=authors[(i * 7919) % args.users],
+                guild=guilds[i % args.guilds],
+                channel=channels[(i * 31) % args.channels],
+                created_at=start_time + step * i,
+            )
+            await cog.on_message(message)
+            # Gateway olayları ayrı görevler olarak gelir; arada loop'a dönülür
+            if i % args.yield_every == 0:
+                await asyncio.sleep(0)
+
+        await cog.cog_unload()  # Son yazma da ölçüme dahil
+        elapsed = time.perf_counter() - started
+        sampler.cancel()
+
+        buf = cog.buffer
+        return {
+            'backend': backend,
+            'rate': args.messages / elapsed,
+            'elapsed': elapsed,
+            'p99_ms': percentile(lag_samples, 99) * 1000,
+            'max_ms': max(lag_samples, default=0.0) * 1000,
+            'flushes': buf.flush_count,
+            'max_flush_ms': buf.max_flush_ms,
+        }
+    finally:
+        database.close_db()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Statistics.on_message storage benchmark")
+    parser.add_argument('--messages', type=int, default=1_000_000)
+    parser.add_argument('--backends', nargs='+', default=list(database.STORAGE_BACKENDS))
+    parser.add_argument('--guilds', type=int, default=20)
+    parser.add_argument('--channels', type=int, default=200)
+    parser.add_argument('--users', type=int, default=50_000)
+    parser.add_argument('--days', type=int, default=30, help="Mesajların yayılacağı gün sayısı")
+    parser.add_argument('--yield-every', type=int, default=50, help="Kaç mesajda bir loop'a dönüleceği")
+    args = parser.parse_args()
+
+    print(f"Python {sys.version.split()[0]} | {args.messages:,} mesaj, {args.users:,} kullanıcı, {args.guilds} sunucu\n")
+    results = []
+    for backend in args.backends:
+        print(f"⏳ {backend} çalışıyor...")
+        results.append(await run_backend(backend, args))
+
+    print(f"\n{'backend':<10}{'mesaj/sn':>14}{'süre (s)':>11}{'p99 stall':>12}{'max stall':>12}{'flush':>8}{'max flush':>12}")
+    for r in results:
+        print(f"{r['backend']:<10}{r['rate']:>14,.0f}{r['elapsed']:>11.2f}{r['p99_ms']:>10.2f}ms"
+              f"{r['max_ms']:>10.2f}ms{r['flushes']:>8}{r['max_flush_ms']:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+YoutubeDL Benchmark Script
+--------------------------
+Compares per-call YoutubeDL construction (cold, cachedir disabled) with the
+long-lived YoutubeDLPool (warm, on-disk cache) using a local stand-in
+extractor, so no network access is needed.
+
+    python benchmark_ytdl.py --calls 200 --workers 3 --backends thread process
+"""
+
+import argparse
+import asyncio
+import shutil
+import sys
+import tempfile
+import time
+
+import yt_dlp as youtube_dl
+from yt_dlp.extractor.common import InfoExtractor
+
+from concurrent.futures import ThreadPoolExecutor
+
+from ytdl_pool import YoutubeDLPool, BASE_OPTIONS
+
+
+class StandInIE(InfoExtractor):
+    """YouTube extractor'ının maliyet profilini taklit eder: ilk kullanımda player JS indirilip
+    çözülür (diskteki önbellekte varsa atlanır), her çağrıda format listesi işlenir."""
+    IE_NAME = 'standin'
+    _VALID_URL = r'standin:(?P<id>[\w-]+)'
+    player_cost = 0.15
+
+    def _real_initialize(self):
+        if self.cache.load('standin', 'player') is None:
+            time.sleep(self.player_cost)
+            self.cache.store('standin', 'player', {'sig': 'reverse'})
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        expire = int(time.time()) + 6 * 3600
+        return {
+            'id': video_id,
+            'title': f'Stand-in {video_id}',
+            'duration': 213,
+            'formats': [{
+                'format_id': str(itag),
+                'url': f'https://rr1.googlevideo.com/videoplayback?expire={expire}&itag={itag}&id={video_id}',
+                'ext': 'webm' if itag > 240 else 'm4a',
+                'acodec': 'opus' if itag > 240 else 'mp4a.40.2',
+                'vcodec': 'none',
+                'abr': abr,
+            } for itag, abr in ((249, 50), (250, 70), (251, 160), (140, 128))],
+        }
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def cold_extract(url, options):
+    # Eski davranış: her çağrıda yeni örnek, diskteki önbellek kapalı
+    with youtube_dl.YoutubeDL({**options, 'cachedir': False}) as ydl:
+        ydl.add_info_extractor(StandInIE(ydl))
+        return ydl.extract_info(url, download=False, ie_key=StandInIE.ie_key())
+
+
+def standin_youtube_dl(options):
+    ydl = youtube_dl.YoutubeDL(options)
+    ydl.add_info_extractor(StandInIE(ydl))
+    ydl.get_info_extractor(StandInIE.ie_key())
+    return ydl
+
+
+def standin_format_sort(ydl, url, rounds):
+    # Format sıralama/JSON işleme gibi CPU işini büyütmek için aynı bilgi tekrar işlenir
+    info = None
+    for _ in range(rounds):
+        info = ydl.extract_info(url, download=False, ie_key=StandInIE.ie_key())
+    return {'id': info['id'], 'url': info['url']}
+
+
+async def run_mode(name, calls, workers, extract):
+    latencies = []
+
+    async def one(i):
+        started = time.perf_counter()
+        info = await extract(f'standin:video{i % 50:03d}')
+        latencies.append(time.perf_counter() - started)
+        assert info['url'].startswith('https://rr1.googlevideo.com/')
+
+    started = time.perf_counter()
+    # Aynı anda en fazla workers kadar istek; bot'taki eşzamanlı /çal komutları gibi
+    for offset in range(0, calls, workers):
+        await asyncio.gather(*(one(i) for i in range(offset, min(calls, offset + workers))))
+    elapsed = time.perf_counter() - started
+    return {
+        'mode': name,
+        'rate': calls / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'max_ms': max(latencies) * 1000,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="YoutubeDL cold vs warm extraction benchmark")
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--player-cost', type=float, default=0.15, help="Player JS indirme/çözme süresi (sn)")
+    parser.add_argument('--backends', nargs='+', default=['thread'], choices=['thread', 'process'])
+    parser.add_argument('--cpu-rounds', type=int, default=1, help="Çağrı başına format işleme tekrarı (CPU yükü)")
+    args = parser.parse_args()
+    StandInIE.player_cost = args.player_cost
+
+    cache_dir = tempfile.mkdtemp(prefix="sezar_ytdl_bench_")
+    options = {**BASE_OPTIONS, 'format': 'bestaudio/best', 'cachedir': cache_dir}
+    loop = asyncio.get_running_loop()
+    print(f"Python {sys.version.split()[0]} | yt-dlp {youtube_dl.version.__version__} | "
+          f"{args.calls} çağrı, {args.workers} işçi\n")
+    results = []
+    warm_ups = []
+    try:
+        cold_executor = ThreadPoolExecutor(max_workers=args.workers)
+        results.append(await run_mode('cold', args.calls, args.workers,
+                                      lambda url: loop.run_in_executor(cold_executor, cold_extract, url, options)))
+        cold_executor.shutdown()
+
+        for backend in args.backends:
+            pool = YoutubeDLPool({'info': options}, workers=args.workers, backend=backend, factory=standin_youtube_dl)
+            try:
+                started = time.perf_counter()
+                await pool.warm()
+                warm_ups.append((backend, time.perf_counter() - started))
+                results.append(await run_mode(f'warm-{backend}', args.calls, args.workers,
+                                              lambda url: pool.run('info', standin_format_sort, url, args.cpu_rounds)))
+            finally:
+                pool.shutdown()
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"{'mod':<14}{'çağrı/sn':>12}{'p50':>12}{'p99':>12}{'max':>12}")
+    for r in results:
+        print(f"{r['mode']:<14}{r['rate']:>12,.1f}{r['p50_ms']:>10.1f}ms{r['p99_ms']:>10.1f}ms{r['max_ms']:>10.1f}ms")
+    print()
+    for backend, elapsed in warm_ups:
+        print(f"Isınma ({backend}): {elapsed * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
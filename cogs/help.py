@@ -47,7 +47,13 @@ class Help(commands.Cog):
                   "`/resume` - Müziği devam ettirir\n"
                   "`/stop` - Müziği durdurur\n"
                   "`/join` - Ses kanalına katılır\n"
-                  "`/leave` - Ses kanalından ayrılır",
+                  "`/leave` - Ses kanalından ayrılır\n"
+                  "`/ses` - Çalan şarkının ses düzeyini değiştirir\n"
+                  "`/ayar` - Bas, tizlik ve sesi şarkıyı durdurmadan ayarlar\n"
+                  "`/sıra` - Çalan ve sıradaki şarkıları gösterir\n"
+                  "`/geç` - Sıradaki şarkıya geçer\n"
+                  "`/çıkar` - Sıradan bir şarkıyı çıkarır\n"
+                  "`/karıştır` - Sırayı karıştırır",
             inline=False
         )
         
@@ -82,7 +88,8 @@ class Help(commands.Cog):
         embed.add_field(
             name="📊 İstatistik Komutları",
             value="`/stats` - Sunucu istatistiklerini gösterir\n"
-                  "`/userstats` - Kullanıcı istatistiklerini gösterir",
+                  "`/userstats` - Kullanıcı istatistiklerini gösterir\n"
+                  "`/leaderboard` - En aktif kullanıcıları gösterir",
             inline=False
         )
         
@@ -145,6 +152,48 @@ class Help(commands.Cog):
                 "category": "🎵 Müzik",
                 "permissions": "Yok"
             },
+            "ses": {
+                "description": "Çalan şarkının ses düzeyini şarkıyı baştan başlatmadan değiştirir",
+                "usage": "/ses <düzey>",
+                "example": "/ses 150",
+                "category": "🎵 Müzik",
+                "permissions": "Yok"
+            },
+            "ayar": {
+                "description": "Çalan şarkının bas, tizlik ve ses ayarlarını anında değiştirir",
+                "usage": "/ayar [bas] [tizlik] [ses]",
+                "example": "/ayar bas:200 tizlik:80",
+                "category": "🎵 Müzik",
+                "permissions": "Yok"
+            },
+            "sıra": {
+                "description": "Çalan şarkıyı ve sıradaki şarkıları gösterir",
+                "usage": "/sıra",
+                "example": "/sıra",
+                "category": "🎵 Müzik",
+                "permissions": "Yok"
+            },
+            "geç": {
+                "description": "Çalan şarkıyı geçer ve sıradaki şarkıyı başlatır",
+                "usage": "/geç",
+                "example": "/geç",
+                "category": "🎵 Müzik",
+                "permissions": "Yok"
+            },
+            "çıkar": {
+                "description": "Verilen sıra numarasındaki şarkıyı sıradan çıkarır",
+                "usage": "/çıkar <sıra>",
+                "example": "/çıkar 3",
+                "category": "🎵 Müzik",
+                "permissions": "Yok"
+            },
+            "karıştır": {
+                "description": "Sıradaki şarkıları karıştırır",
+                "usage": "/karıştır",
+                "example": "/karıştır",
+                "category": "🎵 Müzik",
+                "permissions": "Yok"
+            },
             "sorusor": {
                 "description": "Sezar Bot'a bir soru sorarsınız",
                 "usage": "/sorusor <soru>",
@@ -221,6 +270,13 @@ class Help(commands.Cog):
                 "example": "/userstats @KullanıcıAdı",
                 "category": "📊 İstatistik",
                 "permissions": "Yok"
+            },
+            "leaderboard": {
+                "description": "Sunucunun en aktif kullanıcılarını ve sıranızı gösterir",
+                "usage": "/leaderboard [@kullanıcı]",
+                "example": "/leaderboard",
+                "category": "📊 İstatistik",
+                "permissions": "Yok"
             }
         }
         
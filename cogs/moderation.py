@@ -1,26 +1,173 @@
+import asyncio
+import os
 import discord
 from discord.ext import commands
-from database import add_moderation_action, get_moderation_actions
+from database import (add_moderation_action, get_moderation_actions, count_moderation_actions,
+                      search_moderation_actions, get_storage, EXPORT_QUERIES,
+                      get_retention_policies, set_retention_policy)
+from maintenance import DEFAULT_MODERATION_DAYS, DEFAULT_ACTIVITY_DAYS
+from export import EXPORT_FORMATS, default_export_path, export_table
+
+WARNINGS_PAGE_SIZE = 5
+
+
+class WarningsView(discord.ui.View):
+    """Uyarıları keyset sayfalama ile gezdiren butonlar"""
+    def __init__(self, author_id, guild_id, member, total):
+        super().__init__(timeout=120)
+        self.author_id = author_id
+        self.guild_id = guild_id
+        self.member = member
+        self.total = total
+        self.cursors = [None]  # Her sayfanın başlangıç imleci; geri gitmek için saklanır
+        self.page = 0
+        self.rows = []
+        self.has_next = False
+        self.message = None
+
+    async def load_page(self):
+        # Bir fazla satır çekerek sonraki sayfa olup olmadığını anla
+        rows = await get_moderation_actions(self.guild_id, self.member.id,
+                                            before=self.cursors[self.page], limit=WARNINGS_PAGE_SIZE + 1)
+        self.has_next = len(rows) > WARNINGS_PAGE_SIZE
+        self.rows = rows[:WARNINGS_PAGE_SIZE]
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not self.has_next
+
+    def build_embed(self):
+        page_count = max(1, -(-self.total // WARNINGS_PAGE_SIZE))
+        embed = discord.Embed(
+            title=f"⚠️ {self.member.display_name} kullanıcısının uyarıları",
+            color=discord.Color.orange()
+        )
+        for action_id, action_type, reason, timestamp in self.rows:
+            if reason and len(reason) > 300:
+                reason = reason[:297] + '...'
+            embed.add_field(name=f"#{action_id} • {action_type} • {timestamp}", value=reason or '-', inline=False)
+        embed.set_footer(text=f"Sayfa {self.page + 1}/{page_count} • Toplam {self.total} kayıt")
+        return embed
+
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Bu butonları sadece komutu kullanan kişi kullanabilir.", ephemeral=True)
+            return False
+        return True
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
+    @discord.ui.button(label='◀ Önceki', style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        self.page -= 1
+        await self.load_page()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label='Sonraki ▶', style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        last_id, _, _, last_timestamp = self.rows[-1]
+        if len(self.cursors) == self.page + 1:
+            self.cursors.append((last_timestamp, last_id))
+        self.page += 1
+        await self.load_page()
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
 
 class Moderation(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
     @commands.command(name='warn')
+    @commands.guild_only()
     async def warn_user(self, ctx, member: discord.Member, *, reason: str):
-        add_moderation_action(member.id, 'warn', reason)
+        await add_moderation_action(ctx.guild.id, member.id, 'warn', reason)
         await ctx.send(f'{member.mention} uyarıldı. Sebep: {reason}')
 
     @commands.command(name='warnings')
+    @commands.guild_only()
     async def list_warnings(self, ctx, member: discord.Member):
-        actions = get_moderation_actions(member.id)
-        if actions:
-            response = f'{member.mention} kullanıcısının uyarıları:\n'
-            for action in actions:
-                response += f'Tip: {action[0]}, Sebep: {action[1]}, Tarih: {action[2]}\n'
+        total = await count_moderation_actions(ctx.guild.id, member.id)
+        if not total:
+            await ctx.send(f'{member.mention} kullanıcısının herhangi bir uyarısı bulunmamaktadır.')
+            return
+
+        view = WarningsView(ctx.author.id, ctx.guild.id, member, total)
+        await view.load_page()
+        view.message = await ctx.send(embed=view.build_embed(), view=view)
+
+    @commands.command(name='warnsearch')
+    @commands.guild_only()
+    async def search_warnings(self, ctx, *, text: str):
+        """Sunucudaki uyarı sebeplerinde arama yapar"""
+        results = await search_moderation_actions(ctx.guild.id, text, limit=10)
+        if not results:
+            await ctx.send(f'**{text}** için eşleşen bir uyarı bulunamadı.')
+            return
+
+        embed = discord.Embed(title=f"🔍 \"{text[:200]}\" için uyarılar", color=discord.Color.orange())
+        for action_id, user_id, action_type, timestamp, snippet in results:
+            user = ctx.guild.get_member(user_id)
+            name = user.display_name if user else str(user_id)
+            embed.add_field(name=f"#{action_id} • {name} • {action_type} • {timestamp}",
+                            value=(snippet or '-')[:1024], inline=False)
+        embed.set_footer(text=f"En alakalı {len(results)} sonuç")
+        await ctx.send(embed=embed)
+
+    @commands.command(name='retention')
+    @commands.guild_only()
+    @commands.has_permissions(manage_guild=True)
+    async def retention_policy(self, ctx, moderation_days: int = None, activity_days: int = None):
+        """Sunucunun veri saklama sürelerini gösterir veya ayarlar (0 = varsayılan)"""
+        if moderation_days is not None or activity_days is not None:
+            policies = {guild_id: (m, a) for guild_id, m, a in await get_retention_policies()}
+            current_moderation, current_activity = policies.get(ctx.guild.id, (None, None))
+            if moderation_days is not None:
+                current_moderation = moderation_days if moderation_days > 0 else None
+            if activity_days is not None:
+                current_activity = activity_days if activity_days > 0 else None
+            await set_retention_policy(ctx.guild.id, current_moderation, current_activity)
+
+        policies = {guild_id: (m, a) for guild_id, m, a in await get_retention_policies()}
+        moderation, activity = policies.get(ctx.guild.id, (None, None))
+
+        def describe(days, default):
+            if days:
+                return f"{days} gün"
+            return f"varsayılan ({default} gün)" if default else "varsayılan (süresiz)"
+
+        await ctx.send(f"🗄️ Uyarı kayıtları: {describe(moderation, DEFAULT_MODERATION_DAYS)}\n"
+                       f"📊 Etkinlik istatistikleri: {describe(activity, DEFAULT_ACTIVITY_DAYS)}")
+
+    @commands.command(name='export')
+    @commands.is_owner()
+    @commands.guild_only()
+    async def export_data(self, ctx, table: str, fmt: str = 'ndjson', guild_id: int = None):
+        """Sunucu verilerini gzip NDJSON/CSV olarak dışa aktarır (sadece bot sahibi)"""
+        if table not in EXPORT_QUERIES or fmt not in EXPORT_FORMATS:
+            await ctx.send(f"Kullanım: `/export <{'|'.join(EXPORT_QUERIES)}> [{'|'.join(EXPORT_FORMATS)}] [sunucu_id]`")
+            return
+
+        guild_id = guild_id or ctx.guild.id
+        path = default_export_path(guild_id, table, fmt)
+        await ctx.send(f"⏳ `{table}` dışa aktarılıyor...")
+        try:
+            count = await asyncio.to_thread(export_table, get_storage(), table, guild_id, fmt, path)
+        except Exception as e:
+            await ctx.send(f"❌ Dışa aktarma hatası: {e}")
+            return
+
+        # Discord'un dosya sınırına sığıyorsa ek olarak gönder, sığmıyorsa veri klasöründe bırak
+        size = os.path.getsize(path)
+        if size <= ctx.guild.filesize_limit:
+            await ctx.send(f"✅ {count:,} satır ({size:,} bayt)", file=discord.File(path))
+            os.remove(path)
         else:
-            response = f'{member.mention} kullanıcısının herhangi bir uyarısı bulunmamaktadır.'
-        await ctx.send(response)
+            await ctx.send(f"✅ {count:,} satır ({size:,} bayt) Discord sınırını aştığı için sunucuya yazıldı: `{path}`")
 
 async def setup(bot):
     await bot.add_cog(Moderation(bot))
@@ -1,15 +1,263 @@
-from discord.ext import commands
-from database import update_message_stats
+import asyncio
+import logging
+import time
+import discord
+from discord.ext import commands, tasks
+from database import (apply_message_stats_batch, compact_activity, get_activity_total,
+                      get_top_activity, get_user_stats, load_guild_message_counts)
+from leaderboard import Leaderboard
+
+logger = logging.getLogger('sezar.statistics')
+
+HOUR = 3600
+DAY = 86400
+HOURLY_RETENTION_DAYS = 7  # Bundan eski saatlik özetler günlüğe sıkıştırılır
+
+
+class MessageStatsBuffer:
+    """Mesaj sayaçlarını bellekte biriktirir ve toplu halde veritabanına yazar (write-behind)"""
+    def __init__(self, max_pending=500, flush_interval=5.0):
+        self.max_pending = max_pending      # Bu kadar mesaj birikince hemen yaz
+        self.flush_interval = flush_interval  # En geç bu kadar saniyede bir yaz
+        self.pending = {}  # user_id -> [artış, last_active]
+        self.activity = {}  # (guild_id, kind, subject_id, saat) -> artış
+        self.pending_messages = 0
+        self._flush_lock = asyncio.Lock()
+        self._flush_task = None
+        self._timer_task = None
+
+        # Metrikler
+        self.flush_count = 0
+        self.flushed_messages = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.failed_flushes = 0
+
+    def start(self):
+        if self._timer_task is None:
+            self._timer_task = asyncio.create_task(self._flush_periodically())
+
+    async def stop(self):
+        """Zamanlayıcıyı durdurur ve kalan sayaçları yazar"""
+        if self._timer_task:
+            self._timer_task.cancel()
+            self._timer_task = None
+        await self.flush()
+
+    def add(self, user_id, timestamp, guild_id=None, channel_id=None, bucket=None):
+        entry = self.pending.get(user_id)
+        if entry:
+            entry[0] += 1
+            if timestamp > entry[1]:
+                entry[1] = timestamp
+        else:
+            self.pending[user_id] = [1, timestamp]
+        self.pending_messages += 1
+
+        # Sunucu mesajları saatlik etkinlik özetlerine de sayılır
+        if guild_id is not None:
+            for key in ((guild_id, 'guild', 0, bucket),
+                        (guild_id, 'channel', channel_id, bucket),
+                        (guild_id, 'user', user_id, bucket)):
+                self.activity[key] = self.activity.get(key, 0) + 1
+
+        # Eşik aşıldıysa zamanlayıcıyı beklemeden yaz
+        if self.pending_messages >= self.max_pending and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush())
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self.pending:
+                return
+
+            # Tamponu değiştir; yazma sürerken gelen mesajlar yeni tampona düşer
+            batch, self.pending = self.pending, {}
+            activity, self.activity = self.activity, {}
+            batch_messages, self.pending_messages = self.pending_messages, 0
+            rows = [(user_id, count, last_active) for user_id, (count, last_active) in batch.items()]
+            activity_rows = [(*key, count) for key, count in activity.items()]
+            guild_counts = {}
+            for (guild_id, kind, subject_id, _), count in activity.items():
+                if kind == 'user':
+                    guild_counts[(guild_id, subject_id)] = guild_counts.get((guild_id, subject_id), 0) + count
+            guild_rows = [(*key, count) for key, count in guild_counts.items()]
+
+            started = time.perf_counter()
+            try:
+                await apply_message_stats_batch(rows, activity_rows, guild_rows)
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.error(f"Mesaj istatistikleri yazılamadı ({len(rows)} kullanıcı): {e}")
+                self._restore(batch, activity, batch_messages)
+                return
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.flush_count += 1
+            self.flushed_messages += batch_messages
+            self.last_flush_ms = elapsed_ms
+            self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+            logger.debug(f"{batch_messages} mesaj ({len(rows)} kullanıcı) {elapsed_ms:.1f}ms içinde yazıldı, "
+                         f"kuyrukta {self.pending_messages} mesaj var")
+
+    def _restore(self, batch, activity, batch_messages):
+        """Başarısız yazmada sayaçları kaybetmemek için tampona geri ekler"""
+        for user_id, (count, last_active) in batch.items():
+            entry = self.pending.get(user_id)
+            if entry:
+                entry[0] += count
+                entry[1] = max(entry[1], last_active)
+            else:
+                self.pending[user_id] = [count, last_active]
+        for key, count in activity.items():
+            self.activity[key] = self.activity.get(key, 0) + count
+        self.pending_messages += batch_messages
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Periyodik yazma hatası: {e}")
+
 
 class Statistics(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.buffer = MessageStatsBuffer()
+        self.leaderboard = Leaderboard()
+
+    async def cog_load(self):
+        # Sıralama indeksi açılışta veritabanından kurulur, sonra her mesajda bellekte güncellenir
+        started = time.perf_counter()
+        rows = await load_guild_message_counts()
+        self.leaderboard = await asyncio.to_thread(Leaderboard.from_rows, rows)
+        logger.info(f"Sıralama indeksi {len(rows)} satırdan {(time.perf_counter() - started) * 1000:.0f}ms içinde kuruldu")
+        self.buffer.start()
+        self.compact_rollups.start()
+
+    async def cog_unload(self):
+        self.compact_rollups.cancel()
+        # Kapanışta bekleyen sayaçları kaybetme
+        await self.buffer.stop()
 
     @commands.Cog.listener()
     async def on_message(self, message):
         if message.author.bot:
             return
-        update_message_stats(message.author.id)
+        created_at = message.created_at
+        if message.guild is None:
+            self.buffer.add(message.author.id, created_at.strftime('%Y-%m-%d %H:%M:%S'))
+            return
+        epoch = int(created_at.timestamp())
+        self.leaderboard.increment(message.guild.id, message.author.id)
+        self.buffer.add(message.author.id, created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                        guild_id=message.guild.id, channel_id=message.channel.id, bucket=epoch - epoch % HOUR)
+
+    @tasks.loop(hours=1)
+    async def compact_rollups(self):
+        """Eski saatlik özetleri günlük özetlere sıkıştırır"""
+        now = int(time.time())
+        cutoff = now - now % DAY - HOURLY_RETENTION_DAYS * DAY
+        try:
+            started = time.perf_counter()
+            moved = await compact_activity(cutoff)
+            if moved:
+                logger.info(f"{moved} saatlik özet satırı {(time.perf_counter() - started) * 1000:.1f}ms içinde günlüğe sıkıştırıldı")
+        except Exception as e:
+            logger.error(f"Etkinlik özetleri sıkıştırılamadı: {e}")
+
+    @compact_rollups.before_loop
+    async def before_compact_rollups(self):
+        await self.bot.wait_until_ready()
+
+    @commands.hybrid_command(name='stats', description='Sunucu istatistiklerini gösterir')
+    @commands.guild_only()
+    async def server_stats(self, ctx):
+        """Sunucu mesaj istatistiklerini gösterir"""
+        guild = ctx.guild
+        now = int(time.time())
+        day, week, month = await asyncio.gather(
+            get_activity_total(guild.id, 'guild', 0, now - DAY),
+            get_activity_total(guild.id, 'guild', 0, now - 7 * DAY),
+            get_activity_total(guild.id, 'guild', 0, now - 30 * DAY),
+        )
+        top_channels = await get_top_activity(guild.id, 'channel', now - 7 * DAY)
+
+        embed = discord.Embed(title=f"📊 {guild.name} İstatistikleri", color=discord.Color.blue())
+        embed.add_field(name="👥 Üye Sayısı", value=f"{guild.member_count:,}", inline=True)
+        embed.add_field(name="💬 Kanal Sayısı", value=f"{len(guild.text_channels)}", inline=True)
+        embed.add_field(
+            name="📨 Mesajlar",
+            value=f"Son 24 saat: `{day:,}`\nSon 7 gün: `{week:,}`\nSon 30 gün: `{month:,}`",
+            inline=False
+        )
+        if top_channels:
+            lines = [f"<#{channel_id}>: `{count:,}`" for channel_id, count in top_channels]
+            embed.add_field(name="🔥 En Aktif Kanallar (7 gün)", value="\n".join(lines), inline=False)
+        await ctx.reply(embed=embed)
+
+    @commands.hybrid_command(name='userstats', description='Kullanıcı istatistiklerini gösterir')
+    @commands.guild_only()
+    async def user_stats(self, ctx, member: discord.Member = None):
+        """Kullanıcının mesaj istatistiklerini gösterir"""
+        member = member or ctx.author
+        now = int(time.time())
+        lifetime, day, week, month = await asyncio.gather(
+            get_user_stats(member.id),
+            get_activity_total(ctx.guild.id, 'user', member.id, now - DAY),
+            get_activity_total(ctx.guild.id, 'user', member.id, now - 7 * DAY),
+            get_activity_total(ctx.guild.id, 'user', member.id, now - 30 * DAY),
+        )
+        total, last_active = lifetime if lifetime else (0, None)
+
+        embed = discord.Embed(title=f"📈 {member.display_name} İstatistikleri", color=discord.Color.green())
+        embed.add_field(
+            name="📨 Bu Sunucudaki Mesajlar",
+            value=f"Son 24 saat: `{day:,}`\nSon 7 gün: `{week:,}`\nSon 30 gün: `{month:,}`",
+            inline=False
+        )
+        embed.add_field(name="🌐 Toplam Mesaj", value=f"{total:,}", inline=True)
+        embed.add_field(name="🕒 Son Aktiflik (UTC)", value=last_active or "Bilinmiyor", inline=True)
+        if member.avatar:
+            embed.set_thumbnail(url=member.avatar.url)
+        await ctx.reply(embed=embed)
+
+    @commands.hybrid_command(name='leaderboard', description='Sunucunun en aktif kullanıcılarını gösterir')
+    @commands.guild_only()
+    async def leaderboard_command(self, ctx, member: discord.Member = None):
+        """En çok mesaj atan 10 kullanıcıyı ve istenen kullanıcının sırasını gösterir"""
+        member = member or ctx.author
+        top = self.leaderboard.top(ctx.guild.id, 10)
+        if not top:
+            await ctx.reply("Bu sunucuda henüz sayılmış bir mesaj yok.")
+            return
+
+        medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+        lines = []
+        for position, (user_id, count) in enumerate(top, start=1):
+            lines.append(f"{medals.get(position, f'`#{position}`')} <@{user_id}> — `{count:,}` mesaj")
+
+        embed = discord.Embed(title=f"🏆 {ctx.guild.name} Liderlik Tablosu",
+                              description="\n".join(lines), color=discord.Color.gold())
+        rank = self.leaderboard.rank(ctx.guild.id, member.id)
+        if rank:
+            position, count, total = rank
+            embed.set_footer(text=f"{member.display_name}: #{position}/{total} ({count:,} mesaj)")
+        else:
+            embed.set_footer(text=f"{member.display_name} henüz sıralamada değil")
+        await ctx.reply(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+    @commands.command(name='statsbuffer')
+    @commands.is_owner()
+    async def buffer_status(self, ctx):
+        """Mesaj istatistik tamponunun durumunu gösterir"""
+        buf = self.buffer
+        await ctx.send(
+            f"📊 Kuyruk: {buf.pending_messages} mesaj ({len(buf.pending)} kullanıcı)\n"
+            f"💾 Yazma: {buf.flush_count} kez, toplam {buf.flushed_messages} mesaj, {buf.failed_flushes} hata\n"
+            f"⏱️ Son yazma: {buf.last_flush_ms:.1f}ms, en uzun: {buf.max_flush_ms:.1f}ms"
+        )
 
 async def setup(bot):
     await bot.add_cog(Statistics(bot))
@@ -2,6 +2,7 @@ import discord
 from discord.ext import commands
 import yt_dlp as youtube_dl
 import asyncio
+import itertools
 import os
 import logging
 import traceback
@@ -10,17 +11,35 @@ import subprocess
 import shutil
 import tempfile
 import time
-from concurrent.futures import ThreadPoolExecutor
 import ffmpeg  # Import the ffmpeg-python library
 import sys
 import io
 import wave
-import numpy as np
 from discord import PCMVolumeTransformer
 from discord.opus import Encoder as OpusEncoder
-from urllib.parse import urlparse
+from urllib.parse import urlparse, quote_plus
 import aiohttp
 from aiohttp.client_exceptions import ClientConnectorError
+from music_cache import (SongInfoCache, SingleFlight, AudioFileCache, AUDIO_CACHE_DIR, video_id_from_url,
+                         playlist_id_from_url, normalize_query)
+from database import get_search_result, record_search_hit, save_search_result, record_track_play, get_top_tracks
+from ytdl_pool import YoutubeDLPool, PlaylistCursor, search_candidates
+from music_queue import GuildQueue, QueuedTrack
+from music_audio import (create_audio_source, ControlledOpusAudio, DSPAudio, TrackedAudio, PCMRingBuffer,
+                         PCM_BUFFER_MS, input_options, tempo_filters, filter_signature)
+from music_broadcast import BroadcastRegistry
+
+# Arama -> video ID eşlemesi nadiren değişir; süresi dolunca arama bir kez daha yapılır
+SEARCH_CACHE_TTL = 30 * 24 * 3600
+# Sıradaki şarkının ffmpeg'i, çalan şarkının bitmesine bu kadar saniye kala başlatılır
+PREFETCH_LEAD = 20
+# Çalma listeleri bu büyüklükte sayfalarla okunur; sırada en fazla PLAYLIST_WINDOW şarkı önceden çözülür
+PLAYLIST_PAGE_SIZE = 100
+PLAYLIST_WINDOW = 3
+# Yeniden başlatmadan sonra her sunucunun en çok çalınan şarkıları düşük öncelikle önceden çözülür
+PREWARM_TRACKS = 5
+PREWARM_DELAY = 30  # on_ready'den sonra ilk komutlara yer açmak için beklenen süre (sn)
+PREWARM_INTERVAL = 2.0  # İki çözümleme arasındaki en kısa süre (sn)
 
 # Configure logger for this module
 logger = logging.getLogger('sezar.music')
@@ -34,7 +53,8 @@ if not logger.handlers:
 
 class FFmpegPCMAudio(discord.AudioSource):
     """Audio source for FFmpeg with enhanced error handling for server environments"""
-    def __init__(self, source, *, executable=None, pipe=False, stderr=None, before_options=None, options=None):
+    def __init__(self, source, *, executable=None, pipe=False, stderr=None, before_options=None, options=None,
+                 buffer_ms=PCM_BUFFER_MS):
         self.source = source
         self.pipe = pipe
         self.stderr = stderr
@@ -43,6 +63,8 @@ class FFmpegPCMAudio(discord.AudioSource):
         self.process = None
         self.stdout = None
         self.block_size = 3840  # opus frame size * 2 channels * 2 bytes per sample
+        # ffmpeg çıktısı arka planda bu tampona okunur; ses thread'i boruyu hiç beklemez
+        self.buffer = PCMRingBuffer(self.block_size, buffer_ms)
         
         # FFmpeg executable finding with better error handling
         if executable:
@@ -127,8 +149,7 @@ class FFmpegPCMAudio(discord.AudioSource):
                 self.process = subprocess.Popen(
                     args,
                     stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE if not self.pipe else subprocess.STDOUT,
-                    bufsize=self.block_size  # Buffering helps with smoother playback
+                    stderr=subprocess.PIPE if not self.pipe else subprocess.STDOUT
                 )
                 
                 if self.process.poll() is not None:
@@ -136,6 +157,7 @@ class FFmpegPCMAudio(discord.AudioSource):
                     raise Exception(f"FFmpeg process failed to start! Exit code: {self.process.returncode}")
                 
                 self.stdout = self.process.stdout
+                self.buffer.start(self.stdout)
                 
             except FileNotFoundError:
                 logger.error(f"FFmpeg executable not found: {self.executable}")
@@ -175,8 +197,8 @@ class FFmpegPCMAudio(discord.AudioSource):
                 return b''  # Return empty to indicate end of stream
 
         try:
-            # Read bytes from stdout of the ffmpeg process
-            data = self.stdout.read(self.block_size)
+            # Okuma thread'inin doldurduğu tampondan al; tampon boşsa sayaç artar ve veri beklenir
+            data = self.buffer.pop()
             
             if not data:
                 # End of the stream
@@ -192,11 +214,13 @@ class FFmpegPCMAudio(discord.AudioSource):
     def cleanup(self):
         """Clean up resources when done"""
         try:
+            self.buffer.stop()
             if self.process:
                 try:
                     self.process.kill()
                 except Exception as e:
                     logger.debug(f"Error killing process during cleanup: {e}")
+                logger.debug(f"PCM buffer: {self.buffer.frames_read} frames, {self.buffer.underruns} underruns")
                 self.process = None
                 self.stdout = None
         except Exception as e:
@@ -205,13 +229,67 @@ class FFmpegPCMAudio(discord.AudioSource):
     def is_opus(self):
         return False
         
+def format_duration(seconds):
+    if not seconds:
+        return "?"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+class SearchPickerView(discord.ui.View):
+    """Arama sonuçlarından birini seçtiren açılır menü; sadece komutu kullanan kişi seçebilir"""
+    def __init__(self, author_id, candidates):
+        super().__init__(timeout=30)
+        self.author_id = author_id
+        self.candidates = candidates
+        self.choice = None
+        self.message = None
+        
+        select = discord.ui.Select(placeholder="Çalınacak şarkıyı seçin", options=[
+            discord.SelectOption(label=(title or video_id)[:100], description=f"Süre: {format_duration(duration)}",
+                                 value=str(index))
+            for index, (video_id, title, duration) in enumerate(candidates)
+        ])
+        select.callback = self.on_select
+        self.add_item(select)
+    
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Bu menüyü sadece komutu kullanan kişi kullanabilir.", ephemeral=True)
+            return False
+        return True
+    
+    async def on_select(self, interaction):
+        self.choice = self.candidates[int(interaction.data['values'][0])]
+        for item in self.children:
+            item.disabled = True
+        await interaction.response.edit_message(content=f"▶️ Seçildi: **{self.choice[1]}**", view=self)
+        self.stop()
+    
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message:
+            try:
+                await self.message.edit(content="⌛ Seçim süresi doldu.", view=self)
+            except discord.HTTPException:
+                pass
+
 class YoutubeMusic(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.thread_pool = ThreadPoolExecutor(max_workers=3)  # Increased for better performance
+        self.ytdl = YoutubeDLPool(workers=3)  # Kalıcı YoutubeDL örnekleri; SEZAR_YTDL_BACKEND=process ile ayrı süreçler
         self.currently_playing = {}  # Guild ID -> song info
+        self.queues = {}  # Guild ID -> GuildQueue
+        self.info_cache = SongInfoCache()  # Video ID -> kırpılmış yt-dlp bilgisi
+        self.inflight = SingleFlight()  # Aynı video/arama için eşzamanlı çözümlemeler birleştirilir
         self.temp_dir = tempfile.mkdtemp(prefix="sezar_music_")
+        # Sık çalınan şarkıların Ogg/Opus dosyaları; SEZAR_AUDIO_CACHE_DIR verilmezse geçici klasörde tutulur
+        self.audio_cache = AudioFileCache(AUDIO_CACHE_DIR or os.path.join(self.temp_dir, 'audio'))
+        # Aynı şarkı aynı ayarlarla birden fazla sunucuda çalarsa tek ffmpeg'in çerçeveleri paylaşılır
+        self.broadcasts = BroadcastRegistry()
         self.http_session = None  # Will be initialized in cog_load
+        self._prewarm_task = None
         
         # Özel FFmpeg yolu - Kullanıcının kurduğu konum
         self.ffmpeg_path = r"C:\ffmpeg-master-latest-win64-gpl-shared\bin\ffmpeg.exe"
@@ -264,16 +342,80 @@ class YoutubeMusic(commands.Cog):
             timeout=aiohttp.ClientTimeout(total=10),
             connector=aiohttp.TCPConnector(ssl=False)  # Disable SSL for better compatibility
         )
+        # YoutubeDL örneklerini arka planda hazırla; ilk /çal extractor yüklemesini beklemesin
+        self._warm_task = asyncio.create_task(self._warm_ytdl())
     
+    async def _warm_ytdl(self):
+        try:
+            await self.ytdl.warm()
+        except Exception as e:
+            logger.warning(f"YoutubeDL havuzu ısıtılamadı: {str(e)}")
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # on_ready yeniden bağlanmalarda tekrar gelir; ön ısıtma bir kez yapılır
+        if self._prewarm_task is None:
+            self._prewarm_task = asyncio.create_task(self._prewarm_popular())
+
+    async def _prewarm_popular(self):
+        """Her sunucunun en çok çalınan şarkılarının bilgisini ve stream URL'sini önceden çözer.
+        Çözümlemeler havuzun düşük öncelikli kuyruğundan, tek tek ve aralıklı yapılır; /çal istekleri hep önce gelir."""
+        await asyncio.sleep(PREWARM_DELAY)
+        if self.ytdl.workers < 2:
+            logger.info("Music prewarm skipped: pool has a single worker")
+            return
+        
+        per_guild = []
+        for guild in self.bot.guilds:
+            try:
+                rows = await get_top_tracks(guild.id, PREWARM_TRACKS)
+            except Exception as e:
+                logger.warning(f"Music prewarm could not read play counts: {str(e)}")
+                return
+            per_guild.append([(guild.id, video_id) for video_id, _, _ in rows])
+        
+        # Sunucuların 1. şarkıları, sonra 2. şarkıları...; büyük bir sunucu diğerlerini bekletmez
+        order = []
+        seen = set()
+        for guild_id, video_id in (item for group in itertools.zip_longest(*per_guild) for item in group if item):
+            if video_id not in seen:
+                seen.add(video_id)
+                order.append((guild_id, video_id))
+        # Bilgi önbelleğinin yarısından fazlası ön ısıtmayla dolmasın
+        order = order[:self.info_cache.max_entries // 2]
+        
+        warmed = skipped = failed = 0
+        started = time.perf_counter()
+        for guild_id, video_id in order:
+            if video_id in self.audio_cache or self.info_cache.fresh(video_id):
+                skipped += 1
+                continue
+            link = f"https://www.youtube.com/watch?v={video_id}"
+            try:
+                info = await self._coalesced_extract(link, video_id, guild_id, None, background=True)
+            except Exception as e:
+                logger.warning(f"Music prewarm failed for {video_id}: {str(e)}")
+                info = None
+            if isinstance(info, dict):
+                warmed += 1
+            else:
+                failed += 1
+            await asyncio.sleep(PREWARM_INTERVAL)
+        print(f"🔥 Müzik ön ısıtma: {warmed} şarkı çözüldü, {skipped} zaten hazırdı, {failed} başarısız "
+              f"({time.perf_counter() - started:.0f} sn)")
+
     async def cog_unload(self):
         """Clean up resources when cog is unloaded"""
         try:
+            if self._prewarm_task is not None:
+                self._prewarm_task.cancel()
+
             # Close HTTP session if it exists
             if self.http_session:
                 await self.http_session.close()
                 
-            # Shutdown thread pool
-            self.thread_pool.shutdown(wait=False)
+            # Shutdown YoutubeDL pool
+            self.ytdl.shutdown()
             
             # Remove temp directory
             if os.path.exists(self.temp_dir):
@@ -318,6 +460,9 @@ class YoutubeMusic(commands.Cog):
                 # Clean up resources for this guild
                 if ctx.guild.id in self.currently_playing:
                     del self.currently_playing[ctx.guild.id]
+                queue = self.queues.pop(ctx.guild.id, None)
+                if queue is not None:
+                    queue.clear()
                 
                 channel_name = ctx.voice_client.channel.name
                 await ctx.voice_client.disconnect(force=True)  # Force disconnect in case of issues
@@ -331,94 +476,56 @@ class YoutubeMusic(commands.Cog):
             print(f"❌ Ses kanalından ayrılırken hata: {str(e)}")
             await ctx.reply("Ses kanalından ayrılırken bir hata oluştu.")
 
-    async def _search_youtube(self, query):
-        """Doğrudan YouTube'da arama yapar ve ilk videoyu döndürür"""
-        print(f"DEBUG: YouTube'da arama yapılıyor: {query}")
-        
-        # YouTube'un kendi arama sayfasına benzer bir URL oluştur
-        # Bu, YouTube'un arama sonuçlarını doğrudan almak yerine
-        # "YouTube'da <arama_terimi>" araması yapıp ilk sonucu alır
-        direct_search_query = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
+    async def _search_youtube(self, query, guild_id=None):
+        """YouTube'da arama yapar ve ilk videonun bilgisini döndürür.
+        Daha önce çözülmüş aramalar kalıcı önbellekten gelir ve arama adımı tamamen atlanır."""
+        key = normalize_query(query)
+        if not key:
+            return None
+        return await self.inflight.run(('search', key), lambda: self._resolve_search(query, key, guild_id))
+
+    async def _resolve_search(self, query, key, guild_id):
+        cached = await get_search_result(key, SEARCH_CACHE_TTL)
+        if cached:
+            video_id, title = cached
+            logger.debug(f"Arama önbellekten çözüldü: {query} -> {video_id} ({title})")
+            await record_search_hit(key)
+            info = await self._get_song_info(f"https://www.youtube.com/watch?v={video_id}", guild_id=guild_id)
+            if info is not None and info != "NOT_FOUND":
+                return info
+            # Video kaldırılmış olabilir; aşağıda yeniden aranır
         
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'noplaylist': True,
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,  # Tam video bilgisini al
-            'default_search': 'auto',
-            'source_address': '0.0.0.0',
-            'geo_bypass': True,
-            'nocheckcertificate': True,
-        }
+        candidates = await self._search_candidates(query, guild_id, limit=1)
+        if not candidates:
+            return None
+        video_id, title, _ = candidates[0]
+        await save_search_result(key, video_id, title)
         
-        try:
-            # İki aşamalı yaklaşım: Önce arama sonuçlarını al, sonra ilk videonun bilgilerini al
-                with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                # İlk olarak arama yap ve sonuçları al
-                    print(f"DEBUG: Doğrudan YouTube arama URL'si: {direct_search_query}")
-                try:
-                    search_results = await self.bot.loop.run_in_executor(
-                        self.thread_pool, 
-                        lambda: ydl.extract_info(direct_search_query, download=False, process=False)
-                    )
-                    
-                    if search_results is None or 'entries' not in search_results or not search_results['entries']:
-                        print("DEBUG: Hiç arama sonucu bulunamadı")
-                        return None
-                        
-                    # İlk videoyu al ve onun URL'sini kullan
-                    first_result = search_results['entries'][0]
-                    if 'url' not in first_result or not first_result['url'].startswith(('https://www.youtube.com', 'https://youtu.be')):
-                        print(f"DEBUG: İlk sonuçta geçerli YouTube URL'si bulunamadı: {first_result.get('url', 'URL yok')}")
-                    return None
-                    
-                    video_url = first_result['url']
-                    print(f"DEBUG: İlk video URL'si: {video_url}")
-                    
-                    # Şimdi bu video URL'si için tam bilgileri al
-                    video_info = await self.bot.loop.run_in_executor(
-                        self.thread_pool,
-                        lambda: ydl.extract_info(video_url, download=False, process=True)
-                    )
-                    
-                    if video_info:
-                        print(f"DEBUG: Video bilgisi alındı: {video_info.get('title', 'Başlık yok')}")
-                        return video_info
-                    else:
-                        print("DEBUG: Video bilgisi alınamadı")
-                        return None
-                        
-                except Exception as e:
-                    print(f"DEBUG: YouTube arama hatası: {str(e)}")
-                    # Yedek yöntem: Direkt YouTube linki oluşturmaya çalış
-                    try:
-                        # YouTube araması için URL oluştur
-                        # Bu resmi olmayan bir yöntem ama denemeye değer
-                        ytsearch_url = f"ytsearch:{query}"
-                        print(f"DEBUG: Alternatif arama yöntemi deneniyor: {ytsearch_url}")
-                        
-                        search_results = await self.bot.loop.run_in_executor(
-                            self.thread_pool,
-                            lambda: ydl.extract_info(ytsearch_url, download=False)
-                        )
-                        
-                        if search_results and 'entries' in search_results and search_results['entries']:
-                            first_video = search_results['entries'][0]
-                            print(f"DEBUG: Alternatif yöntem ile video bulundu: {first_video.get('title', 'Başlık yok')}")
-                            return first_video
-                            
-                        print("DEBUG: Alternatif arama yöntemi de sonuç vermedi")
-                        return None
-                    except Exception as alt_e:
-                        print(f"DEBUG: Alternatif arama yöntemi de başarısız oldu: {str(alt_e)}")
-                        return None
-                    
-        except Exception as e:
-            print(f"DEBUG: Arama işlemi sırasında genel hata: {str(e)}")
+        info = await self._get_song_info(f"https://www.youtube.com/watch?v={video_id}", guild_id=guild_id)
+        if info is None or info == "NOT_FOUND":
             return None
-                
-        return None
+        return info
+
+    async def _search_candidates(self, query, guild_id=None, limit=5):
+        """Arama sonuçlarını [(video_id, başlık, süre)] olarak döndürür; hiçbir sonuç tam çözülmez"""
+        logger.debug(f"YouTube'da arama yapılıyor: {query}")
+        
+        # Önce ytsearch, sonuç gelmezse YouTube'un kendi arama sayfası kullanılır
+        direct_search_query = f"https://www.youtube.com/results?search_query={quote_plus(query)}"
+        
+        for search_url in (f"ytsearch{limit}:{query}", direct_search_query):
+            try:
+                logger.debug(f"Arama URL'si: {search_url}")
+                started = time.perf_counter()
+                candidates = await self.ytdl.run('search', search_candidates, search_url, limit, guild_id=guild_id)
+                if candidates:
+                    logger.debug(f"{len(candidates)} aday {(time.perf_counter() - started) * 1000:.0f} ms içinde bulundu, "
+                                 f"ilk video: {candidates[0][0]} ({candidates[0][1]})")
+                    return candidates
+                logger.debug("Hiç arama sonucu bulunamadı")
+            except Exception as e:
+                logger.warning(f"YouTube arama hatası: {str(e)}")
+        return []
 
     async def _check_url_accessibility(self, link):
         """Check if a URL is accessible"""
@@ -454,7 +561,8 @@ class YoutubeMusic(commands.Cog):
         ses="Ses düzeyi (20-1000 arası, varsayılan: 100)",
         bas="Bas miktarı (20-1000 arası, varsayılan: 100)",
         tizlik="Ses tonu ayarı (0-200 arası, 0: En kalın, 100: Normal, 200: En ince)",
-        hız="Oynatma hızı (0.1-10 arası, varsayılan: 1 - normal hız)"
+        hız="Oynatma hızı (0.1-10 arası, varsayılan: 1 - normal hız)",
+        seçim="Aramada ilk 5 sonucu listeler ve çalınacak olanı seçtirir"
     )
     async def cal(
         self,
@@ -464,7 +572,8 @@ class YoutubeMusic(commands.Cog):
         ses: int = 100,
         bas: int = 100,
         tizlik: int = 100,
-        hız: float = 1.0
+        hız: float = 1.0,
+        seçim: bool = False
     ):
         """
         YouTube videosunun sesini çalar, ses, bas ve tizlik düzeyini ayarlayabilirsiniz.
@@ -476,6 +585,7 @@ class YoutubeMusic(commands.Cog):
         - bas: Bas miktarı (20-1000, varsayılan 100)
         - tizlik: Ses tonu ayarı (0: En kalın, 100: Normal, 200: En ince)
         - hız: Oynatma hızı (0.1-10, varsayılan 1 - normal hız)
+        - seçim: Aramada ilk 5 sonuçtan seçim yaptırır
         """
         # Debug: Hangi parametrelerin geldiğini görelim
         print(f"DEBUG: çal komutu çağrıldı - link: {link}, search: {search}, ses: {ses}, bas: {bas}, tizlik: {tizlik}, hız: {hız}")
@@ -579,13 +689,51 @@ class YoutubeMusic(commands.Cog):
             # Ses düzeylerini Discord PCMVolumeTransformer'ın kullandığı 0-2.0 aralığına çevir
             normalized_volume = ses_duzeyi / 100
             
+            # Aynı şarkı çalıyorsa yeniden çözümleme yapılmaz; sadece ayarlar kaldığı yerden uygulanır
+            settings = {'volume': normalized_volume, 'speed': hiz_miktari, 'bas': bas_miktari, 'tizlik': tizlik_miktari}
+            if link is not None and await self._retune_current(ctx, video_id_from_url(link), settings):
+                await send_response("🎛️ Ayarlar güncellendi, şarkı kaldığı yerden devam ediyor.", True)
+                return
+            
             # Video bilgisini al
             info = None
+            playlist_feed = None
             
-            if search is not None:
+            if link is not None and playlist_id_from_url(link):
+                # Çalma listesinin sadece ilk şarkısı beklenir; kalanı çaldıkça sayfa sayfa okunur
+                await send_response("📃 Çalma listesi okunuyor...", True)
+                playlist_feed = self._playlist_tracks(link, ctx, settings)
+                try:
+                    first = await anext(playlist_feed, None)
+                    info = await self._resolve_track(first, ctx.guild.id) if first else None
+                except Exception as e:
+                    logger.error(f"Error reading playlist {link}: {str(e)}")
+                    info = None
+                if info is None:
+                    await send_response("❌ Çalma listesi okunamadı, boş ya da ilk şarkısı oynatılamıyor.")
+                    return
+            elif search is not None and seçim:
+                # Sonuçlar çözülmeden listelenir; sadece seçilen video tam çözülür
+                guild_id = ctx.guild.id if ctx.guild else None
+                candidates = await self._search_candidates(search, guild_id, limit=5)
+                if not candidates:
+                    await send_response(f"❌ **{search}** için YouTube'da sonuç bulunamadı veya bir hata oluştu.")
+                    return
+                
+                view = SearchPickerView(ctx.author.id, candidates)
+                view.message = await ctx.channel.send(f"🔍 **{search}** için sonuçlar:", view=view)
+                await view.wait()
+                if view.choice is None:
+                    return
+                
+                info = await self._get_song_info(f"https://www.youtube.com/watch?v={view.choice[0]}", guild_id=guild_id)
+                if info is None or info == "NOT_FOUND":
+                    await send_response("❌ Bu video bulunamıyor veya oynatılamıyor. Lütfen başka bir video deneyin.")
+                    return
+            elif search is not None:
                 # Arama terimi verilmişse, YouTube'da ara
                 await send_response(f"🔍 **{search}** için YouTube'da arama yapılıyor...", True)
-                info = await self._search_youtube(search)
+                info = await self._search_youtube(search, guild_id=ctx.guild.id if ctx.guild else None)
                 
                 if info is None:
                     await send_response(f"❌ **{search}** için YouTube'da sonuç bulunamadı veya bir hata oluştu.")
@@ -596,11 +744,11 @@ class YoutubeMusic(commands.Cog):
                 
                 if is_youtube_url:
                     # YouTube linki doğrudan kullan
-                    info = await self._get_song_info(link)
+                    info = await self._get_song_info(link, guild_id=ctx.guild.id if ctx.guild else None)
                 else:
                     # YouTube linki değilse arama yap
                     await send_response(f"🔍 **{link}** için YouTube'da arama yapılıyor...", True)
-                    info = await self._search_youtube(link)
+                    info = await self._search_youtube(link, guild_id=ctx.guild.id if ctx.guild else None)
                 
                 if info is None or info == "NOT_FOUND":
                     if is_youtube_url:
@@ -615,138 +763,75 @@ class YoutubeMusic(commands.Cog):
             # Önce direct_url kontrolü (özel alanımız)
             if 'direct_url' in info:
                 audio_url = info['direct_url']
-                print("DEBUG: direct_url kullanılıyor")
+                logger.debug("direct_url kullanılıyor")
             # Sonra url kontrolü (standart alan)
             elif 'url' in info:
                 audio_url = info['url']
-                print("DEBUG: url alanı kullanılıyor")
+                logger.debug("url alanı kullanılıyor")
             # Son olarak formatlardan URL çıkarma
             elif 'formats' in info and info['formats']:
                 for format in info['formats']:
                     if format.get('acodec') != 'none' and 'url' in format:
                         audio_url = format['url']
-                        print("DEBUG: format URL'si kullanılıyor")
+                        logger.debug("format URL'si kullanılıyor")
                         break
             
             if not audio_url:
                 await send_response("❌ Video ses URL'si alınamadı.")
                 return
             
-            print(f"DEBUG: Audio URL: {audio_url[:50]}...")
+            if playlist_feed is None and await self._retune_current(ctx, info.get('id'), settings):
+                await send_response("🎛️ Ayarlar güncellendi, şarkı kaldığı yerden devam ediyor.", True)
+                return
+            
+            if playlist_feed is not None:
+                # Listenin kalanı, ilk şarkı çalmaya ya da sıraya girdikten sonra arka planda eklenir
+                queue = self._guild_queue(ctx.guild.id)
+                queue.feeds.append(playlist_feed)
+                queue.spawn(self._fill_from_playlists(ctx.guild.id))
+            
+            logger.debug(f"Audio URL: {audio_url[:50]}...")
             
-            title = info.get('title', 'Bilinmeyen Şarkı')
             thumbnail = info.get('thumbnail')
             duration = info.get('duration', 0)  # Duration in seconds
             
+            title = info.get('title', 'Bilinmeyen Şarkı')
+            
+            # Bir şarkı çalıyorsa yenisi kesilmeden sıraya eklenir
+            if ctx.voice_client and (ctx.voice_client.is_playing() or ctx.voice_client.is_paused()):
+                video_id = info.get('id')
+                track = QueuedTrack(info.get('webpage_url') or (f"https://www.youtube.com/watch?v={video_id}" if video_id else link),
+                                    title=title, video_id=video_id, duration=info.get('duration'),
+                                    requester=ctx.author.name, channel=ctx.channel, info=info, **settings)
+                position = self._guild_queue(ctx.guild.id).add(track)
+                if position is None:
+                    await send_response("❌ Sıra dolu. Yeni şarkı eklemek için sıradakilerden birini çıkarın.")
+                    return
+                self._schedule_prefetch(ctx.guild.id)
+                await send_response(f"📝 **{title}** sıraya eklendi (#{position}).", True)
+                return
+            
             # Save current song info
             self.currently_playing[ctx.guild.id] = {
                 'title': title,
+                'video_id': info.get('id'),
                 'url': audio_url,
                 'thumbnail': thumbnail,
                 'requester': ctx.author.name,
                 'start_time': time.time(),
                 'duration': duration,
                 'volume': normalized_volume,  # Ses düzeyini ekle
-                'speed': hiz_miktari  # Hız bilgisini ekle
+                'speed': hiz_miktari,  # Hız bilgisini ekle
+                'bas': bas_miktari,
+                'tizlik': tizlik_miktari,
+                'source_codec': info.get('acodec'),
             }
             
-            # Stop current audio if any
-            if ctx.voice_client and ctx.voice_client.is_playing():
-                ctx.voice_client.stop()
-                
-            # Set audio options with improved settings for server environments
-            base_options = '-vn'  # Sadece ses, video yok
-            extra_options = ""
-            
-            # FFmpeg için filtre oluştur
-            audio_filters = []
-            
-            # Bass değerine göre FFmpeg filtresi oluştur
-            if bas_miktari != 100:
-                # Normalize bas seviyesini 0.2 - 10 aralığına çevir (daha etkili bas efekti için)
-                bass_gain = (bas_miktari / 100) * 2  # 0.4 - 20 aralığına çevir
-                audio_filters.append(f"bass=g={bass_gain}:f=110:w=0.6")
-                print(f"DEBUG: Bas filtresi oluşturuldu: bass=g={bass_gain}:f=110:w=0.6")
-            
-            # Tizlik değerine göre FFmpeg filtresi oluştur
-            if tizlik_miktari != 100:
-                # Tizlik ayarını uygula
-                if tizlik_miktari < 100:
-                    # Kalınlaştırma modu (0-100 arası)
-                    # 100'e yaklaştıkça etki azalır, 0'a yaklaştıkça daha kalın olur
-                    kalinlik_orani = (100 - tizlik_miktari) / 100  # 0-1 arası normalizasyon
-                    
-                    # Bas artır, tiz azalt - daha güçlü efekt
-                    bass_boost = 6 + (kalinlik_orani * 14)  # 6-20 dB arasında bas artışı
-                    treble_cut = -10 * kalinlik_orani  # 0 ile -10 dB arasında tiz azaltma
-                    mid_cut = -5 * kalinlik_orani  # Orta frekansları azalt
-                    
-                    # Ekolayzer ile farklı frekans bandlarını ayarla
-                    audio_filters.append(f"equalizer=f=60:width_type=o:width=2:g={bass_boost}")  # Düşük frekansları artır
-                    audio_filters.append(f"equalizer=f=300:width_type=o:width=1:g={mid_cut}")   # Orta frekansları azalt
-                    audio_filters.append(f"equalizer=f=1000:width_type=o:width=1:g={mid_cut}")  # Orta frekansları azalt
-                    audio_filters.append(f"equalizer=f=8000:width_type=o:width=2:g={treble_cut}")  # Yüksek frekansları azalt
-                    
-                    print(f"DEBUG: Kalınlaştırma efekti uygulandı (Bass +{bass_boost}dB, Mid {mid_cut}dB, Treble {treble_cut}dB)")
-                    
-                else:
-                    # İnceleştirme modu (100-200 arası)
-                    # 100'e yaklaştıkça etki azalır, 200'e yaklaştıkça daha ince olur
-                    incelik_orani = (tizlik_miktari - 100) / 100  # 0-1 arası normalizasyon
-                    
-                    # Tiz artır, bas azalt - daha güçlü efekt
-                    treble_boost = 6 + (incelik_orani * 14)  # 6-20 dB arasında tiz artışı
-                    bass_cut = -10 * incelik_orani  # 0 ile -10 dB arasında bas azaltma
-                    mid_boost = 3 * incelik_orani  # Orta frekansları artır
-                    
-                    # Ekolayzer ile farklı frekans bandlarını ayarla
-                    audio_filters.append(f"equalizer=f=8000:width_type=o:width=2:g={treble_boost}")  # Yüksek frekansları artır
-                    audio_filters.append(f"equalizer=f=3000:width_type=o:width=1:g={mid_boost}")  # Orta-yüksek frekansları artır
-                    audio_filters.append(f"equalizer=f=1000:width_type=o:width=1:g={mid_boost}")  # Orta frekansları artır
-                    audio_filters.append(f"equalizer=f=80:width_type=o:width=2:g={bass_cut}")  # Düşük frekansları azalt
-                    
-                    print(f"DEBUG: İnceleştirme efekti uygulandı (Treble +{treble_boost}dB, Mid +{mid_boost}dB, Bass {bass_cut}dB)")
-            
-            # Hız değerine göre FFmpeg filtresi oluştur
-            if hiz_miktari != 1.0:
-                # FFmpeg'in atempo filtresi 0.5 ile 2.0 arasındaki değerleri destekler
-                # Daha geniş aralık için birden fazla atempo filtresi arka arkaya kullanılır
-                
-                target_speed = hiz_miktari
-                print(f"DEBUG: Hedef hız: {target_speed}")
-                
-                # Hız 0.5'ten küçük veya 2.0'dan büyükse birden fazla filtre uygula
-                if 0.5 <= target_speed <= 2.0:
-                    # Doğrudan tek filtre kullan
-                    audio_filters.append(f"atempo={target_speed}")
-                    print(f"DEBUG: Hız filtresi oluşturuldu: atempo={target_speed}")
-                else:
-                    # Birden fazla filtre için faktörlere ayır
-                    remaining_speed = target_speed
-                    while remaining_speed < 0.5:
-                        audio_filters.append("atempo=0.5")
-                        remaining_speed /= 0.5
-                    
-                    while remaining_speed > 2.0:
-                        audio_filters.append("atempo=2.0")
-                        remaining_speed /= 2.0
-                    
-                    # Son kalan faktörü ekle (0.5-2.0 aralığında)
-                    if 0.5 <= remaining_speed <= 2.0 and remaining_speed != 1.0:
-                        audio_filters.append(f"atempo={remaining_speed}")
-                    
-                    print(f"DEBUG: Çoklu hız filtresi oluşturuldu: {audio_filters}")
-            
-            # Filtreleri birleştir
-            if audio_filters:
-                extra_options = f'-af "{",".join(audio_filters)}"'
-                print(f"DEBUG: FFmpeg filtresi: {extra_options}")
-                
-            options = f"{base_options} {extra_options}"
-            print(f"DEBUG: FFmpeg seçenekleri: {options}")
-            
-            # Custom play with volume, bass, treble and speed
-            await self._play_with_volume(ctx, audio_url, volume=normalized_volume, extra_options=options)
+            # Bas, tizlik, hız, ses düzeyi ve limiter tek bir ffmpeg filtre zincirinde uygulanır
+            await self._play_with_volume(ctx, audio_url, volume=normalized_volume, bas=bas_miktari,
+                                         tizlik=tizlik_miktari, speed=hiz_miktari, source_codec=info.get('acodec'),
+                                         video_id=info.get('id'))
+            asyncio.create_task(self._track_played(ctx.guild.id, info))
             
             # Şarkı başlatıldı mesajı
             speed_info = f" ({hiz_miktari}x hızında)" if hiz_miktari != 1.0 else ""
@@ -755,11 +840,12 @@ class YoutubeMusic(commands.Cog):
             print(f"Çal komutu hatası: {e}")
             await send_response(f"❌ Müzik çalma hatası: {e}")
 
-    async def _play_with_volume(self, ctx, audio_url: str, volume: float = 0.5, extra_options: str = ""):
+    async def _play_with_volume(self, ctx, audio_url: str, volume: float = 0.5, bas: int = 100, tizlik: int = 100,
+                                speed: float = 1.0, source_codec=None, video_id=None):
         """Ses URL'sini verilen ayarlarla çalar"""
         # Debug: Link kontrolü
-        print(f"DEBUG: _play_with_volume çağrıldı - volume: {volume}")
-        print(f"DEBUG: Ekstra FFmpeg seçenekleri: {extra_options}")
+        logger.debug(f"_play_with_volume çağrıldı - volume: {volume}")
+        logger.debug(f"bas: {bas}, tizlik: {tizlik}, hız: {speed}, kaynak codec: {source_codec}")
         
         # Initial checks and setup
         try:
@@ -802,39 +888,22 @@ class YoutubeMusic(commands.Cog):
                     await ctx.reply("Lütfen önce bir ses kanalına katılın.")
                     return
                     
-            # FFmpeg audio source and options
-            ffmpeg_options = {
-                'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5',
-                'options': extra_options,
-            }
             
-            print(f"DEBUG: Çalma hazırlığı: {audio_url[:50]}...")
-            print(f"DEBUG: FFmpeg yolu: {self.ffmpeg_path}")
-            print(f"DEBUG: FFmpeg seçenekleri: {ffmpeg_options}")
+            logger.debug(f"Çalma hazırlığı: {audio_url[:50]}...")
+            logger.debug(f"FFmpeg yolu: {self.ffmpeg_path}")
             
             # Play the audio with robust error handling
             try:
-                # Create the audio source
-                source = discord.FFmpegPCMAudio(
-                    audio_url,
-                    executable=self.ffmpeg_path,
-                    before_options=ffmpeg_options['before_options'],
-                    options=ffmpeg_options['options']
-                )
-                print("DEBUG: FFmpegPCMAudio kaynağı oluşturuldu")
+                # Opus kaynak ve varsayılan ayarlarda paketler kopyalanır; aksi halde ffmpeg filtreleyip Opus'a kodlar.
+                # Her iki durumda da bot tarafında PCM çözme, ses ölçekleme ve Opus kodlama yapılmaz.
+                source, mode = self._open_source(audio_url, video_id, bas=bas, tizlik=tizlik, speed=speed,
+                                                 volume=volume, source_codec=source_codec)
+                logger.debug(f"FFmpegOpusAudio kaynağı oluşturuldu (mod: {mode})")
+                if ctx.guild and ctx.guild.id in self.currently_playing:
+                    self.currently_playing[ctx.guild.id]['mode'] = mode
                 
-                # Add volume transformation with custom level
-                source = discord.PCMVolumeTransformer(source, volume=volume)
-                print(f"DEBUG: PCMVolumeTransformer uygulandı, ses: {volume}")
-                
-                # Play audio with after callback for error handling
-                def after_playing(error):
-                    if error:
-                        logger.error(f"Error after playing: {error}")
-                        print(f"❌ Oynatma hatası: {error}")
-                        
-                print("DEBUG: Ses çalmaya başlıyor...")
-                ctx.voice_client.play(source, after=after_playing)
+                logger.debug("Ses çalmaya başlıyor...")
+                ctx.voice_client.play(source, after=self._after_playing(ctx.guild.id))
                 logger.info(f"Now playing at volume {volume*100:.0f}%")
                 print(f"🎵 Şarkı başladı (Ses: {volume*100:.0f}%)")
                 
@@ -848,6 +917,440 @@ class YoutubeMusic(commands.Cog):
             print(f"❌ Play komutunda genel hata: {str(e)}")
             await ctx.followup.send(f"❌ Komut işlenirken bir hata oluştu: {str(e)}")
 
+    def _create_dsp_source(self, entry, start=0.0):
+        """ffmpeg sadece PCM'e çözer (ve tempoyu uygular); EQ ve ses düzeyi bot içinde, canlı değiştirilebilir"""
+        before_options = input_options(entry['url'], start)
+        tempo = ','.join(tempo_filters(entry.get('speed', 1.0)))
+        pcm = FFmpegPCMAudio(entry['url'], executable=self.ffmpeg_path, before_options=before_options,
+                             options=f"-vn -af {tempo}" if tempo else "-vn")
+        return DSPAudio(pcm, bas=entry.get('bas', 100), tizlik=entry.get('tizlik', 100),
+                        volume=entry.get('volume', 1.0))
+
+    def _playback_position(self, voice_client, entry):
+        """Kaynak dosyadaki konum; çerçeve sayacı yoksa geçen süre x oynatma hızı"""
+        if isinstance(voice_client.source, TrackedAudio):
+            return voice_client.source.position
+        return (time.time() - entry['start_time']) * entry.get('speed', 1.0)
+
+    @staticmethod
+    def _active_source(voice_client):
+        """Konum sayacının altındaki asıl ses kaynağı"""
+        source = voice_client.source
+        return source.original if isinstance(source, TrackedAudio) else source
+
+    async def _retune_current(self, ctx, video_id, settings):
+        """İstenen şarkı zaten çalıyorsa yeni ayarlarla kaldığı yerden devam ettirir; ettirdiyse True döndürür"""
+        voice_client = ctx.voice_client
+        entry = self.currently_playing.get(ctx.guild.id) if ctx.guild else None
+        if (video_id is None or entry is None or entry.get('video_id') != video_id or voice_client is None
+                or not (voice_client.is_playing() or voice_client.is_paused())):
+            return False
+        entry.update(settings)
+        entry['requester'] = ctx.author.name
+        await self._restart_playback(voice_client, entry)
+        return True
+
+    async def _restart_playback(self, voice_client, entry, dsp=None):
+        """Çalan şarkıyı yeni ayarlarla, kaldığı yerden ve aynı stream URL'siyle yeniden başlatır.
+        Yeni ffmpeg ilk çerçeveyi hazırlayana kadar eski kaynak çalmaya devam eder."""
+        position = self._playback_position(voice_client, entry)
+        if dsp is None:
+            dsp = entry.get('mode') == 'dsp'
+        if dsp:
+            source, mode = self._create_dsp_source(entry, start=position), 'dsp'
+        else:
+            source, mode = create_audio_source(entry['url'], executable=self.ffmpeg_path, bas=entry.get('bas', 100),
+                                               tizlik=entry.get('tizlik', 100), speed=entry.get('speed', 1.0),
+                                               volume=entry.get('volume', 1.0), source_codec=entry.get('source_codec'),
+                                               start=position)
+        source = TrackedAudio(source, start=position, speed=entry.get('speed', 1.0))
+        started = time.perf_counter()
+        if not await asyncio.to_thread(source.prime):
+            source.cleanup()
+            raise RuntimeError("Akış yeni ayarlarla başlatılamadı")
+        
+        # Kaynak oynatıcı durdurulmadan değiştirilir; after callback'i ve bağlantı korunur
+        old_source = voice_client.source
+        voice_client.source = source
+        if old_source is not None:
+            old_source.cleanup()
+        entry['mode'] = mode
+        entry['start_time'] = time.time() - position / entry.get('speed', 1.0)
+        logger.info(f"Playback restarted at {position:.1f}s in {mode} mode "
+                    f"(hazırlık {(time.perf_counter() - started) * 1000:.0f} ms, eski kaynak bu sürede çalmaya devam etti)")
+
+    def _guild_queue(self, guild_id):
+        queue = self.queues.get(guild_id)
+        if queue is None:
+            queue = self.queues[guild_id] = GuildQueue()
+        return queue
+
+    def _after_playing(self, guild_id):
+        """Ses thread'inden çağrılan after callback'i; sıradaki şarkıyı event loop'ta başlatır"""
+        def after_playing(error):
+            if error:
+                logger.error(f"Error after playing: {error}")
+                print(f"❌ Oynatma hatası: {error}")
+            asyncio.run_coroutine_threadsafe(self._play_next(guild_id), self.bot.loop)
+        return after_playing
+
+    def _open_source(self, url, video_id, *, bas=100, tizlik=100, speed=1.0, volume=1.0, source_codec=None,
+                     shared=True):
+        """Şarkının başından çalan kaynak; (TrackedAudio, mod) döndürür. Aynı şarkı aynı filtre zinciriyle başka
+        bir sunucuda da çalıyorsa yeni ffmpeg açılmaz, o yayının çerçevelerine abone olunur."""
+        def open_own():
+            return create_audio_source(url, executable=self.ffmpeg_path, bas=bas, tizlik=tizlik, speed=speed,
+                                       volume=volume, source_codec=source_codec)
+
+        if not shared or video_id is None:
+            source, mode = open_own()
+            return TrackedAudio(source, speed=speed), mode
+        key = (video_id, filter_signature(source_codec, bas, tizlik, speed, volume), 0.0)
+        subscriber, mode = self.broadcasts.subscribe(key, open_own)
+        if subscriber is None:
+            # Yayının başı bellekten çıktı ve canlıya katılma kapalı; şarkı kendi ffmpeg'iyle baştan çalınır
+            source, mode = open_own()
+            return TrackedAudio(source, speed=speed), mode
+        if subscriber.start_index:
+            logger.debug(f"Yayına canlı katılındı: {video_id} (çerçeve {subscriber.start_index})")
+        start = subscriber.start_index * TrackedAudio.FRAME_SECONDS * speed
+        return TrackedAudio(subscriber, start=start, speed=speed), mode
+
+    def _create_track_source(self, track, info, shared=True):
+        return self._open_source(info['url'], info.get('id', track.video_id), bas=track.bas, tizlik=track.tizlik,
+                                 speed=track.speed, volume=track.volume, source_codec=info.get('acodec'), shared=shared)
+
+    async def _resolve_track(self, track, guild_id, background=False):
+        info = await self._get_song_info(track.link, guild_id=guild_id, background=background)
+        if info is None or info == "NOT_FOUND" or not info.get('url'):
+            raise RuntimeError("Şarkı çözülemedi")
+        track.info = info
+        return info
+
+    async def _play_next(self, guild_id):
+        """Sıradaki şarkıyı çalar; önceden hazırlandıysa ffmpeg zaten çalışıyor ve ilk çerçevesi okunmuştur.
+        Çalınamayan şarkılar atlanır ve bir sonrakine geçilir."""
+        guild = self.bot.get_guild(guild_id)
+        voice_client = guild.voice_client if guild else None
+        queue = self.queues.get(guild_id)
+        while True:
+            if voice_client is None or not voice_client.is_connected():
+                self.currently_playing.pop(guild_id, None)
+                if queue is not None:
+                    queue.clear()
+                return
+            if voice_client.is_playing() or voice_client.is_paused():
+                return
+            
+            track = queue.next() if queue is not None else None
+            if track is None:
+                self.currently_playing.pop(guild_id, None)
+                return
+            if queue.feeds:
+                queue.spawn(self._fill_from_playlists(guild_id))
+            if queue.prefetch_task is not None and track.source is None:
+                # Bu şarkının hazırlığı yarım kaldı; aşağıda doğrudan hazırlanır
+                queue.prefetch_task.cancel()
+                queue.prefetch_task = None
+            
+            try:
+                if track.source is not None:
+                    source, mode = track.source, track.mode
+                    track.source = None
+                    logger.debug(f"Önceden hazırlanan kaynak kullanılıyor: {track.title}")
+                else:
+                    info = await self._resolve_track(track, guild_id)
+                    source, mode = self._create_track_source(track, info)
+            except Exception as e:
+                logger.error(f"Error preparing queued track {track.link}: {str(e)}")
+                if track.channel:
+                    await track.channel.send(f"❌ **{track.title}** çalınamadı, sıradaki şarkıya geçiliyor.", delete_after=15)
+                continue
+            break
+        
+        if voice_client.is_playing() or voice_client.is_paused() or not voice_client.is_connected():
+            # Şarkı hazırlanırken /çal başka bir şarkı başlattı; bu şarkı kaybolmasın, sıranın başına döner
+            source.cleanup()
+            if voice_client.is_connected():
+                queue.requeue(track)
+                self._schedule_prefetch(guild_id)
+            return
+        info = track.info or {}
+        self.currently_playing[guild_id] = {
+            'title': info.get('title', track.title),
+            'video_id': info.get('id', track.video_id),
+            'url': info.get('url'),
+            'thumbnail': info.get('thumbnail'),
+            'requester': track.requester,
+            'start_time': time.time(),
+            'duration': info.get('duration', track.duration),
+            'source_codec': info.get('acodec'),
+            'mode': mode,
+            **track.settings,
+        }
+        voice_client.play(source, after=self._after_playing(guild_id))
+        logger.info(f"Now playing queued track: {track.title} ({mode})")
+        asyncio.create_task(self._track_played(guild_id, track.info))
+        if track.channel:
+            speed_info = f" ({track.speed}x hızında)" if track.speed != 1.0 else ""
+            await track.channel.send(f"🎵 Sıradaki şarkı: **{track.title}**{speed_info} çalınıyor!", delete_after=30)
+        self._schedule_prefetch(guild_id)
+
+    async def _playlist_tracks(self, url, ctx, settings):
+        """Çalma listesini sayfa sayfa okuyup QueuedTrack üretir; bellekte en fazla bir sayfa tutulur.
+        Liste tek bir tembel akıştan okunur, her devam sayfası bir kez indirilir."""
+        cursor = PlaylistCursor(url)
+        try:
+            while True:
+                entries, consumed = await asyncio.to_thread(cursor.next_page, PLAYLIST_PAGE_SIZE)
+                for video_id, title, duration in entries:
+                    yield QueuedTrack(f"https://www.youtube.com/watch?v={video_id}", title=title, video_id=video_id,
+                                      duration=duration, requester=ctx.author.name, channel=ctx.channel, **settings)
+                if consumed < PLAYLIST_PAGE_SIZE:
+                    return
+        finally:
+            cursor.close()
+
+    async def _fill_from_playlists(self, guild_id):
+        """Sırada PLAYLIST_WINDOW şarkı olana kadar çalma listelerinden şarkı çeker ve arka planda çözer"""
+        queue = self.queues.get(guild_id)
+        if queue is None or queue.filling:
+            return
+        queue.filling = True
+        try:
+            while queue.feeds and len(queue) < PLAYLIST_WINDOW:
+                feed = queue.feeds[0]
+                try:
+                    track = await anext(feed, None)
+                except Exception as e:
+                    logger.error(f"Error reading playlist page: {str(e)}")
+                    track = None
+                if track is None:
+                    if queue.feeds and queue.feeds[0] is feed:
+                        queue.feeds.popleft()
+                    continue
+                if queue.add(track) is None:
+                    break
+                queue.spawn(self._warm_track(track, guild_id))
+            self._schedule_prefetch(guild_id)
+        finally:
+            queue.filling = False
+
+    async def _warm_track(self, track, guild_id):
+        """Pencereye giren şarkıyı bilgi önbelleğine çözer; hata olursa sırası gelince yeniden denenir.
+        Çözümleme arka plan kuyruğunda yapılır, aynı sunucunun /çal istekleriyle yarışmaz."""
+        try:
+            await self._resolve_track(track, guild_id, background=True)
+        except Exception as e:
+            logger.warning(f"Could not resolve playlist track {track.link}: {str(e)}")
+
+    async def _track_played(self, guild_id, info):
+        """Çalma sayısını kaydeder; yeterince çalınan şarkıyı arka planda ses önbelleğine dönüştürür"""
+        video_id = info.get('id') if info else None
+        if not video_id or guild_id is None:
+            return
+        try:
+            plays = await record_track_play(guild_id, video_id, info.get('title'))
+            # Önbellekten çalınan şarkının url'si zaten yerel dosyadır
+            if self.audio_cache.should_cache(video_id, plays) and info.get('url', '').startswith('http'):
+                await self.audio_cache.store(info, self.ffmpeg_path)
+        except Exception as e:
+            logger.warning(f"Could not record play for {video_id}: {str(e)}")
+
+    def _schedule_prefetch(self, guild_id):
+        """Sıranın başındaki şarkı için hazırlık görevini başlatır (zaten hazırlanıyorsa dokunmaz)"""
+        queue = self.queues.get(guild_id)
+        track = queue.peek() if queue is not None else None
+        if track is None or track.source is not None:
+            return
+        task = queue.prefetch_task
+        if task is not None and not task.done():
+            if getattr(task, 'track', None) is track:
+                return
+            task.cancel()
+        queue.prefetch_task = asyncio.create_task(self._prefetch(guild_id, track))
+        queue.prefetch_task.track = track
+
+    def _seconds_until_prefetch(self, guild_id):
+        """Çalan şarkının bitmesine PREFETCH_LEAD saniye kalana kadarki süre; bilinmiyorsa 0"""
+        entry = self.currently_playing.get(guild_id)
+        guild = self.bot.get_guild(guild_id)
+        voice_client = guild.voice_client if guild else None
+        if not entry or not entry.get('duration') or voice_client is None:
+            return 0
+        remaining = (entry['duration'] - self._playback_position(voice_client, entry)) / entry.get('speed', 1.0)
+        return max(0, remaining - PREFETCH_LEAD)
+
+    async def _prefetch(self, guild_id, track):
+        """Sıradaki şarkının stream URL'sini hemen çözer, ffmpeg'i çalan şarkının sonuna doğru başlatır"""
+        queue = self.queues.get(guild_id)
+        try:
+            await self._resolve_track(track, guild_id)
+            # Konum ve hız çalarken değişebildiği için bekleme süresi parça parça yeniden hesaplanır
+            while (delay := self._seconds_until_prefetch(guild_id)) > 0:
+                await asyncio.sleep(min(delay, 15))
+            if queue is None or queue.peek() is not track or track.source is not None:
+                return
+            # Bekleme sırasında URL'nin süresi dolmuş olabilir; önbellekten alınır, gerekirse yenilenir
+            info = await self._resolve_track(track, guild_id)
+            # Önceden hazırlanan kaynak çalmayı beklerken ilerlemez; paylaşılan yayında geride kalırdı
+            source, mode = self._create_track_source(track, info, shared=False)
+            try:
+                ready = await asyncio.to_thread(source.prime)
+            except asyncio.CancelledError:
+                source.cleanup()
+                raise
+            if not ready or queue.peek() is not track:
+                source.cleanup()
+                return
+            track.source, track.mode = source, mode
+            logger.info(f"Prefetched next track: {track.title} ({mode})")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Hazırlık başarısız olursa şarkı sırası geldiğinde yeniden denenir
+            logger.warning(f"Prefetch failed for {track.link}: {str(e)}")
+
+    @commands.hybrid_command(name='sıra', description='Çalan şarkıyı ve sıradaki şarkıları gösterir.')
+    async def show_queue(self, ctx):
+        """Çalan şarkıyı, konumunu ve sıradaki şarkıları gösterir."""
+        entry = self.currently_playing.get(ctx.guild.id) if ctx.guild else None
+        queue = self.queues.get(ctx.guild.id) if ctx.guild else None
+        if entry is None and not queue:
+            await ctx.reply("📭 Şu anda çalan ya da sırada bekleyen bir şarkı yok.")
+            return
+        
+        embed = discord.Embed(title="🎶 Çalma Sırası", color=discord.Color.blue())
+        if entry is not None:
+            position = self._playback_position(ctx.voice_client, entry) if ctx.voice_client else 0
+            embed.add_field(
+                name="▶️ Şimdi Çalıyor",
+                value=f"**{entry['title']}**\n{format_duration(position)} / {format_duration(entry.get('duration'))} "
+                      f"• İsteyen: {entry.get('requester', '?')}",
+                inline=False
+            )
+            if entry.get('thumbnail'):
+                embed.set_thumbnail(url=entry['thumbnail'])
+        if queue:
+            lines = []
+            for index, track in enumerate(queue, start=1):
+                if index > 10:
+                    lines.append(f"... ve {len(queue) - 10} şarkı daha")
+                    break
+                ready = " ⚡" if track.source is not None else ""
+                lines.append(f"`{index}.` {track.title} ({format_duration(track.duration)}) • {track.requester}{ready}")
+            embed.add_field(name=f"📝 Sırada ({len(queue)})", value="\n".join(lines), inline=False)
+        if queue is not None and queue.feeds:
+            embed.set_footer(text=f"📃 {len(queue.feeds)} çalma listesinin kalan şarkıları sırası geldikçe eklenecek")
+        await ctx.reply(embed=embed)
+
+    @commands.hybrid_command(name='geç', description='Çalan şarkıyı geçer ve sıradakine başlar.')
+    async def skip(self, ctx):
+        """Çalan şarkıyı geçer; sıradaki şarkı önceden hazırlandıysa beklemeden başlar."""
+        voice_client = ctx.voice_client
+        if voice_client is None or not (voice_client.is_playing() or voice_client.is_paused()):
+            await ctx.reply("❌ Şu anda çalan bir şarkı yok.")
+            return
+        entry = self.currently_playing.get(ctx.guild.id, {})
+        # stop() after callback'ini tetikler; sıradaki şarkı oradan başlar
+        voice_client.stop()
+        await ctx.reply(f"⏭️ **{entry.get('title', 'Şarkı')}** geçildi.")
+
+    @commands.hybrid_command(name='çıkar', description='Sıradaki bir şarkıyı sıradan çıkarır.')
+    @discord.app_commands.describe(sıra="Çıkarılacak şarkının sıra numarası (/sıra ile görebilirsiniz)")
+    async def remove_track(self, ctx, sıra: int):
+        """Verilen sıra numarasındaki şarkıyı sıradan çıkarır."""
+        queue = self.queues.get(ctx.guild.id) if ctx.guild else None
+        track = queue.remove(sıra) if queue is not None else None
+        if track is None:
+            await ctx.reply("❌ Bu sıra numarasında bir şarkı yok.")
+            return
+        self._schedule_prefetch(ctx.guild.id)
+        await ctx.reply(f"🗑️ **{track.title}** sıradan çıkarıldı.")
+
+    @commands.hybrid_command(name='karıştır', description='Sıradaki şarkıları karıştırır.')
+    async def shuffle_queue(self, ctx):
+        """Sıradaki şarkıları rastgele sıralar."""
+        queue = self.queues.get(ctx.guild.id) if ctx.guild else None
+        if not queue or len(queue) < 2:
+            await ctx.reply("❌ Karıştırmak için sırada en az 2 şarkı olmalı.")
+            return
+        previous = queue.peek()
+        queue.shuffle()
+        if queue.peek() is not previous:
+            # Önceden hazırlanan şarkı artık başta değil; ffmpeg'i yeni baştaki için açılır
+            previous.discard_source()
+            self._schedule_prefetch(ctx.guild.id)
+        await ctx.reply(f"🔀 Sıradaki {len(queue)} şarkı karıştırıldı.")
+
+    @commands.hybrid_command(name='ses', description='Çalan şarkının ses düzeyini değiştirir.')
+    @discord.app_commands.describe(düzey="Ses düzeyi (20-1000 arası, varsayılan: 100)")
+    async def set_volume(self, ctx, düzey: int):
+        """Çalan şarkının ses düzeyini şarkıyı baştan başlatmadan değiştirir."""
+        voice_client = ctx.voice_client
+        entry = self.currently_playing.get(ctx.guild.id) if ctx.guild else None
+        if voice_client is None or voice_client.source is None or entry is None:
+            await ctx.reply("❌ Şu anda çalan bir şarkı yok.")
+            return
+        
+        volume = max(20, min(1000, düzey)) / 100
+        entry['volume'] = volume
+        source = self._active_source(voice_client)
+        try:
+            if isinstance(source, DSPAudio):
+                source.retune(volume=volume)
+            # ffmpeg filtre zincirindeki volume@gain kontrol kanalından güncellenir
+            elif not (isinstance(source, ControlledOpusAudio) and source.set_volume(volume)):
+                # Doğrudan aktarılan akışta filtre yok, paylaşılan yayın ise diğer sunucuları da etkilerdi;
+                # ffmpeg kaldığı yerden bu sunucuya ait kodlama moduyla açılır
+                await self._restart_playback(voice_client, entry)
+        except Exception as e:
+            logger.error(f"Error changing volume: {str(e)}")
+            await ctx.reply(f"❌ Ses düzeyi değiştirilemedi: {str(e)}")
+            return
+        await ctx.reply(f"🔊 Ses düzeyi %{volume * 100:.0f} olarak ayarlandı.")
+
+    @commands.hybrid_command(name='ayar', description='Çalan şarkının bas, tizlik ve ses ayarlarını anında değiştirir.')
+    @discord.app_commands.describe(
+        bas="Bas miktarı (20-1000 arası)",
+        tizlik="Ses tonu (0-200 arası: 0=kalın, 100=normal, 200=ince)",
+        ses="Ses düzeyi (20-1000 arası)"
+    )
+    async def tune(self, ctx, bas: int = None, tizlik: int = None, ses: int = None):
+        """Çalan şarkının ayarlarını şarkıyı baştan başlatmadan değiştirir.
+        İlk kullanımda akış kaldığı yerden DSP moduna geçer; sonraki değişiklikler bir sonraki 20 ms'de duyulur."""
+        voice_client = ctx.voice_client
+        entry = self.currently_playing.get(ctx.guild.id) if ctx.guild else None
+        if voice_client is None or voice_client.source is None or entry is None:
+            await ctx.reply("❌ Şu anda çalan bir şarkı yok.")
+            return
+        if bas is None and tizlik is None and ses is None:
+            await ctx.reply(f"🎛️ Mevcut ayarlar: bas={entry.get('bas', 100)}, tizlik={entry.get('tizlik', 100)}, "
+                            f"ses={entry.get('volume', 1.0) * 100:.0f}")
+            return
+        
+        if bas is not None:
+            entry['bas'] = bas = max(20, min(1000, bas))
+        if tizlik is not None:
+            entry['tizlik'] = tizlik = max(0, min(200, tizlik))
+        volume = None
+        if ses is not None:
+            entry['volume'] = volume = max(20, min(1000, ses)) / 100
+        
+        try:
+            source = self._active_source(voice_client)
+            if isinstance(source, DSPAudio):
+                # Filtre matrisleri ses thread'ini ve event loop'u bekletmeden hazırlanır
+                await asyncio.to_thread(source.retune, bas, tizlik, volume)
+            else:
+                await self._restart_playback(voice_client, entry, dsp=True)
+        except Exception as e:
+            logger.error(f"Error tuning playback: {str(e)}")
+            await ctx.reply(f"❌ Ayarlar değiştirilemedi: {str(e)}")
+            return
+        await ctx.reply(f"🎛️ Ayarlar güncellendi: bas={entry.get('bas', 100)}, tizlik={entry.get('tizlik', 100)}, "
+                        f"ses={entry.get('volume', 1.0) * 100:.0f}")
+
     @commands.hybrid_command(name='testmuzik', description='Müzik çalma özelliğini test eder.')
     async def test_music(self, ctx):
         """Müzik sistemini test eder ve sorunları gösterir."""
@@ -883,6 +1386,68 @@ class YoutubeMusic(commands.Cog):
                 value="FFmpeg testi sırasında bir hata oluştu. Lütfen log dosyasını kontrol edin."
             )
         
+        # Çözümleme havuzu durumu
+        embed.add_field(
+            name="⚙️ yt-dlp Havuzu",
+            value=f"Arka uç: {self.ytdl.backend} • İşçi: {self.ytdl.workers}\n"
+                  f"Çalışan: {self.ytdl.active} (arka plan: {self.ytdl.background_active}) • "
+                  f"Kuyrukta: {self.ytdl.queued()} • Toplam: {self.ytdl.calls}",
+            inline=False
+        )
+        
+        # Birleştirilen eşzamanlı çözümlemeler
+        inflight = self.inflight
+        embed.add_field(
+            name="🔗 İstek Birleştirme",
+            value=f"Başlatılan çözümleme: {inflight.started} • Birleştirilen (tasarruf): {inflight.coalesced}\n"
+                  f"Şu an devam eden: {len(inflight.inflight)}",
+            inline=False
+        )
+        
+        # Bilgi önbelleği istatistikleri
+        cache = self.info_cache
+        guild_hits, guild_misses = cache.guild_stats.get(ctx.guild.id, (0, 0)) if ctx.guild else (0, 0)
+        embed.add_field(
+            name="📦 Video Bilgi Önbelleği",
+            value=f"Kayıt: {len(cache)}/{cache.max_entries}\n"
+                  f"İsabet: {cache.hits} • Iska: {cache.misses} • URL yenileme: {cache.refreshes}\n"
+                  f"İsabet oranı: %{cache.hit_ratio() * 100:.0f} • Bu sunucu: {guild_hits}/{guild_hits + guild_misses}",
+            inline=False
+        )
+
+        # Diskteki ses önbelleği
+        audio_cache = self.audio_cache
+        embed.add_field(
+            name="💾 Ses Dosyası Önbelleği",
+            value=f"Dosya: {len(audio_cache)} • Boyut: {audio_cache.total_bytes / 1048576:.1f}/"
+                  f"{audio_cache.max_bytes / 1048576:.0f} MB • Silinen: {audio_cache.evictions}\n"
+                  f"İsabet: {audio_cache.hits} • Iska: {audio_cache.misses} • İsabet oranı: %{audio_cache.hit_ratio() * 100:.0f}\n"
+                  f"Diskten sunulan: {audio_cache.bytes_served / 1048576:.1f} MB",
+            inline=False
+        )
+        
+        # Sunucular arası paylaşılan yayınlar
+        broadcasts = self.broadcasts
+        embed.add_field(
+            name="📡 Paylaşılan Yayınlar",
+            value=f"Açık yayın: {len(broadcasts)} • Dinleyici: {broadcasts.subscribers()}\n"
+                  f"Açılan: {broadcasts.started} • Katılınan: {broadcasts.joined} • "
+                  f"Geçmişten verilen çerçeve: {broadcasts.shared_frames()}\n"
+                  f"Geç katılma: {'canlı' if broadcasts.late_join == 'live' else 'kendi kaynağı'}",
+            inline=False
+        )
+        
+        # DSP modunda çalan akışın okuma tamponu
+        source = self._active_source(ctx.voice_client) if ctx.voice_client and ctx.voice_client.source else None
+        if isinstance(source, DSPAudio) and isinstance(source.original, FFmpegPCMAudio):
+            buffer = source.original.buffer
+            embed.add_field(
+                name="🧵 PCM Tamponu",
+                value=f"Doluluk: %{buffer.fill_level * 100:.0f} ({buffer.buffered_ms}/{buffer.capacity * 20} ms)\n"
+                      f"Okunan çerçeve: {buffer.frames_read} • Takılma: {buffer.underruns}",
+                inline=False
+            )
+
         if ffmpeg_ok:
             embed.add_field(
                 name="✅ Müzik Sistemi",
@@ -919,14 +1484,34 @@ class YoutubeMusic(commands.Cog):
         # Parametreler tablosu
         embed.add_field(
             name="Parametreler",
-            value="```\nlink:   YouTube video linki (search ile birlikte kullanılamaz)\nsearch: Aranacak şarkı/video adı (link ile birlikte kullanılamaz)\nses:    20-1000 arası değer (varsayılan: 100)\nbas:    20-1000 arası değer (varsayılan: 100)\ntizlik:  0-200 arası değer (varsayılan: 100)\n        0: En kalın ses, 100: Normal, 200: En ince ses\nhız:     0.1-10 arası değer (varsayılan: 1 - normal hız)\n```",
+            value="```\nlink:   YouTube video ya da çalma listesi linki (search ile birlikte kullanılamaz)\nsearch: Aranacak şarkı/video adı (link ile birlikte kullanılamaz)\nses:    20-1000 arası değer (varsayılan: 100)\nbas:    20-1000 arası değer (varsayılan: 100)\ntizlik:  0-200 arası değer (varsayılan: 100)\n        0: En kalın ses, 100: Normal, 200: En ince ses\nhız:     0.1-10 arası değer (varsayılan: 1 - normal hız)\nseçim:   True ise ilk 5 arama sonucundan seçim yapılır\n```",
+            inline=False
+        )
+        
+        embed.add_field(
+            name="/ses",
+            value="Çalan şarkının ses düzeyini şarkıyı baştan başlatmadan değiştirir (20-1000, örn. `/ses düzey:150`).",
+            inline=False
+        )
+        
+        embed.add_field(
+            name="Sıra Komutları",
+            value="Bir şarkı çalarken `/çal` yeni şarkıyı sıraya ekler.\n"
+                  "`/sıra` çalan ve sıradaki şarkılar • `/geç` sıradakine geç\n"
+                  "`/çıkar sıra:2` sıradan çıkar • `/karıştır` sırayı karıştır",
+            inline=False
+        )
+        
+        embed.add_field(
+            name="/ayar",
+            value="Çalan şarkının bas, tizlik ve ses ayarlarını anında değiştirir (örn. `/ayar bas:200 tizlik:50`).",
             inline=False
         )
         
         # Kullanım örnekleri
         embed.add_field(
             name="Kullanım Örnekleri",
-            value="```\n/çal link:https://www.youtube.com/watch?v=dQw4w9WgXcQ\n/çal search:Duman Seni Duman Etti\n/çal link:https://www.youtube.com/watch?v=dQw4w9WgXcQ ses:150 bas:200 tizlik:150 hız:1.5\n/çal search:Barış Manço Dağlar Dağlar tizlik:150 bas:120 hız:1.2\n```",
+            value="```\n/çal link:https://www.youtube.com/watch?v=dQw4w9WgXcQ\n/çal search:Duman Seni Duman Etti\n/çal search:Duman seçim:True\n/çal link:https://www.youtube.com/watch?v=dQw4w9WgXcQ ses:150 bas:200 tizlik:150 hız:1.5\n/çal search:Barış Manço Dağlar Dağlar tizlik:150 bas:120 hız:1.2\n```",
             inline=False
         )
         
@@ -1049,75 +1634,87 @@ class YoutubeMusic(commands.Cog):
             logger.error(f"Otomatik çalma hatası: {e}")
             print(f"Otomatik çalma hatası: {e}")
 
-    async def _get_song_info(self, link, search=False):
+    async def _get_song_info(self, link, search=False, guild_id=None, background=False):
         """Get song info from YouTube in a thread to avoid blocking"""
-        print(f"DEBUG: Video bilgisi alınıyor: {link}")
+        logger.debug(f"Video bilgisi alınıyor: {link}")
         
         # YouTube linki kontrolü
         if not link.startswith(('https://www.youtube.com', 'https://youtu.be', 'http://www.youtube.com')):
-            print(f"DEBUG: URL bir YouTube linki değil, arama yapılmayacak: {link}")
+            logger.debug(f"URL bir YouTube linki değil, arama yapılmayacak: {link}")
             return None
         
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'noplaylist': True,
-            'quiet': True,
-            'no_warnings': True,
-            'default_search': 'auto',
-            'source_address': '0.0.0.0',
-            'geo_bypass': True,
-            'nocheckcertificate': True,
-            'ignoreerrors': False,
-            'logtostderr': True,
-            'cachedir': False,
-            'verbose': True,
-        }
-        
-        loop = asyncio.get_event_loop()
+        # Önbellekte geçerli stream URL'si varsa yt-dlp hiç çalıştırılmaz
+        video_id = video_id_from_url(link)
+        cached = None
+        if video_id:
+            # Diskteki ses dosyası varsa ne ağa ne yt-dlp'ye gidilir
+            local = self.audio_cache.lookup(video_id)
+            if local is not None:
+                logger.debug(f"Ses dosyası önbellekten çalınacak: {local.get('title', video_id)}")
+                return local
+            cached, status = self.info_cache.get(video_id, guild_id)
+            if status == 'hit':
+                logger.debug(f"Video bilgisi önbellekten alındı: {cached.get('title', 'Başlık yok')}")
+                return cached
+            if status == 'refresh':
+                logger.debug(f"Stream URL'sinin süresi dolmak üzere, yeniden çözülüyor: {video_id}")
         
+        # Aynı video için devam eden bir çözümleme varsa onun sonucu beklenir
+        return await self._coalesced_extract(link, video_id, guild_id, cached, background=background)
+
+    async def _coalesced_extract(self, link, video_id, guild_id, cached, background=False):
+        """Eşzamanlı çözümlemeleri birleştirir. Kullanıcı istekleri arka plan işlerine bağlanmaz; arka plan
+        kuyruğu ancak bekleyen kullanıcı isteği yokken çalıştığından /çal onu beklerse öncelik tersine döner.
+        Arka plan işi ise devam eden bir kullanıcı çözümlemesine bağlanabilir."""
+        key = ('info', video_id or link)
+        if background and key not in self.inflight.inflight:
+            key = ('info-background', video_id or link)
+        return await self.inflight.run(
+            key, lambda: self._extract_song_info(link, guild_id, cached, background=background))
+
+    async def _extract_song_info(self, link, guild_id, cached, background=False):
+        """yt-dlp ile bilgiyi çözer; 3 deneme yapar, olmazsa süresi dolmamış önbellek kaydına döner"""
         # Add retry mechanism
         for attempt in range(3):
             try:
-                print(f"DEBUG: YT-DLP Deneme {attempt+1}/3")
-                with youtube_dl.YoutubeDL(ydl_opts) as ydl:
-                    # Run in executor to avoid blocking
-                    info = await loop.run_in_executor(
-                        self.thread_pool, 
-                        lambda: ydl.extract_info(link, download=False)
-                    )
-                    
+                logger.debug(f"YT-DLP Deneme {attempt+1}/3")
+                # Havuzdaki hazır örnekle, event loop'u bloklamadan çalıştır
+                info = await self.ytdl.extract_info('info', link, guild_id=guild_id, background=background)
+                
                 if info is None:
-                    print(f"DEBUG: YT-DLP boş bilgi döndürdü")
                     logger.warning(f"No info returned from YouTube-DL for {link}")
                     if attempt < 2:
                         await asyncio.sleep(1)
                         continue
-                    return None
+                    break
                 
-                print(f"DEBUG: Video bilgisi alındı: {info.get('title', 'Başlık yok')}")
-                return info
+                logger.debug(f"Video bilgisi alındı: {info.get('title', 'Başlık yok')}")
+                return self.info_cache.put(info)
                 
             except youtube_dl.utils.DownloadError as e:
                 logger.error(f"YouTube-DL download error (attempt {attempt+1}/3): {str(e)}")
-                print(f"DEBUG: YT-DLP indirme hatası: {str(e)}")
                 
                 # Check for "Video unavailable" or "no video results"
                 if "Video unavailable" in str(e) or "no video results" in str(e) or "No video results" in str(e):
-                    print(f"DEBUG: Video bulunamadı veya kullanılamıyor")
+                    logger.info(f"Video bulunamadı veya kullanılamıyor: {link}")
                     return "NOT_FOUND"
                     
                 if attempt < 2:
                     await asyncio.sleep(1.5)
                     continue
-                return None
+                break
             except Exception as e:
                 logger.error(f"Error getting song info (attempt {attempt+1}/3): {str(e)}")
-                print(f"DEBUG: Genel hata: {str(e)}")
                 if attempt < 2:
                     await asyncio.sleep(1.5)
                     continue
-                return None
-                
+                break
+        
+        # Yenileme başarısız olduysa süresi henüz dolmamış eski URL ile devam et; expire= içermeyen URL'ler
+        # için önbelleğin varsayılan süresi esas alınır
+        if cached is not None and self.info_cache.stream_valid(cached.get('id')):
+            logger.warning(f"Refresh failed for {link}, using the cached stream URL")
+            return cached
         return None  # Return None if all attempts failed
 
 async def setup(bot):
@@ -0,0 +1,2 @@
+# Elle çalıştırılan kontrol betikleri; pytest testi değildir (ağa çıkar, argüman bekler)
+collect_ignore = ['yt_test.py', 'simple_test.py', 'ffmpeg_test.py']
@@ -1,16 +1,177 @@
+import asyncio
+import bisect
+import datetime
+import logging
+import os
+import queue
 import sqlite3
+import threading
+import time
+import unicodedata
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
 
-def init_db():
-    conn = sqlite3.connect('bot_data.db')
+logger = logging.getLogger('sezar.database')
+
+# Docker'da bot-data volume'üne yazmak için SEZAR_DB_PATH=/app/data/bot_data.db verilebilir
+DB_PATH = os.getenv('SEZAR_DB_PATH', 'bot_data.db')
+
+# Her bağlantıda uygulanan ayarlar
+PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',   # WAL ile güvenli ve commit başına fsync yok
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-8000',     # ~8MB sayfa önbelleği
+    'PRAGMA mmap_size=33554432',   # 32MB
+    'PRAGMA busy_timeout=5000',
+)
+# Salt okunur bağlantılar journal modunu değiştiremez; veritabanının modu (WAL) olduğu gibi kullanılır
+READONLY_PRAGMAS = tuple(pragma for pragma in PRAGMAS if 'journal_mode' not in pragma)
+# auto_vacuum=INCREMENTAL'a geçiş tüm dosyayı yeniden yazan bir VACUUM ister; bundan büyük veritabanlarında
+# açılışta yapılmaz, sahibin !maintenance vacuum komutuyla elle başlatması beklenir
+AUTO_VACUUM_STARTUP_MAX_BYTES = 16 * 1024 * 1024
+
+
+class Database:
+    """Kalıcı SQLite bağlantıları: yazmalar tek bir yazıcı thread'inde sıraya girer,
+    okumalar küçük bir okuyucu havuzunda çalışır. Event loop hiçbir zaman SQLite'ı beklemez.
+    readonly ile dosya mode=ro açılır; yazıcı thread'i başlatılmaz ve dosya oluşturulmaz."""
+    def __init__(self, path=DB_PATH, readers=2, readonly=False):
+        self.path = path
+        self.readers = readers
+        self.readonly = readonly
+        self._write_queue = queue.Queue()
+        self._writer = None
+        self._reader_pool = None
+        self._reader_local = threading.local()
+        self._reader_conns = []
+        self._reader_conns_lock = threading.Lock()
+
+    def _connect(self):
+        if self.readonly:
+            uri = f"file:{urllib.parse.quote(os.path.abspath(self.path))}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+            pragmas = READONLY_PRAGMAS
+        else:
+            conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=256)
+            pragmas = PRAGMAS
+        for pragma in pragmas:
+            conn.execute(pragma)
+        return conn
+
+    def start(self):
+        if self._reader_pool is not None:
+            return
+        if self.readonly:
+            self._connect().close()  # Dosya yoksa ya da açılamıyorsa hatayı burada yükselt
+            self._reader_pool = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix='sezar-db-reader')
+            logger.info(f"Veritabanı salt okunur açıldı: {self.path}")
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        ready = Future()
+        self._writer = threading.Thread(target=self._writer_loop, args=(ready,), name='sezar-db-writer', daemon=True)
+        self._writer.start()
+        ready.result()  # Bağlantı açılamazsa hatayı burada yükselt
+
+        self._reader_pool = ThreadPoolExecutor(max_workers=self.readers, thread_name_prefix='sezar-db-reader')
+        logger.info(f"Veritabanı açıldı: {self.path} ({self.readers} okuyucu)")
+
+    def close(self):
+        if self._reader_pool is None:
+            return
+        if self._writer is not None:
+            self._write_queue.put(None)
+            self._writer.join()
+            self._writer = None
+
+        self._reader_pool.shutdown(wait=True)
+        self._reader_pool = None
+        with self._reader_conns_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
+        self._reader_local = threading.local()
+        logger.info("Veritabanı kapatıldı")
+
+    def _writer_loop(self, ready):
+        try:
+            conn = self._connect()
+        except Exception as e:
+            ready.set_exception(e)
+            return
+        ready.set_result(True)
+
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+            fn, args, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with conn:  # Başarıda commit, hatada rollback
+                    result = fn(conn, *args)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+        conn.close()
+
+    def connect_readonly(self):
+        """Havuz dışında, uzun süren okumalar (dışa aktarma gibi) için ayrı bir salt okunur bağlantı"""
+        conn = self._connect()
+        conn.execute('PRAGMA query_only=ON')
+        return conn
+
+    def _reader_connection(self):
+        conn = getattr(self._reader_local, 'conn', None)
+        if conn is None:
+            conn = self.connect_readonly()
+            self._reader_local.conn = conn
+            with self._reader_conns_lock:
+                self._reader_conns.append(conn)
+        return conn
+
+    def _run_read(self, fn, args):
+        return fn(self._reader_connection(), *args)
+
+    def submit_write(self, fn, *args):
+        """fn(conn, *args) çağrısını yazıcı thread'ine gönderir; concurrent Future döndürür"""
+        if self.readonly:
+            raise RuntimeError("Veritabanı salt okunur açıldı")
+        if self._writer is None:
+            raise RuntimeError("Veritabanı başlatılmadı")
+        future = Future()
+        self._write_queue.put((fn, args, future))
+        return future
+
+    def submit_read(self, fn, *args):
+        if self._reader_pool is None:
+            raise RuntimeError("Veritabanı başlatılmadı")
+        return self._reader_pool.submit(self._run_read, fn, args)
+
+    async def write(self, fn, *args):
+        return await asyncio.wrap_future(self.submit_write(fn, *args))
+
+    async def read(self, fn, *args):
+        return await asyncio.wrap_future(self.submit_read(fn, *args))
+
+
+# Şema sürümleri PRAGMA user_version ile takip edilir. Yeni değişiklikler listenin
+# sonuna yeni bir sürüm olarak eklenir; mevcut adımlar asla değiştirilmez.
+def _migration_initial_schema(conn):
     c = conn.cursor()
-    
+
     # Kullanıcı mesaj istatistikleri tablosu
     c.execute('''CREATE TABLE IF NOT EXISTS message_stats (
                  user_id INTEGER PRIMARY KEY,
                  message_count INTEGER DEFAULT 0,
                  last_active TIMESTAMP
                  )''')
-    
+
     # Moderasyon işlemleri tablosu
     c.execute('''CREATE TABLE IF NOT EXISTS moderation_actions (
                  action_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -19,40 +180,856 @@ def init_db():
                  reason TEXT,
                  timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                  )''')
-    
-    conn.commit()
-    conn.close()
 
+def _migration_guild_scoped_moderation(conn):
+    # Eski kayıtların sunucusu bilinmediği için guild_id NULL kalır
+    conn.execute('ALTER TABLE moderation_actions ADD COLUMN guild_id INTEGER')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_moderation_guild_user
+                    ON moderation_actions (guild_id, user_id, timestamp, action_id)''')
+    conn.execute('''CREATE INDEX IF NOT EXISTS idx_moderation_guild_time
+                    ON moderation_actions (guild_id, timestamp, action_id)''')
 
-def update_message_stats(user_id):
-    conn = sqlite3.connect('bot_data.db')
-    c = conn.cursor()
-    
-    c.execute('SELECT message_count FROM message_stats WHERE user_id = ?', (user_id,))
-    row = c.fetchone()
-    if row:
-        c.execute('UPDATE message_stats SET message_count = message_count + 1, last_active = CURRENT_TIMESTAMP WHERE user_id = ?', (user_id,))
+def _migration_activity_rollups(conn):
+    # Saatlik ve günlük etkinlik özetleri; kind 'guild', 'channel' veya 'user' olabilir
+    for table in ('activity_hourly', 'activity_daily'):
+        conn.execute(f'''CREATE TABLE IF NOT EXISTS {table} (
+                         guild_id INTEGER NOT NULL,
+                         kind TEXT NOT NULL,
+                         subject_id INTEGER NOT NULL,
+                         bucket INTEGER NOT NULL,
+                         message_count INTEGER NOT NULL DEFAULT 0,
+                         PRIMARY KEY (guild_id, kind, subject_id, bucket)
+                         ) WITHOUT ROWID''')
+        conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_bucket ON {table} (guild_id, kind, bucket)')
+
+def _migration_guild_message_stats(conn):
+    # Sunucu bazında toplam mesaj sayıları; mevcut kullanıcı özetlerinden doldurulur
+    conn.execute('''CREATE TABLE IF NOT EXISTS guild_message_stats (
+                    guild_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    message_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (guild_id, user_id)
+                    ) WITHOUT ROWID''')
+    conn.execute('''INSERT INTO guild_message_stats (guild_id, user_id, message_count)
+                    SELECT guild_id, subject_id, SUM(message_count) FROM (
+                        SELECT guild_id, subject_id, message_count FROM activity_hourly WHERE kind = 'user'
+                        UNION ALL
+                        SELECT guild_id, subject_id, message_count FROM activity_daily WHERE kind = 'user')
+                    GROUP BY guild_id, subject_id''')
+
+def _migration_moderation_fts(conn):
+    # moderation_actions'a bağlı (external content) FTS5 indeksi; tetikleyicilerle senkron tutulur
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS moderation_fts USING fts5(
+                    reason, guild_id UNINDEXED,
+                    content='moderation_actions', content_rowid='action_id',
+                    tokenize='unicode61 remove_diacritics 2')''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS moderation_actions_fts_insert AFTER INSERT ON moderation_actions BEGIN
+                        INSERT INTO moderation_fts (rowid, reason, guild_id) VALUES (new.action_id, new.reason, new.guild_id);
+                    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS moderation_actions_fts_delete AFTER DELETE ON moderation_actions BEGIN
+                        INSERT INTO moderation_fts (moderation_fts, rowid, reason, guild_id)
+                        VALUES ('delete', old.action_id, old.reason, old.guild_id);
+                    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS moderation_actions_fts_update AFTER UPDATE ON moderation_actions BEGIN
+                        INSERT INTO moderation_fts (moderation_fts, rowid, reason, guild_id)
+                        VALUES ('delete', old.action_id, old.reason, old.guild_id);
+                        INSERT INTO moderation_fts (rowid, reason, guild_id) VALUES (new.action_id, new.reason, new.guild_id);
+                    END''')
+    # Mevcut kayıtları indeksle
+    conn.execute("INSERT INTO moderation_fts (moderation_fts) VALUES ('rebuild')")
+
+def _migration_retention_policies(conn):
+    # NULL gün sayısı varsayılan politikanın kullanılacağı anlamına gelir
+    conn.execute('''CREATE TABLE IF NOT EXISTS retention_policies (
+                    guild_id INTEGER PRIMARY KEY,
+                    moderation_days INTEGER,
+                    activity_days INTEGER
+                    )''')
+    # Uzun süredir aktif olmayan kullanıcıların silinmesi tablo taraması gerektirmesin
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_message_stats_last_active ON message_stats (last_active)')
+
+def _migration_search_cache(conn):
+    # Normalize edilmiş arama metni -> çözülmüş video; hits yeniden başlatmalarda da korunur
+    conn.execute('''CREATE TABLE IF NOT EXISTS search_cache (
+                    query TEXT PRIMARY KEY,
+                    video_id TEXT NOT NULL,
+                    title TEXT,
+                    hits INTEGER NOT NULL DEFAULT 1,
+                    resolved_at INTEGER NOT NULL,
+                    last_used INTEGER NOT NULL
+                    ) WITHOUT ROWID''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_search_cache_last_used ON search_cache (last_used)')
+
+def _migration_track_plays(conn):
+    # Sunucu başına şarkı çalma sayıları; sık çalınan şarkılar diske önbelleklenir
+    conn.execute('''CREATE TABLE IF NOT EXISTS track_plays (
+                    guild_id INTEGER NOT NULL,
+                    video_id TEXT NOT NULL,
+                    title TEXT,
+                    plays INTEGER NOT NULL DEFAULT 1,
+                    last_played INTEGER NOT NULL,
+                    PRIMARY KEY (guild_id, video_id)
+                    ) WITHOUT ROWID''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_track_plays_video ON track_plays (video_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_track_plays_last_played ON track_plays (last_played)')
+
+MIGRATIONS = [
+    (1, _migration_initial_schema),
+    (2, _migration_guild_scoped_moderation),
+    (3, _migration_activity_rollups),
+    (4, _migration_guild_message_stats),
+    (5, _migration_moderation_fts),
+    (6, _migration_retention_policies),
+    (7, _migration_search_cache),
+    (8, _migration_track_plays),
+]
+
+def _migrate(conn):
+    current = conn.execute('PRAGMA user_version').fetchone()[0]
+    for version, migration in MIGRATIONS:
+        if version <= current:
+            continue
+        # Her sürüm kendi işleminde uygulanır; yarıda kalan sürüm geri alınır
+        conn.execute('BEGIN')
+        try:
+            migration(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info(f"Veritabanı şeması {version}. sürüme yükseltildi")
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def _incremental_vacuum_enabled(conn):
+    return conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2
+
+def _enable_incremental_vacuum(conn):
+    # auto_vacuum modu sadece VACUUM ile değişir; mevcut veritabanlarında bir kez çalışır
+    if _incremental_vacuum_enabled(conn):
+        return False
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    conn.execute('VACUUM')
+    return True
+
+
+def _update_message_stats(conn, user_id):
+    conn.execute('''INSERT INTO message_stats (user_id, message_count, last_active) VALUES (?, 1, CURRENT_TIMESTAMP)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        message_count = message_count + 1,
+                        last_active = CURRENT_TIMESTAMP''', (user_id,))
+
+def _apply_message_stats_batch(conn, rows, activity_rows, guild_rows):
+    conn.executemany('''INSERT INTO message_stats (user_id, message_count, last_active) VALUES (?, ?, ?)
+                        ON CONFLICT(user_id) DO UPDATE SET
+                            message_count = message_count + excluded.message_count,
+                            last_active = MAX(COALESCE(last_active, ''), excluded.last_active)''', rows)
+    conn.executemany('''INSERT INTO activity_hourly (guild_id, kind, subject_id, bucket, message_count) VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(guild_id, kind, subject_id, bucket) DO UPDATE SET
+                            message_count = message_count + excluded.message_count''', activity_rows)
+    conn.executemany('''INSERT INTO guild_message_stats (guild_id, user_id, message_count) VALUES (?, ?, ?)
+                        ON CONFLICT(guild_id, user_id) DO UPDATE SET
+                            message_count = message_count + excluded.message_count''', guild_rows)
+
+def _compact_activity(conn, cutoff):
+    # cutoff gün başına hizalı olmalı; böylece her gün tek bir tabloda bulunur
+    conn.execute('''INSERT INTO activity_daily (guild_id, kind, subject_id, bucket, message_count)
+                    SELECT guild_id, kind, subject_id, bucket - bucket % 86400, SUM(message_count)
+                    FROM activity_hourly WHERE bucket < ?
+                    GROUP BY guild_id, kind, subject_id, bucket - bucket % 86400
+                    ON CONFLICT(guild_id, kind, subject_id, bucket) DO UPDATE SET
+                        message_count = message_count + excluded.message_count''', (cutoff,))
+    return conn.execute('DELETE FROM activity_hourly WHERE bucket < ?', (cutoff,)).rowcount
+
+def _get_activity(conn, guild_id, kind, since, subject_id, limit):
+    # Saatlik ve günlük tablolar çakışmaz; ikisinden de aralık okuması yapılıp toplanır
+    day_start = since - since % 86400
+    if subject_id is not None:
+        return conn.execute('''SELECT
+                                   (SELECT COALESCE(SUM(message_count), 0) FROM activity_hourly
+                                    WHERE guild_id = ? AND kind = ? AND subject_id = ? AND bucket >= ?) +
+                                   (SELECT COALESCE(SUM(message_count), 0) FROM activity_daily
+                                    WHERE guild_id = ? AND kind = ? AND subject_id = ? AND bucket >= ?)''',
+                            (guild_id, kind, subject_id, since, guild_id, kind, subject_id, day_start)).fetchone()[0]
+    return conn.execute('''SELECT subject_id, SUM(message_count) AS total FROM (
+                               SELECT subject_id, message_count FROM activity_hourly
+                               WHERE guild_id = ? AND kind = ? AND bucket >= ?
+                               UNION ALL
+                               SELECT subject_id, message_count FROM activity_daily
+                               WHERE guild_id = ? AND kind = ? AND bucket >= ?)
+                           GROUP BY subject_id ORDER BY total DESC LIMIT ?''',
+                        (guild_id, kind, since, guild_id, kind, day_start, limit)).fetchall()
+
+def _load_guild_message_counts(conn):
+    return conn.execute('SELECT guild_id, user_id, message_count FROM guild_message_stats').fetchall()
+
+def _get_user_stats(conn, user_id):
+    return conn.execute('SELECT message_count, last_active FROM message_stats WHERE user_id = ?', (user_id,)).fetchone()
+
+def _add_moderation_action(conn, guild_id, user_id, action_type, reason):
+    conn.execute('INSERT INTO moderation_actions (guild_id, user_id, action_type, reason) VALUES (?, ?, ?, ?)',
+                 (guild_id, user_id, action_type, reason))
+
+def _get_moderation_actions(conn, guild_id, user_id, before, limit):
+    # Keyset sayfalama: her sayfa idx_moderation_guild_user üzerinde sınırlı bir aralık okumasıdır
+    if before is None:
+        c = conn.execute('''SELECT action_id, action_type, reason, timestamp FROM moderation_actions
+                            WHERE guild_id = ? AND user_id = ?
+                            ORDER BY timestamp DESC, action_id DESC LIMIT ?''', (guild_id, user_id, limit))
     else:
-        c.execute('INSERT INTO message_stats (user_id, message_count, last_active) VALUES (?, 1, CURRENT_TIMESTAMP)', (user_id,))
-    
-    conn.commit()
-    conn.close()
+        c = conn.execute('''SELECT action_id, action_type, reason, timestamp FROM moderation_actions
+                            WHERE guild_id = ? AND user_id = ? AND (timestamp, action_id) < (?, ?)
+                            ORDER BY timestamp DESC, action_id DESC LIMIT ?''', (guild_id, user_id, *before, limit))
+    return c.fetchall()
 
-def add_moderation_action(user_id, action_type, reason):
-    conn = sqlite3.connect('bot_data.db')
-    c = conn.cursor()
-    
-    c.execute('INSERT INTO moderation_actions (user_id, action_type, reason) VALUES (?, ?, ?)', (user_id, action_type, reason))
-    
-    conn.commit()
-    conn.close()
-
-def get_moderation_actions(user_id):
-    conn = sqlite3.connect('bot_data.db')
-    c = conn.cursor()
-    
-    c.execute('SELECT action_type, reason, timestamp FROM moderation_actions WHERE user_id = ?', (user_id,))
-    actions = c.fetchall()
-    
-    conn.close()
-    return actions
+def _fts_query(text):
+    # Kullanıcı girdisi FTS5 sözdizimi olarak yorumlanmasın: her kelime tırnak içinde,
+    # son kelime önek araması olarak eklenir
+    words = [word.replace('"', '""') for word in text.split()]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+def _search_moderation_actions(conn, guild_id, text, limit):
+    query = _fts_query(text)
+    if query is None:
+        return []
+    # guild_id FTS tablosunda UNINDEXED; süzme, rowid ile birleştirilen moderation_actions satırında yapılır
+    return conn.execute('''SELECT m.action_id, m.user_id, m.action_type, m.timestamp,
+                                  snippet(moderation_fts, 0, '**', '**', '…', 16)
+                           FROM moderation_fts JOIN moderation_actions m ON m.action_id = moderation_fts.rowid
+                           WHERE moderation_fts MATCH ? AND m.guild_id = ?
+                           ORDER BY bm25(moderation_fts) LIMIT ?''', (query, guild_id, limit)).fetchall()
+
+# Saklama süresi dolan satırları silen sorgular; parametreler (guild_id, cutoff, limit), GLOBAL_PURGE_TABLES'ta
+# (cutoff, limit). Her çağrı en fazla LIMIT kadar satır siler ki yazma kilidi kısa tutulsun
+PURGE_QUERIES = {
+    'moderation_actions': '''DELETE FROM moderation_actions WHERE action_id IN (
+                                 SELECT action_id FROM moderation_actions
+                                 WHERE guild_id = ? AND timestamp < ? LIMIT ?)''',
+    'activity_hourly': '''DELETE FROM activity_hourly WHERE (guild_id, kind, subject_id, bucket) IN (
+                              SELECT guild_id, kind, subject_id, bucket FROM activity_hourly
+                              WHERE guild_id = ? AND bucket < ? LIMIT ?)''',
+    'activity_daily': '''DELETE FROM activity_daily WHERE (guild_id, kind, subject_id, bucket) IN (
+                             SELECT guild_id, kind, subject_id, bucket FROM activity_daily
+                             WHERE guild_id = ? AND bucket < ? LIMIT ?)''',
+    'message_stats': '''DELETE FROM message_stats WHERE user_id IN (
+                            SELECT user_id FROM message_stats WHERE last_active < ? LIMIT ?)''',
+    'search_cache': '''DELETE FROM search_cache WHERE query IN (
+                           SELECT query FROM search_cache WHERE last_used < ? LIMIT ?)''',
+    'track_plays': '''DELETE FROM track_plays WHERE (guild_id, video_id) IN (
+                          SELECT guild_id, video_id FROM track_plays WHERE last_played < ? LIMIT ?)''',
+}
+# Sunucuya bağlı olmayan (ya da tüm sunucular için tek seferde temizlenen) tablolar; guild_id parametresi kullanılmaz
+GLOBAL_PURGE_TABLES = ('message_stats', 'search_cache', 'track_plays')
+
+def _purge_batch(conn, table, guild_id, cutoff, limit):
+    if table in GLOBAL_PURGE_TABLES:
+        return conn.execute(PURGE_QUERIES[table], (cutoff, limit)).rowcount
+    return conn.execute(PURGE_QUERIES[table], (guild_id, cutoff, limit)).rowcount
+
+def _get_retention_policies(conn):
+    return conn.execute('SELECT guild_id, moderation_days, activity_days FROM retention_policies').fetchall()
+
+def _set_retention_policy(conn, guild_id, moderation_days, activity_days):
+    conn.execute('''INSERT INTO retention_policies (guild_id, moderation_days, activity_days) VALUES (?, ?, ?)
+                    ON CONFLICT(guild_id) DO UPDATE SET
+                        moderation_days = excluded.moderation_days,
+                        activity_days = excluded.activity_days''', (guild_id, moderation_days, activity_days))
+
+def _incremental_vacuum(conn, pages):
+    before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    # execute() sadece ilk adımı çalıştırıp bir sayfa boşaltır; executescript pragmayı sonuna kadar yürütür
+    conn.executescript(f'PRAGMA incremental_vacuum({int(pages)});')
+    after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+    return before - after, after
+
+def _checkpoint(conn):
+    return conn.execute('PRAGMA wal_checkpoint(TRUNCATE)').fetchone()
+
+def _analyze(conn):
+    # analysis_limit ile her indeks için sadece örneklem okunur; büyük tablolarda da kısa sürer
+    conn.execute('PRAGMA analysis_limit=1000')
+    conn.execute('ANALYZE')
+
+def _get_search_result(conn, query, since):
+    return conn.execute('SELECT video_id, title FROM search_cache WHERE query = ? AND resolved_at >= ?',
+                        (query, since)).fetchone()
+
+def _record_search_hit(conn, query, now):
+    conn.execute('UPDATE search_cache SET hits = hits + 1, last_used = ? WHERE query = ?', (now, query))
+
+def _save_search_result(conn, query, video_id, title, now):
+    # Süresi dolan kayıt yeniden çözüldüğünde sayaç sıfırlanmaz
+    conn.execute('''INSERT INTO search_cache (query, video_id, title, hits, resolved_at, last_used)
+                    VALUES (?, ?, ?, 1, ?, ?)
+                    ON CONFLICT(query) DO UPDATE SET
+                        video_id = excluded.video_id,
+                        title = excluded.title,
+                        hits = hits + 1,
+                        resolved_at = excluded.resolved_at,
+                        last_used = excluded.last_used''', (query, video_id, title, now, now))
+
+def _record_track_play(conn, guild_id, video_id, title, now):
+    conn.execute('''INSERT INTO track_plays (guild_id, video_id, title, plays, last_played) VALUES (?, ?, ?, 1, ?)
+                    ON CONFLICT(guild_id, video_id) DO UPDATE SET
+                        title = COALESCE(excluded.title, title),
+                        plays = plays + 1,
+                        last_played = excluded.last_played''', (guild_id, video_id, title, now))
+    # Tüm sunuculardaki toplam çalma sayısı
+    return conn.execute('SELECT SUM(plays) FROM track_plays WHERE video_id = ?', (video_id,)).fetchone()[0]
+
+def _get_top_tracks(conn, guild_id, limit):
+    return conn.execute('''SELECT video_id, title, plays FROM track_plays WHERE guild_id = ?
+                           ORDER BY plays DESC, last_played DESC LIMIT ?''', (guild_id, limit)).fetchall()
+
+def _count_moderation_actions(conn, guild_id, user_id):
+    return conn.execute('SELECT COUNT(*) FROM moderation_actions WHERE guild_id = ? AND user_id = ?',
+                        (guild_id, user_id)).fetchone()[0]
+
+
+# Dışa aktarılabilen tablolar: (sorgu, sütunlar). Sorgular guild_id ile sınırlanır ve indeks sırasıyla okunur
+EXPORT_QUERIES = {
+    'message_stats': ('''SELECT g.guild_id, g.user_id, g.message_count, m.message_count, m.last_active
+                         FROM guild_message_stats g LEFT JOIN message_stats m ON m.user_id = g.user_id
+                         WHERE g.guild_id = ? ORDER BY g.user_id''',
+                      ('guild_id', 'user_id', 'guild_message_count', 'total_message_count', 'last_active')),
+    'moderation_actions': ('''SELECT action_id, guild_id, user_id, action_type, reason, timestamp
+                              FROM moderation_actions WHERE guild_id = ? ORDER BY timestamp, action_id''',
+                           ('action_id', 'guild_id', 'user_id', 'action_type', 'reason', 'timestamp')),
+}
+
+
+class Storage:
+    """Mesaj istatistikleri ve moderasyon işlemleri için depolama arayüzü.
+    Cog'lar bunu doğrudan değil, aşağıdaki modül fonksiyonları üzerinden kullanır."""
+    name = None
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def update_message_stats(self, user_id):
+        raise NotImplementedError
+
+    async def apply_message_stats_batch(self, rows, activity_rows, guild_rows):
+        raise NotImplementedError
+
+    async def compact_activity(self, cutoff):
+        raise NotImplementedError
+
+    async def get_activity_total(self, guild_id, kind, subject_id, since):
+        raise NotImplementedError
+
+    async def get_top_activity(self, guild_id, kind, since, limit):
+        raise NotImplementedError
+
+    async def load_guild_message_counts(self):
+        raise NotImplementedError
+
+    async def get_user_stats(self, user_id):
+        raise NotImplementedError
+
+    async def add_moderation_action(self, guild_id, user_id, action_type, reason):
+        raise NotImplementedError
+
+    async def get_moderation_actions(self, guild_id, user_id, before, limit):
+        raise NotImplementedError
+
+    async def count_moderation_actions(self, guild_id, user_id):
+        raise NotImplementedError
+
+    async def search_moderation_actions(self, guild_id, text, limit):
+        raise NotImplementedError
+
+    def iter_export(self, table, guild_id, chunk_size):
+        """(sütunlar, satır üreteci) döndürür. Üreteç bloklayıcıdır; event loop dışında tüketilmelidir."""
+        raise NotImplementedError
+
+    async def get_retention_policies(self):
+        raise NotImplementedError
+
+    async def set_retention_policy(self, guild_id, moderation_days, activity_days):
+        raise NotImplementedError
+
+    async def purge_batch(self, table, guild_id, cutoff, limit):
+        """PURGE_QUERIES'teki tablodan cutoff'tan eski en fazla limit satırı siler"""
+        raise NotImplementedError
+
+    async def get_search_result(self, query, since):
+        """since'ten sonra çözülmüş (video_id, title) ya da None"""
+        raise NotImplementedError
+
+    async def record_search_hit(self, query, now):
+        raise NotImplementedError
+
+    async def save_search_result(self, query, video_id, title, now):
+        raise NotImplementedError
+
+    async def record_track_play(self, guild_id, video_id, title, now):
+        """Çalma sayısını artırır; şarkının tüm sunuculardaki toplam çalma sayısını döndürür"""
+        raise NotImplementedError
+
+    async def get_top_tracks(self, guild_id, limit):
+        """Sunucunun en çok çalınan şarkıları: [(video_id, title, plays)]"""
+        raise NotImplementedError
+
+    # Aşağıdakiler disk tabanlı depolar içindir; bellek deposunda yapacak bir şey yoktur
+    async def enable_incremental_vacuum(self):
+        """auto_vacuum=INCREMENTAL'a geçer; geçiş yapıldıysa True döndürür"""
+        return False
+
+    async def incremental_vacuum(self, pages):
+        """(boşaltılan sayfa, kalan boş sayfa) döndürür"""
+        return 0, 0
+
+    async def checkpoint(self):
+        return None
+
+    async def analyze(self):
+        return None
+
+    def size_on_disk(self):
+        return 0
+
+    def page_size(self):
+        return 0
+
+
+class SQLiteStorage(Storage):
+    """Kalıcı SQLite deposu; tüm sorgular Database'in yazıcı thread'i ve okuyucu havuzunda çalışır"""
+    name = 'sqlite'
+
+    def __init__(self, path=None, readers=2, readonly=False):
+        self.db = Database(path or DB_PATH, readers, readonly)
+
+    def start(self):
+        self.db.start()
+        if self.db.readonly:
+            # Şema olduğu gibi okunur: göç ve VACUUM yapılmaz
+            self._page_size = self.db.submit_read(lambda conn: conn.execute('PRAGMA page_size').fetchone()[0]).result()
+            return
+        self.db.submit_write(_migrate).result()
+        if not self.db.submit_read(_incremental_vacuum_enabled).result():
+            if self.size_on_disk() <= AUTO_VACUUM_STARTUP_MAX_BYTES:
+                self.db.submit_write(_enable_incremental_vacuum).result()
+                logger.info("auto_vacuum=INCREMENTAL etkinleştirildi")
+            else:
+                # Büyük dosyada VACUUM açılışı ve tüm yazmaları uzun süre bekletir
+                logger.warning(f"auto_vacuum=INCREMENTAL etkin değil ({self.size_on_disk() / 1048576:.0f} MB); "
+                               f"boş sayfalar geri verilemiyor. Geçiş için: !maintenance vacuum")
+        self._page_size = self.db.submit_read(lambda conn: conn.execute('PRAGMA page_size').fetchone()[0]).result()
+
+    def close(self):
+        self.db.close()
+
+    async def update_message_stats(self, user_id):
+        await self.db.write(_update_message_stats, user_id)
+
+    async def apply_message_stats_batch(self, rows, activity_rows, guild_rows):
+        await self.db.write(_apply_message_stats_batch, rows, activity_rows, guild_rows)
+
+    async def compact_activity(self, cutoff):
+        return await self.db.write(_compact_activity, cutoff)
+
+    async def get_activity_total(self, guild_id, kind, subject_id, since):
+        return await self.db.read(_get_activity, guild_id, kind, since, subject_id, None)
+
+    async def get_top_activity(self, guild_id, kind, since, limit):
+        return await self.db.read(_get_activity, guild_id, kind, since, None, limit)
+
+    async def load_guild_message_counts(self):
+        return await self.db.read(_load_guild_message_counts)
+
+    async def get_user_stats(self, user_id):
+        return await self.db.read(_get_user_stats, user_id)
+
+    async def add_moderation_action(self, guild_id, user_id, action_type, reason):
+        await self.db.write(_add_moderation_action, guild_id, user_id, action_type, reason)
+
+    async def get_moderation_actions(self, guild_id, user_id, before, limit):
+        return await self.db.read(_get_moderation_actions, guild_id, user_id, before, limit)
+
+    async def count_moderation_actions(self, guild_id, user_id):
+        return await self.db.read(_count_moderation_actions, guild_id, user_id)
+
+    async def search_moderation_actions(self, guild_id, text, limit):
+        return await self.db.read(_search_moderation_actions, guild_id, text, limit)
+
+    def iter_export(self, table, guild_id, chunk_size):
+        query, columns = EXPORT_QUERIES[table]
+
+        def rows():
+            # Okuyucu havuzunu meşgul etmemek için ayrı bağlantı; bellekte en fazla bir parça tutulur
+            conn = self.db.connect_readonly()
+            try:
+                cursor = conn.execute(query, (guild_id,))
+                while True:
+                    chunk = cursor.fetchmany(chunk_size)
+                    if not chunk:
+                        break
+                    yield from chunk
+            finally:
+                conn.close()
+
+        return columns, rows()
+
+    async def get_retention_policies(self):
+        return await self.db.read(_get_retention_policies)
+
+    async def set_retention_policy(self, guild_id, moderation_days, activity_days):
+        await self.db.write(_set_retention_policy, guild_id, moderation_days, activity_days)
+
+    async def purge_batch(self, table, guild_id, cutoff, limit):
+        return await self.db.write(_purge_batch, table, guild_id, cutoff, limit)
+
+    async def get_search_result(self, query, since):
+        return await self.db.read(_get_search_result, query, since)
+
+    async def record_search_hit(self, query, now):
+        await self.db.write(_record_search_hit, query, now)
+
+    async def save_search_result(self, query, video_id, title, now):
+        await self.db.write(_save_search_result, query, video_id, title, now)
+
+    async def record_track_play(self, guild_id, video_id, title, now):
+        return await self.db.write(_record_track_play, guild_id, video_id, title, now)
+
+    async def get_top_tracks(self, guild_id, limit):
+        return await self.db.read(_get_top_tracks, guild_id, limit)
+
+    async def enable_incremental_vacuum(self):
+        return await self.db.write(_enable_incremental_vacuum)
+
+    async def incremental_vacuum(self, pages):
+        return await self.db.write(_incremental_vacuum, pages)
+
+    async def checkpoint(self):
+        return await self.db.write(_checkpoint)
+
+    async def analyze(self):
+        await self.db.write(_analyze)
+
+    def size_on_disk(self):
+        total = 0
+        for path in (self.db.path, self.db.path + '-wal'):
+            if os.path.exists(path):
+                total += os.path.getsize(path)
+        return total
+
+    def page_size(self):
+        return self._page_size
+
+
+class MemoryStorage(Storage):
+    """Diske hiç dokunmayan bellek içi depo; testler ve karşılaştırmalı ölçümler için"""
+    name = 'memory'
+
+    def __init__(self, path=None, readers=None):
+        self.message_stats = {}  # user_id -> [message_count, last_active]
+        self.activity = {'hourly': {}, 'daily': {}}  # tablo -> (guild_id, kind) -> subject_id -> bucket -> sayı
+        self.guild_message_stats = {}  # (guild_id, user_id) -> message_count
+        self.moderation = {}  # (guild_id, user_id) -> [(timestamp, action_id, action_type, reason)] eskiden yeniye
+        self.next_action_id = 1
+        self.retention_policies = {}  # guild_id -> (moderation_days, activity_days)
+        self.search_cache = {}  # query -> [video_id, title, hits, resolved_at, last_used]
+        self.track_plays = {}  # (guild_id, video_id) -> [title, plays, last_played]
+
+    @staticmethod
+    def _now():
+        return datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+    async def update_message_stats(self, user_id):
+        await self.apply_message_stats_batch([(user_id, 1, self._now())], (), ())
+
+    async def apply_message_stats_batch(self, rows, activity_rows, guild_rows):
+        for user_id, count, last_active in rows:
+            entry = self.message_stats.get(user_id)
+            if entry:
+                entry[0] += count
+                entry[1] = max(entry[1] or '', last_active)
+            else:
+                self.message_stats[user_id] = [count, last_active]
+        hourly = self.activity['hourly']
+        for guild_id, kind, subject_id, bucket, count in activity_rows:
+            buckets = hourly.setdefault((guild_id, kind), {}).setdefault(subject_id, {})
+            buckets[bucket] = buckets.get(bucket, 0) + count
+        for guild_id, user_id, count in guild_rows:
+            key = (guild_id, user_id)
+            self.guild_message_stats[key] = self.guild_message_stats.get(key, 0) + count
+
+    async def compact_activity(self, cutoff):
+        moved = 0
+        daily = self.activity['daily']
+        for scope, subjects in self.activity['hourly'].items():
+            for subject_id, buckets in subjects.items():
+                old = [bucket for bucket in buckets if bucket < cutoff]
+                if not old:
+                    continue
+                target = daily.setdefault(scope, {}).setdefault(subject_id, {})
+                for bucket in old:
+                    day = bucket - bucket % 86400
+                    target[day] = target.get(day, 0) + buckets.pop(bucket)
+                moved += len(old)
+        return moved
+
+    def _subject_total(self, scope, subject_id, since):
+        day_start = since - since % 86400
+        total = 0
+        for table, start in (('hourly', since), ('daily', day_start)):
+            buckets = self.activity[table].get(scope, {}).get(subject_id, {})
+            total += sum(count for bucket, count in buckets.items() if bucket >= start)
+        return total
+
+    async def get_activity_total(self, guild_id, kind, subject_id, since):
+        return self._subject_total((guild_id, kind), subject_id, since)
+
+    async def get_top_activity(self, guild_id, kind, since, limit):
+        scope = (guild_id, kind)
+        subjects = set(self.activity['hourly'].get(scope, {})) | set(self.activity['daily'].get(scope, {}))
+        totals = [(subject_id, self._subject_total(scope, subject_id, since)) for subject_id in subjects]
+        totals = [row for row in totals if row[1]]
+        totals.sort(key=lambda row: row[1], reverse=True)
+        return totals[:limit]
+
+    async def load_guild_message_counts(self):
+        return [(guild_id, user_id, count) for (guild_id, user_id), count in self.guild_message_stats.items()]
+
+    async def get_user_stats(self, user_id):
+        entry = self.message_stats.get(user_id)
+        return tuple(entry) if entry else None
+
+    async def add_moderation_action(self, guild_id, user_id, action_type, reason):
+        action_id = self.next_action_id
+        self.next_action_id += 1
+        self.moderation.setdefault((guild_id, user_id), []).append((self._now(), action_id, action_type, reason))
+
+    async def get_moderation_actions(self, guild_id, user_id, before, limit):
+        entries = self.moderation.get((guild_id, user_id), [])
+        end = len(entries) if before is None else bisect.bisect_left(entries, tuple(before), key=lambda e: (e[0], e[1]))
+        page = entries[max(0, end - limit):end]
+        return [(action_id, action_type, reason, timestamp) for timestamp, action_id, action_type, reason in reversed(page)]
+
+    async def count_moderation_actions(self, guild_id, user_id):
+        return len(self.moderation.get((guild_id, user_id), []))
+
+    @staticmethod
+    def _fold(text):
+        # unicode61 remove_diacritics gibi: küçük harf ve aksansız (ç -> c, ş -> s)
+        decomposed = unicodedata.normalize('NFKD', text.casefold())
+        return ''.join(char for char in decomposed if not unicodedata.combining(char))
+
+    async def search_moderation_actions(self, guild_id, text, limit):
+        # FTS yerine basit tarama: tüm kelimeleri içeren sebepler, geçiş sayısına göre sıralanır
+        words = self._fold(text).split()
+        if not words:
+            return []
+        matches = []
+        for (action_guild, user_id), entries in self.moderation.items():
+            if action_guild != guild_id:
+                continue
+            for timestamp, action_id, action_type, reason in entries:
+                folded = self._fold(reason or '')
+                if all(word in folded for word in words):
+                    score = sum(folded.count(word) for word in words)
+                    start = max(0, folded.find(words[0]) - 40)
+                    snippet = ('…' if start else '') + (reason or '')[start:start + 120]
+                    matches.append((score, action_id, user_id, action_type, timestamp, snippet))
+        matches.sort(key=lambda row: row[0], reverse=True)
+        return [row[1:] for row in matches[:limit]]
+
+    def iter_export(self, table, guild_id, chunk_size):
+        columns = EXPORT_QUERIES[table][1]
+        # Veriler zaten bellekte; başka thread'den okunacağı için anlık kopya alınır
+        if table == 'message_stats':
+            rows = sorted((user_id, count) for (g, user_id), count in list(self.guild_message_stats.items()) if g == guild_id)
+            stats = self.message_stats
+            return columns, ((guild_id, user_id, count, *(stats.get(user_id) or (None, None))) for user_id, count in rows)
+        entries = sorted((timestamp, action_id, user_id, action_type, reason)
+                         for (g, user_id), actions in list(self.moderation.items()) if g == guild_id
+                         for timestamp, action_id, action_type, reason in list(actions))
+        return columns, ((action_id, guild_id, user_id, action_type, reason, timestamp)
+                         for timestamp, action_id, user_id, action_type, reason in entries)
+
+    async def get_retention_policies(self):
+        return [(guild_id, *policy) for guild_id, policy in self.retention_policies.items()]
+
+    async def set_retention_policy(self, guild_id, moderation_days, activity_days):
+        self.retention_policies[guild_id] = (moderation_days, activity_days)
+
+    async def purge_batch(self, table, guild_id, cutoff, limit):
+        deleted = 0
+        if table == 'message_stats':
+            for user_id in [u for u, (_, last_active) in self.message_stats.items() if last_active and last_active < cutoff][:limit]:
+                del self.message_stats[user_id]
+                deleted += 1
+        elif table == 'search_cache':
+            for query in [q for q, entry in self.search_cache.items() if entry[4] < cutoff][:limit]:
+                del self.search_cache[query]
+                deleted += 1
+        elif table == 'track_plays':
+            for key in [k for k, entry in self.track_plays.items() if entry[2] < cutoff][:limit]:
+                del self.track_plays[key]
+                deleted += 1
+        elif table == 'moderation_actions':
+            for key in [key for key in self.moderation if key[0] == guild_id]:
+                entries = self.moderation[key]
+                expired = bisect.bisect_left(entries, cutoff, key=lambda e: e[0])
+                expired = min(expired, limit - deleted)
+                del entries[:expired]
+                deleted += expired
+                if not entries:
+                    del self.moderation[key]
+                if deleted >= limit:
+                    break
+        else:
+            scopes = self.activity['hourly' if table == 'activity_hourly' else 'daily']
+            for scope, subjects in scopes.items():
+                if scope[0] != guild_id:
+                    continue
+                for buckets in subjects.values():
+                    for bucket in [b for b in buckets if b < cutoff][:limit - deleted]:
+                        del buckets[bucket]
+                        deleted += 1
+        return deleted
+
+    async def get_search_result(self, query, since):
+        entry = self.search_cache.get(query)
+        if entry is None or entry[3] < since:
+            return None
+        return entry[0], entry[1]
+
+    async def record_search_hit(self, query, now):
+        entry = self.search_cache.get(query)
+        if entry is not None:
+            entry[2] += 1
+            entry[4] = now
+
+    async def save_search_result(self, query, video_id, title, now):
+        entry = self.search_cache.get(query)
+        hits = entry[2] + 1 if entry else 1
+        self.search_cache[query] = [video_id, title, hits, now, now]
+
+    async def record_track_play(self, guild_id, video_id, title, now):
+        entry = self.track_plays.setdefault((guild_id, video_id), [title, 0, now])
+        entry[0] = title or entry[0]
+        entry[1] += 1
+        entry[2] = now
+        return sum(plays for (_, vid), (_, plays, _) in self.track_plays.items() if vid == video_id)
+
+    async def get_top_tracks(self, guild_id, limit):
+        rows = [(video_id, title, plays, last_played)
+                for (gid, video_id), (title, plays, last_played) in self.track_plays.items() if gid == guild_id]
+        rows.sort(key=lambda row: (row[2], row[3]), reverse=True)
+        return [row[:3] for row in rows[:limit]]
+
+
+STORAGE_BACKENDS = {
+    SQLiteStorage.name: SQLiteStorage,
+    MemoryStorage.name: MemoryStorage,
+}
+
+# SEZAR_DB_BACKEND=memory ile bot diske yazmadan çalıştırılabilir
+DB_BACKEND = os.getenv('SEZAR_DB_BACKEND', SQLiteStorage.name)
+
+_storage = None
+
+def get_storage():
+    if _storage is None:
+        raise RuntimeError("init_db() çağrılmadan veritabanı kullanılamaz")
+    return _storage
+
+def init_db(path=None, backend=None):
+    """Seçilen depoyu açar ve şemayı günceller. backend bir isim ya da Storage örneği olabilir."""
+    global _storage
+    if _storage is not None:
+        return _storage
+    backend = backend or DB_BACKEND
+    if isinstance(backend, Storage):
+        storage = backend
+    elif backend in STORAGE_BACKENDS:
+        storage = STORAGE_BACKENDS[backend](path)
+    else:
+        raise ValueError(f"Bilinmeyen depolama türü: {backend}")
+    storage.start()
+    _storage = storage
+    logger.info(f"Depolama: {storage.name}")
+    return storage
+
+def close_db():
+    global _storage
+    if _storage is not None:
+        _storage.close()
+        _storage = None
+
+
+async def update_message_stats(user_id):
+    await get_storage().update_message_stats(user_id)
+
+async def apply_message_stats_batch(rows, activity_rows=(), guild_rows=()):
+    """(user_id, artış, last_active), (guild_id, kind, subject_id, bucket, artış) ve
+    (guild_id, user_id, artış) satırlarını tek bir işlemde upsert eder."""
+    await get_storage().apply_message_stats_batch(rows, activity_rows, guild_rows)
+
+async def compact_activity(cutoff):
+    """cutoff'tan eski saatlik özetleri günlük özetlere taşır; taşınan saatlik satır sayısını döndürür."""
+    return await get_storage().compact_activity(cutoff)
+
+async def get_activity_total(guild_id, kind, subject_id, since):
+    return await get_storage().get_activity_total(guild_id, kind, subject_id, since)
+
+async def get_top_activity(guild_id, kind, since, limit=5):
+    return await get_storage().get_top_activity(guild_id, kind, since, limit)
+
+async def load_guild_message_counts():
+    """Sıralama indeksini kurmak için tüm (guild_id, user_id, message_count) satırları"""
+    return await get_storage().load_guild_message_counts()
+
+async def get_user_stats(user_id):
+    return await get_storage().get_user_stats(user_id)
+
+async def add_moderation_action(guild_id, user_id, action_type, reason):
+    await get_storage().add_moderation_action(guild_id, user_id, action_type, reason)
+
+async def get_moderation_actions(guild_id, user_id, before=None, limit=10):
+    """Kullanıcının işlemlerini yeniden eskiye döndürür: (action_id, action_type, reason, timestamp).
+    Sonraki sayfa için son satırın (timestamp, action_id) değeri before olarak verilir."""
+    return await get_storage().get_moderation_actions(guild_id, user_id, before, limit)
+
+async def count_moderation_actions(guild_id, user_id):
+    return await get_storage().count_moderation_actions(guild_id, user_id)
+
+async def get_retention_policies():
+    """Sunucuya özel saklama politikaları: [(guild_id, moderation_days, activity_days)]"""
+    return await get_storage().get_retention_policies()
+
+async def set_retention_policy(guild_id, moderation_days, activity_days):
+    await get_storage().set_retention_policy(guild_id, moderation_days, activity_days)
+
+async def get_search_result(query, max_age):
+    """Son max_age saniye içinde çözülmüş arama sonucu: (video_id, title) ya da None"""
+    return await get_storage().get_search_result(query, int(time.time()) - max_age)
+
+async def record_search_hit(query):
+    await get_storage().record_search_hit(query, int(time.time()))
+
+async def save_search_result(query, video_id, title):
+    await get_storage().save_search_result(query, video_id, title, int(time.time()))
+
+async def record_track_play(guild_id, video_id, title=None):
+    """Çalma sayısını artırır; şarkının tüm sunuculardaki toplam çalma sayısını döndürür"""
+    return await get_storage().record_track_play(guild_id, video_id, title, int(time.time()))
+
+async def get_top_tracks(guild_id, limit=5):
+    """Sunucunun en çok çalınan şarkıları: [(video_id, title, plays)]"""
+    return await get_storage().get_top_tracks(guild_id, limit)
+
+async def search_moderation_actions(guild_id, text, limit=10):
+    """Sebeplerde tam metin araması: en alakalıdan başlayarak
+    (action_id, user_id, action_type, timestamp, snippet) döndürür."""
+    return await get_storage().search_moderation_actions(guild_id, text, limit)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Data Export Script
+------------------
+Streams a guild's message stats or moderation history into a
+gzip-compressed NDJSON or CSV file with constant memory use.
+
+    python export.py --guild 123456789 --table moderation_actions --format csv
+"""
+
+import argparse
+import csv
+import datetime
+import gzip
+import json
+import os
+import sys
+import time
+
+import database
+
+EXPORT_FORMATS = ('ndjson', 'csv')
+# Varsayılan olarak veritabanının yanındaki exports klasörüne (Docker'da bot-data volume'ü) yazılır
+EXPORT_DIR = os.getenv('SEZAR_EXPORT_DIR', os.path.join(os.path.dirname(database.DB_PATH) or '.', 'exports'))
+
+
+def default_export_path(guild_id, table, fmt):
+    stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+    return os.path.join(EXPORT_DIR, f"{guild_id}-{table}-{stamp}.{fmt}.gz")
+
+
+def export_table(storage, table, guild_id, fmt, path, chunk_size=1000):
+    """Tabloyu parça parça okuyup sıkıştırarak dosyaya yazar; yazılan satır sayısını döndürür.
+    Bloklayıcıdır, bot içinden asyncio.to_thread ile çağrılmalıdır."""
+    if table not in database.EXPORT_QUERIES:
+        raise ValueError(f"Bilinmeyen tablo: {table}")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Bilinmeyen biçim: {fmt}")
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    columns, rows = storage.iter_export(table, guild_id, chunk_size)
+    count = 0
+    # Yarım kalan dosya geçerli bir dışa aktarma gibi görünmesin diye önce geçici ada yazılır
+    partial_path = path + '.part'
+    try:
+        with gzip.open(partial_path, 'wt', encoding='utf-8', newline='') as f:
+            if fmt == 'csv':
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+            else:
+                for row in rows:
+                    f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                    f.write('\n')
+                    count += 1
+        os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sunucu verilerini gzip NDJSON/CSV olarak dışa aktarır")
+    parser.add_argument('--guild', type=int, required=True, help="Sunucu ID'si")
+    parser.add_argument('--table', choices=sorted(database.EXPORT_QUERIES), required=True)
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+    parser.add_argument('--output', help="Çıktı dosyası (varsayılan: exports klasörü)")
+    parser.add_argument('--db', help="Veritabanı yolu (varsayılan: SEZAR_DB_PATH)")
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    path = args.output or default_export_path(args.guild, args.table, args.format)
+    # Salt okunur açılır: çalışan botun dosyasında göç ya da VACUUM başlatılmaz
+    storage = database.SQLiteStorage(args.db, readonly=True)
+    storage.start()
+    try:
+        started = time.perf_counter()
+        count = export_table(storage, args.table, args.guild, args.format, path, args.chunk_size)
+        elapsed = time.perf_counter() - started
+    finally:
+        storage.close()
+
+    print(f"✅ {count:,} satır {elapsed:.2f} sn içinde yazıldı: {path} ({os.path.getsize(path):,} bayt)")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except Exception as e:
+        print(f"❌ Dışa aktarma hatası: {e}")
+        sys.exit(1)
@@ -0,0 +1,130 @@
+import random
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level  # Bu seviyede bir sonraki düğüme kadar kaç sıra atlandığı
+
+
+class RankIndex:
+    """Sıralı anahtarlar için indekslenebilir skip list.
+    Ekleme, silme ve "kaç anahtar benden küçük" sorgusu O(log n), ilk K anahtar O(K)."""
+    MAX_LEVEL = 24
+
+    def __init__(self):
+        self.head = _Node(None, self.MAX_LEVEL)
+        self.level = 1  # Kullanılan en yüksek seviye; aramalar buradan başlar
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _search(self, key):
+        # Her seviyede key'den küçük son düğümü ve o düğümün sırasını bul
+        chain = [self.head] * self.MAX_LEVEL
+        steps = [0] * self.MAX_LEVEL
+        node = self.head
+        position = 0
+        for level in reversed(range(self.level)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            steps[level] = position
+        return chain, steps
+
+    def insert(self, key):
+        chain, steps = self._search(key)
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        if level > self.level:
+            # Yeni açılan seviyelerde baştan sona tüm liste atlanır
+            for i in range(self.level, level):
+                self.head.width[i] = self.size + 1
+            self.level = level
+
+        node = _Node(key, level)
+        for i in range(level):
+            previous = chain[i]
+            skipped = steps[0] - steps[i]
+            node.next[i] = previous.next[i]
+            previous.next[i] = node
+            node.width[i] = previous.width[i] - skipped
+            previous.width[i] = skipped + 1
+        for i in range(level, self.level):
+            chain[i].width[i] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain, _ = self._search(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for i in range(len(node.next)):
+            chain[i].width[i] += node.width[i] - 1
+            chain[i].next[i] = node.next[i]
+        for i in range(len(node.next), self.level):
+            chain[i].width[i] -= 1
+        self.size -= 1
+
+    def count_less(self, key):
+        _, steps = self._search(key)
+        return steps[0]
+
+    def first(self, count):
+        keys = []
+        node = self.head.next[0]
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """Sunucu bazında mesaj sayısı sıralaması. Anahtarlar (-mesaj_sayısı, user_id) olduğu için
+    en aktif kullanıcı ilk sıradadır."""
+    def __init__(self):
+        self.guilds = {}  # guild_id -> (user_id -> mesaj sayısı, RankIndex)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """(guild_id, user_id, message_count) satırlarından sıralamayı kurar"""
+        leaderboard = cls()
+        for guild_id, user_id, count in rows:
+            leaderboard.increment(guild_id, user_id, count)
+        return leaderboard
+
+    def increment(self, guild_id, user_id, amount=1):
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            guild = self.guilds[guild_id] = ({}, RankIndex())
+        counts, index = guild
+
+        old = counts.get(user_id)
+        if old is not None:
+            index.remove((-old, user_id))
+        new = (old or 0) + amount
+        counts[user_id] = new
+        index.insert((-new, user_id))
+
+    def top(self, guild_id, count=10):
+        """En çok mesaj atan kullanıcılar: [(user_id, mesaj sayısı)]"""
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            return []
+        return [(user_id, -negative) for negative, user_id in guild[1].first(count)]
+
+    def rank(self, guild_id, user_id):
+        """(sıra, mesaj sayısı, sıralamadaki kullanıcı sayısı) döndürür; eşit sayılar aynı sırayı paylaşır"""
+        guild = self.guilds.get(guild_id)
+        if guild is None or user_id not in guild[0]:
+            return None
+        counts, index = guild
+        count = counts[user_id]
+        # user_id'ler pozitif olduğu için (-count, -1) aynı sayıdaki herkesten önce gelir
+        return index.count_less((-count, -1)) + 1, count, len(index)
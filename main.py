@@ -6,7 +6,8 @@ import os
 import asyncio
 import datetime
 from dotenv import load_dotenv
-from database import init_db
+from database import init_db, close_db
+from maintenance import run_maintenance, enable_incremental_vacuum
 
 load_dotenv()
 TOKEN = os.getenv("DISCORD_BOT_TOKEN")
@@ -73,6 +74,23 @@ async def sync_command(ctx):
     except Exception as e:
         await ctx.send(f"❌ Error syncing commands: {e}")
 
+@bot.command(name="maintenance")
+@commands.is_owner()  # Only bot owner can use this command
+async def maintenance_command(ctx, step: str = None):
+    """Run database retention and compaction now; `vacuum` converts the file to incremental auto-vacuum"""
+    try:
+        if step == "vacuum":
+            await ctx.send("Rewriting the database for incremental auto-vacuum (writes wait until it finishes)...")
+            changed, elapsed = await enable_incremental_vacuum()
+            await ctx.send(f"✅ auto_vacuum=INCREMENTAL enabled in {elapsed:.1f}s" if changed
+                           else "✅ Incremental auto-vacuum is already enabled")
+            return
+        await ctx.send("Running database maintenance...")
+        report = await run_maintenance([guild.id for guild in bot.guilds])
+        await ctx.send(f"✅ {report.summary()}")
+    except Exception as e:
+        await ctx.send(f"❌ Maintenance error: {e}")
+
 async def load_cogs():
     """Load all cogs and ensure commands are registered"""
     # Dictionary to track loaded extensions and their command counts
@@ -169,12 +187,38 @@ async def update_stats():
             print(f"İstatistik güncelleme hatası: {e}")
             await asyncio.sleep(300)
 
+async def database_maintenance():
+    # Bot bağlanana kadar bekle, açılıştaki yoğunluk geçsin
+    await bot.wait_until_ready()
+    await asyncio.sleep(600)
+    
+    while not bot.is_closed():
+        try:
+            report = await run_maintenance([guild.id for guild in bot.guilds])
+            print(f"🧹 Veritabanı bakımı: {report.summary()}")
+            
+            # 6 saatte bir çalıştır
+            await asyncio.sleep(6 * 3600)
+        except Exception as e:
+            print(f"Veritabanı bakım hatası: {e}")
+            await asyncio.sleep(1800)
+
 # Botu başlatmadan önce cogs'ları yükle
 async def main():
-    async with bot:
-        init_db()
-        await load_cogs()
-        # Not: Task'ları on_ready event'inde başlatıyoruz
-        await bot.start(TOKEN)
+    init_db()
+    maintenance_task = None
+    try:
+        async with bot:
+            await load_cogs()
+            # Not: Task'ları on_ready event'inde başlatıyoruz. Bakım döngüsü burada bir kez başlatılır;
+            # on_ready her yeniden bağlanmada tekrar çalışır ve döngüler üst üste binerdi
+            maintenance_task = asyncio.create_task(database_maintenance())
+            await bot.start(TOKEN)
+    finally:
+        if maintenance_task is not None:
+            maintenance_task.cancel()
+            await asyncio.gather(maintenance_task, return_exceptions=True)
+        # Cog'lar kapanırken bekleyen yazmaları bitirdikten sonra bağlantıları kapat
+        close_db()
 
 asyncio.run(main())
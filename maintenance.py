@@ -0,0 +1,133 @@
+import asyncio
+import datetime
+import logging
+import os
+import time
+
+import database
+
+logger = logging.getLogger('sezar.maintenance')
+
+
+def _env_days(name, default):
+    value = os.getenv(name)
+    if value is None or value == '':
+        return default
+    days = int(value)
+    return days if days > 0 else None  # 0 = sonsuza kadar sakla
+
+# Sunucuya özel politika yoksa kullanılan varsayılanlar (None = silme)
+DEFAULT_MODERATION_DAYS = _env_days('SEZAR_RETENTION_MODERATION_DAYS', None)
+DEFAULT_ACTIVITY_DAYS = _env_days('SEZAR_RETENTION_ACTIVITY_DAYS', 400)
+INACTIVE_USER_DAYS = _env_days('SEZAR_RETENTION_INACTIVE_USER_DAYS', None)
+SEARCH_CACHE_DAYS = _env_days('SEZAR_RETENTION_SEARCH_CACHE_DAYS', 90)  # Bu kadar süre aranmayan sorgular
+TRACK_PLAYS_DAYS = _env_days('SEZAR_RETENTION_TRACK_PLAYS_DAYS', 180)  # Bu kadar süre çalınmayan şarkıların sayaçları
+
+PURGE_BATCH_SIZE = 500        # Tek yazma işleminde silinecek en fazla satır
+VACUUM_BATCH_PAGES = 256      # Tek adımda geri verilecek en fazla sayfa
+BATCH_PAUSE = 0.05            # Adımlar arasında diğer yazmalara sıra verilir
+TIME_BUDGET = 60.0            # Bir çalıştırmada harcanacak en fazla süre; kalan iş sonraki tura kalır
+
+
+class MaintenanceReport:
+    def __init__(self):
+        self.deleted = {}
+        self.pages_freed = 0
+        self.bytes_before = 0
+        self.bytes_after = 0
+        self.elapsed = 0.0
+        self.finished = True
+
+    @property
+    def bytes_reclaimed(self):
+        return max(0, self.bytes_before - self.bytes_after)
+
+    def summary(self):
+        deleted = ', '.join(f"{table}: {count}" for table, count in self.deleted.items() if count) or 'yok'
+        status = '' if self.finished else ' (süre doldu, kalan iş sonraki tura)'
+        return (f"Silinen satırlar: {deleted} | {self.pages_freed} sayfa boşaltıldı, "
+                f"{self.bytes_reclaimed / 1024:.0f} KB geri kazanıldı | {self.elapsed:.1f} sn{status}")
+
+
+def _utc_timestamp(days):
+    cutoff = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=days)
+    return cutoff.strftime('%Y-%m-%d %H:%M:%S')
+
+
+async def run_maintenance(guild_ids, deadline=None):
+    """Saklama politikalarını uygular, boş sayfaları geri verir, WAL'ı sıfırlar ve istatistikleri
+    günceller. Her adım kısa bir yazma işlemidir; aralarda diğer yazmalar sıraya girebilir."""
+    storage = database.get_storage()
+    report = MaintenanceReport()
+    started = time.perf_counter()
+    deadline = deadline or started + TIME_BUDGET
+    report.bytes_before = storage.size_on_disk()
+
+    def out_of_time():
+        return time.perf_counter() >= deadline
+
+    async def purge(table, guild_id, cutoff):
+        while not out_of_time():
+            deleted = await storage.purge_batch(table, guild_id, cutoff, PURGE_BATCH_SIZE)
+            report.deleted[table] = report.deleted.get(table, 0) + deleted
+            if deleted < PURGE_BATCH_SIZE:
+                return
+            await asyncio.sleep(BATCH_PAUSE)
+        report.finished = False
+
+    # 1) Saklama politikaları
+    policies = {guild_id: (moderation_days, activity_days)
+                for guild_id, moderation_days, activity_days in await storage.get_retention_policies()}
+    now = int(time.time())
+    for guild_id in set(guild_ids) | set(policies):
+        moderation_days, activity_days = policies.get(guild_id, (None, None))
+        moderation_days = moderation_days or DEFAULT_MODERATION_DAYS
+        activity_days = activity_days or DEFAULT_ACTIVITY_DAYS
+        if moderation_days:
+            await purge('moderation_actions', guild_id, _utc_timestamp(moderation_days))
+        if activity_days:
+            cutoff = now - activity_days * 86400
+            await purge('activity_hourly', guild_id, cutoff)
+            await purge('activity_daily', guild_id, cutoff)
+        if out_of_time():
+            report.finished = False
+            break
+    if INACTIVE_USER_DAYS and not out_of_time():
+        await purge('message_stats', None, _utc_timestamp(INACTIVE_USER_DAYS))
+    if SEARCH_CACHE_DAYS and not out_of_time():
+        await purge('search_cache', None, now - SEARCH_CACHE_DAYS * 86400)
+    if TRACK_PLAYS_DAYS and not out_of_time():
+        await purge('track_plays', None, now - TRACK_PLAYS_DAYS * 86400)
+
+    # 2) Boş sayfaları dosya sisteminden geri ver
+    while not out_of_time():
+        freed, remaining = await storage.incremental_vacuum(VACUUM_BATCH_PAGES)
+        report.pages_freed += freed
+        if not remaining or not freed:
+            break
+        await asyncio.sleep(BATCH_PAUSE)
+
+    # 3) WAL'ı ana dosyaya işle ve kısalt, 4) sorgu planlayıcı istatistiklerini yenile
+    if not out_of_time():
+        await storage.checkpoint()
+    if not out_of_time():
+        await storage.analyze()
+
+    report.bytes_after = storage.size_on_disk()
+    report.elapsed = time.perf_counter() - started
+    logger.info(f"Bakım tamamlandı: {report.summary()}")
+    return report
+
+
+async def enable_incremental_vacuum():
+    """Veritabanını auto_vacuum=INCREMENTAL'a geçirir. Tüm dosya yeniden yazılır ve bu sürede yazmalar
+    bekler; bu yüzden sadece sahibin komutuyla çalıştırılır."""
+    storage = database.get_storage()
+    started = time.perf_counter()
+    before = storage.size_on_disk()
+    changed = await storage.enable_incremental_vacuum()
+    elapsed = time.perf_counter() - started
+    if changed:
+        logger.info(f"auto_vacuum=INCREMENTAL etkinleştirildi: {before / 1048576:.1f} MB -> "
+                    f"{storage.size_on_disk() / 1048576:.1f} MB, {elapsed:.1f} sn")
+    return changed, elapsed
@@ -0,0 +1,434 @@
+import logging
+import math
+import os
+import subprocess
+import threading
+
+import discord
+import numpy as np
+
+logger = logging.getLogger('sezar.music')
+
+# Bağlantı koparsa ffmpeg akışı baştan başlatmak yerine kaldığı yerden yeniden bağlanır
+RECONNECT_OPTIONS = '-reconnect 1 -reconnect_streamed 1 -reconnect_delay_max 5'
+OPUS_BITRATE = 128  # kbps; Discord ses kanallarının çoğu için yeterli
+# Yüksek ses düzeylerinde sert kırpma yerine yumuşak sınırlama; level=false çıkışı yeniden normalize etmez
+LIMITER = 'alimiter=limit=0.95:attack=5:release=50:level=false'
+
+SAMPLE_RATE = 48000
+FRAME_SAMPLES = 960  # Discord'un 20 ms'lik çerçevesi, kanal başına örnek
+LIMIT_THRESHOLD = 0.95  # DSP limiter'ının yumuşak sınırlamaya başladığı seviye (tam ölçeğe göre)
+PCM_FRAME_BYTES = FRAME_SAMPLES * 2 * 2  # 16-bit stereo
+# PCM akışında ffmpeg'den önceden okunan ses miktarı; ağ takılmalarını bu kadar süre örter
+PCM_BUFFER_MS = int(os.getenv('SEZAR_PCM_BUFFER_MS', '1000'))
+
+
+def input_options(url, start=0.0):
+    """ffmpeg giriş seçenekleri; yeniden bağlanma seçenekleri sadece ağ akışlarında geçerlidir"""
+    options = RECONNECT_OPTIONS if url.startswith(('http://', 'https://')) else ''
+    if start > 0:
+        options = f"-ss {start:.3f} {options}".strip()
+    return options
+
+
+def eq_bands(bas=100, tizlik=100):
+    """/çal'ın bas ve tizlik ayarlarını ekolayzer bantlarına çevirir.
+    [(tür, frekans, genişlik, kazanç_db)]; tür 'bass' (alçak raf, genişlik Q) ya da 'peak' (genişlik oktav)."""
+    bands = []
+    if bas != 100:
+        # Normalize bas seviyesini 0.4 - 20 aralığına çevir (daha etkili bas efekti için)
+        bands.append(('bass', 110, 0.6, (bas / 100) * 2))
+
+    if tizlik < 100:
+        # Kalınlaştırma: bas artar, orta ve tiz azalır; 0'a yaklaştıkça etki güçlenir
+        ratio = (100 - tizlik) / 100
+        bands += [('peak', 60, 2, 6 + ratio * 14),
+                  ('peak', 300, 1, -5 * ratio),
+                  ('peak', 1000, 1, -5 * ratio),
+                  ('peak', 8000, 2, -10 * ratio)]
+    elif tizlik > 100:
+        # İnceleştirme: tiz ve orta artar, bas azalır; 200'e yaklaştıkça etki güçlenir
+        ratio = (tizlik - 100) / 100
+        bands += [('peak', 8000, 2, 6 + ratio * 14),
+                  ('peak', 3000, 1, 3 * ratio),
+                  ('peak', 1000, 1, 3 * ratio),
+                  ('peak', 80, 2, -10 * ratio)]
+    return bands
+
+
+def eq_filters(bands):
+    filters = []
+    for kind, frequency, width, gain in bands:
+        if kind == 'bass':
+            filters.append(f"bass=g={gain:.2f}:f={frequency}:w={width}")
+        else:
+            filters.append(f"equalizer=f={frequency}:width_type=o:width={width}:g={gain:.2f}")
+    return filters
+
+
+def tempo_filters(speed=1.0):
+    # atempo tek başına 0.5-2.0 arasını destekler; daha geniş aralık için zincirlenir
+    filters = []
+    remaining = speed
+    while remaining < 0.5:
+        filters.append("atempo=0.5")
+        remaining /= 0.5
+    while remaining > 2.0:
+        filters.append("atempo=2.0")
+        remaining /= 2.0
+    if abs(remaining - 1.0) > 1e-6:
+        filters.append(f"atempo={remaining:.4f}")
+    return filters
+
+
+def build_filter_graph(bas=100, tizlik=100, speed=1.0, volume=1.0):
+    """Tüm ayarları tek bir ffmpeg filtre zincirinde toplar. Ses düzeyi isimli bir volume filtresiyle
+    (volume@gain) uygulanır ki çalarken kontrol kanalından değiştirilebilsin; en sonda limiter vardır."""
+    return [*eq_filters(eq_bands(bas, tizlik)), *tempo_filters(speed), f"volume@gain={volume:.3f}", LIMITER]
+
+
+def can_passthrough(source_codec, bas=100, tizlik=100, speed=1.0, volume=1.0):
+    """Kaynak zaten Opus ise ve ses değiştirilmeyecekse paketler çözülmeden Discord'a aktarılabilir"""
+    return source_codec == 'opus' and bas == 100 and tizlik == 100 and speed == 1.0 and volume == 1.0
+
+
+def filter_signature(source_codec, bas=100, tizlik=100, speed=1.0, volume=1.0):
+    """create_audio_source'un kuracağı ffmpeg zincirini tanımlar; aynı imzalı iki akış aynı sesi üretir"""
+    if can_passthrough(source_codec, bas, tizlik, speed, volume):
+        return 'copy'
+    return ','.join(build_filter_graph(bas, tizlik, speed, volume))
+
+
+def biquad_coefficients(kind, frequency, width, gain_db, rate=SAMPLE_RATE):
+    """RBJ formülleriyle ffmpeg'in bass ve equalizer filtreleriyle aynı katsayılar; a0'a bölünmüş (b, a)"""
+    amplitude = 10 ** (gain_db / 40)
+    w0 = 2 * math.pi * frequency / rate
+    cos_w0, sin_w0 = math.cos(w0), math.sin(w0)
+    if kind == 'bass':
+        shelf = 2 * math.sqrt(amplitude) * sin_w0 / (2 * width)
+        b = (amplitude * ((amplitude + 1) - (amplitude - 1) * cos_w0 + shelf),
+             2 * amplitude * ((amplitude - 1) - (amplitude + 1) * cos_w0),
+             amplitude * ((amplitude + 1) - (amplitude - 1) * cos_w0 - shelf))
+        a = ((amplitude + 1) + (amplitude - 1) * cos_w0 + shelf,
+             -2 * ((amplitude - 1) + (amplitude + 1) * cos_w0),
+             (amplitude + 1) + (amplitude - 1) * cos_w0 - shelf)
+    else:
+        alpha = sin_w0 * math.sinh(math.log(2) / 2 * width * w0 / sin_w0)
+        b = (1 + alpha * amplitude, -2 * cos_w0, 1 - alpha * amplitude)
+        a = (1 + alpha / amplitude, -2 * cos_w0, 1 - alpha / amplitude)
+    return [x / a[0] for x in b], [x / a[0] for x in a]
+
+
+class BlockEqualizer:
+    """Art arda bağlı biquad'ları tek bir durum-uzayı sistemine çevirir ve 20 ms'lik çerçeveyi örnek örnek
+    döngü yerine birkaç matris çarpımıyla işler:
+        y = T @ x + O @ s        s' = A^N @ s + K @ x
+    T etki yanıtından kurulan alt üçgen Toeplitz matrisi, s filtre durumudur. Matrisler ayar değişince
+    bir kez hesaplanır; durum çerçeveler arasında taşındığı için çerçeve sınırlarında süreksizlik olmaz."""
+    def __init__(self, bands, frame_samples=FRAME_SAMPLES, rate=SAMPLE_RATE):
+        self.bands = list(bands)
+        self.frame_samples = frame_samples
+        state_a, state_b, state_c, state_d = self._cascade(
+            [biquad_coefficients(*band, rate=rate) for band in self.bands])
+        self.order = len(state_b)
+        self._build(state_a, state_b, state_c, state_d)
+
+    @staticmethod
+    def _cascade(sections):
+        state_a = np.zeros((0, 0))
+        state_b = np.zeros(0)
+        state_c = np.zeros(0)
+        state_d = 1.0
+        for b, a in sections:
+            # Transposed direct form II: y = b0*x + s1, s1' = -a1*s1 + s2 + (b1 - a1*b0)*x, s2' = -a2*s1 + (b2 - a2*b0)*x
+            section_a = np.array([[-a[1], 1.0], [-a[2], 0.0]])
+            section_b = np.array([b[1] - a[1] * b[0], b[2] - a[2] * b[0]])
+            section_c = np.array([1.0, 0.0])
+            n = len(state_b)
+            combined = np.zeros((n + 2, n + 2))
+            combined[:n, :n] = state_a
+            combined[n:, :n] = np.outer(section_b, state_c)  # Bu bölümün girişi önceki bölümün çıkışıdır
+            combined[n:, n:] = section_a
+            state_a = combined
+            state_b = np.concatenate([state_b, section_b * state_d])
+            state_c = np.concatenate([b[0] * state_c, section_c])
+            state_d = b[0] * state_d
+        return state_a, state_b, state_c, state_d
+
+    def _build(self, state_a, state_b, state_c, state_d):
+        frame = self.frame_samples
+        impulse = np.zeros(frame)
+        impulse[0] = state_d
+        observe = np.zeros((frame, self.order))
+        control = np.zeros((self.order, frame))
+        row = state_c.copy()  # C A^k
+        column = state_b.copy()  # A^k B
+        for k in range(frame):
+            observe[k] = row
+            if k + 1 < frame:
+                impulse[k + 1] = row @ state_b
+            row = row @ state_a
+            control[:, frame - 1 - k] = column
+            column = state_a @ column
+        lag = np.subtract.outer(np.arange(frame), np.arange(frame))
+        self.toeplitz = np.where(lag >= 0, impulse[np.maximum(lag, 0)], 0.0).astype(np.float32)
+        self.observe = observe.astype(np.float32)
+        self.control = control.astype(np.float32)
+        self.transition = np.linalg.matrix_power(state_a, frame).astype(np.float32)
+
+    def new_state(self, channels=2):
+        return np.zeros((self.order, channels), dtype=np.float32)
+
+    def process(self, samples, state):
+        """samples: (frame_samples, kanal) float32; (çıkış, yeni durum) döndürür"""
+        if not self.order:
+            return samples, state
+        output = self.toeplitz @ samples + self.observe @ state
+        state = self.transition @ state + self.control @ samples
+        return output, state
+
+
+def soft_limit(samples, threshold=LIMIT_THRESHOLD):
+    """Eşiğin üstünü tanh ile tam ölçeğe yumuşakça yaklaştırır; eşiğin altına dokunmaz (yerinde)"""
+    magnitude = np.abs(samples)
+    over = magnitude > threshold
+    if over.any():
+        headroom = 1.0 - threshold
+        samples[over] = np.sign(samples[over]) * (threshold + headroom * np.tanh((magnitude[over] - threshold) / headroom))
+    return samples
+
+
+class DSPAudio(discord.AudioSource):
+    """16-bit stereo PCM kaynağına NumPy ile EQ, ses düzeyi ve limiter uygular.
+    retune() çalarken çağrılabilir; yeni ayar bir sonraki 20 ms'lik çerçevede devreye girer.
+    Tempo ayarı ffmpeg'de kalır, çünkü çerçeve uzunluğunu değiştirir."""
+    def __init__(self, original, *, bas=100, tizlik=100, volume=1.0):
+        self.original = original
+        self.bas = bas
+        self.tizlik = tizlik
+        self.volume = volume
+        self.frames = 0
+        self._equalizer = BlockEqualizer(eq_bands(bas, tizlik))
+        self._state = self._equalizer.new_state()
+
+    def retune(self, bas=None, tizlik=None, volume=None):
+        if bas is not None or tizlik is not None:
+            self.bas = self.bas if bas is None else bas
+            self.tizlik = self.tizlik if tizlik is None else tizlik
+            # Matrisler bu thread'de hazırlanır; ses thread'i referansı tek atamayla görür
+            self._equalizer = BlockEqualizer(eq_bands(self.bas, self.tizlik))
+        if volume is not None:
+            self.volume = volume
+
+    def read(self):
+        data = self.original.read()
+        if not data:
+            return b''
+        equalizer = self._equalizer
+        state = self._state
+        if state.shape[0] != equalizer.order:
+            # Bant sayısı değişti; eski durum yeni sisteme uymaz
+            state = equalizer.new_state()
+
+        pcm = np.frombuffer(data, dtype=np.int16)
+        samples = pcm.astype(np.float32).reshape(-1, 2) * (1 / 32768)
+        count = len(samples)
+        if count < equalizer.frame_samples:
+            # Akışın son, kısa çerçevesi
+            samples = np.concatenate([samples, np.zeros((equalizer.frame_samples - count, 2), dtype=np.float32)])
+        output, self._state = equalizer.process(samples, state)
+        output = soft_limit(output[:count] * self.volume)
+        self.frames += 1
+        return (output * 32767).astype(np.int16).tobytes()
+
+    def is_opus(self):
+        return False
+
+    def cleanup(self):
+        self.original.cleanup()
+
+
+class PCMRingBuffer:
+    """Önceden ayrılmış, sabit boyutlu çerçevelerden oluşan halka tampon. Arka plandaki okuma thread'i
+    ffmpeg çıktısını readinto ile doğrudan boş yuvalara yazar; ses thread'i hazır çerçeveleri alır.
+    Tek yazar ve tek okuyucu içindir."""
+    def __init__(self, frame_size=PCM_FRAME_BYTES, buffer_ms=PCM_BUFFER_MS):
+        self.frame_size = frame_size
+        self.capacity = max(2, buffer_ms // 20)
+        self._storage = bytearray(frame_size * self.capacity)
+        self._view = memoryview(self._storage)
+        self._lengths = [0] * self.capacity
+        self._head = 0  # Sıradaki okunacak yuva
+        self._count = 0  # Dolu yuva sayısı
+        self._condition = threading.Condition()
+        self._eof = False
+        self._stopped = False
+        self._thread = None
+        self.underruns = 0  # Ses thread'inin boş tampona denk geldiği çerçeveler
+        self.frames_read = 0
+
+    @property
+    def fill_level(self):
+        """Tamponun doluluk oranı (0-1)"""
+        return self._count / self.capacity
+
+    @property
+    def buffered_ms(self):
+        return self._count * 20
+
+    def start(self, stream):
+        self._thread = threading.Thread(target=self._fill, args=(stream,), name='sezar-pcm-reader', daemon=True)
+        self._thread.start()
+
+    def _fill(self, stream):
+        try:
+            while True:
+                with self._condition:
+                    while self._count == self.capacity and not self._stopped:
+                        self._condition.wait()
+                    if self._stopped:
+                        return
+                    slot = (self._head + self._count) % self.capacity
+                # Yuva okuyucuya henüz verilmediği için kilit dışında doldurulabilir
+                frame = self._view[slot * self.frame_size:(slot + 1) * self.frame_size]
+                filled = 0
+                while filled < self.frame_size:
+                    read = stream.readinto(frame[filled:])
+                    if not read:
+                        break
+                    filled += read
+                if filled:
+                    with self._condition:
+                        self._lengths[slot] = filled
+                        self._count += 1
+                        self._condition.notify_all()
+                if filled < self.frame_size:
+                    return
+        except (OSError, ValueError) as e:
+            # Süreç öldürülünce boru kapanır
+            if not self._stopped:
+                logger.warning(f"PCM okuma hatası: {e}")
+        finally:
+            with self._condition:
+                self._eof = True
+                self._condition.notify_all()
+
+    def pop(self):
+        """Sıradaki çerçeveyi döndürür; akış bittiyse b''"""
+        with self._condition:
+            if self._count == 0 and not self._eof:
+                if self.frames_read:  # İlk çerçeveyi beklemek başlangıç gecikmesidir, takılma değil
+                    self.underruns += 1
+                while self._count == 0 and not self._eof and not self._stopped:
+                    self._condition.wait()
+            if self._count == 0:
+                return b''
+            start = self._head * self.frame_size
+            data = bytes(self._view[start:start + self._lengths[self._head]])
+            self._head = (self._head + 1) % self.capacity
+            self._count -= 1
+            self.frames_read += 1
+            self._condition.notify_all()
+            return data
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+
+class TrackedAudio(discord.AudioSource):
+    """Oynatma konumunu duvar saatinden değil, gönderilen 20 ms'lik çerçeveleri sayarak izler.
+    Duraklatma, takılma ya da yavaş başlayan ffmpeg konumu kaydırmaz."""
+    FRAME_SECONDS = 0.02
+
+    def __init__(self, original, *, start=0.0, speed=1.0):
+        self.original = original
+        self.start = start
+        self.speed = speed
+        self.frames = 0
+        self._primed = None
+
+    @property
+    def position(self):
+        """Kaynak dosyadaki konum (saniye)"""
+        # Paylaşılan yayında geride kalan dinleyicinin atladığı çerçeveler de sayılır
+        frames = self.frames + getattr(self.original, 'skipped_frames', 0)
+        return self.start + frames * self.FRAME_SECONDS * self.speed
+
+    def prime(self):
+        """İlk çerçeveyi önceden okur (ffmpeg'in bağlanıp konuma gitmesini bekler); ses thread'i dışında çağrılır"""
+        self._primed = self.original.read()
+        return bool(self._primed)
+
+    def read(self):
+        if self._primed is not None:
+            data, self._primed = self._primed, None
+        else:
+            data = self.original.read()
+        if data:
+            self.frames += 1
+        return data
+
+    def is_opus(self):
+        return self.original.is_opus()
+
+    def cleanup(self):
+        self.original.cleanup()
+
+
+class ControlledOpusAudio(discord.FFmpegOpusAudio):
+    """stdin'i açık tutulan FFmpegOpusAudio. ffmpeg'in etkileşimli 'c' komutuyla filtre parametreleri
+    süreç yeniden başlatılmadan değiştirilebilir."""
+    def _spawn_process(self, args, **subprocess_kwargs):
+        subprocess_kwargs['stdin'] = subprocess.PIPE
+        return super()._spawn_process(args, **subprocess_kwargs)
+
+    def send_command(self, target, command, argument):
+        """Filtreye komut gönderir; süreç kapanmışsa False döndürür"""
+        process = getattr(self, '_process', None)
+        if not process or process.stdin is None or process.poll() is not None:
+            return False
+        try:
+            # Biçim: c<hedef> <zaman> <komut> <argüman>; zaman -1 ise komut hemen uygulanır
+            process.stdin.write(f"c{target} -1 {command} {argument}\n".encode())
+            process.stdin.flush()
+            return True
+        except (BrokenPipeError, OSError, ValueError):
+            return False
+
+    def set_volume(self, volume):
+        return self.send_command('volume@gain', 'volume', f"{volume:.3f}")
+
+    def cleanup(self):
+        process = getattr(self, '_process', None)
+        if process and process.stdin:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+        super().cleanup()
+
+
+def create_audio_source(url, *, executable='ffmpeg', bas=100, tizlik=100, speed=1.0, volume=1.0,
+                        source_codec=None, start=0.0):
+    """Ayarlara göre en ucuz çalma yolunu seçer; (kaynak, mod) döndürür.
+
+    - passthrough: WebM/Opus paketleri olduğu gibi kopyalanır, ne ffmpeg ne bot ses çözer/kodlar
+    - encode: tüm filtreler, ses düzeyi ve limiter ffmpeg içinde uygulanır, Opus'a da ffmpeg kodlar
+    Her iki durumda da botun ses thread'i sadece hazır Opus paketlerini gönderir.
+    start verilirse akış o saniyeden başlatılır. url yerel bir dosya da olabilir."""
+    before_options = input_options(url, start)
+
+    if can_passthrough(source_codec, bas, tizlik, speed, volume):
+        source = discord.FFmpegOpusAudio(url, codec='copy', executable=executable,
+                                         before_options=before_options, options='-vn')
+        return source, 'passthrough'
+
+    graph = ','.join(build_filter_graph(bas, tizlik, speed, volume))
+    logger.debug(f"FFmpeg filtre zinciri: {graph}")
+    # discord.py 'opus', 'libopus' ve 'copy' değerlerini -c:a copy'ye çevirir; filtre zinciri kopyalamayla
+    # birlikte kullanılamaz, libopus ile kodlama için codec verilmez
+    source = ControlledOpusAudio(url, codec=None, bitrate=OPUS_BITRATE, executable=executable,
+                                 before_options=before_options, options=f'-vn -af {graph}')
+    return source, 'encode'
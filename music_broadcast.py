@@ -0,0 +1,175 @@
+import collections
+import logging
+import os
+import threading
+
+import discord
+
+logger = logging.getLogger('sezar.music')
+
+# Yayının başı bu kadar süre bellekte tutulur; bu sürede gelen dinleyici şarkıyı baştan, paylaşarak dinler
+BROADCAST_HISTORY_MS = int(os.getenv('SEZAR_BROADCAST_HISTORY_MS', '10000'))
+# Geç gelen dinleyici: 'live' yayına o anki konumdan katılır, 'own' kendi kaynağıyla baştan başlar
+BROADCAST_LATE_JOIN = os.getenv('SEZAR_BROADCAST_LATE_JOIN', 'own')
+
+
+class Broadcast:
+    """Tek bir ses kaynağını (tek ffmpeg) birden fazla ses bağlantısına dağıtır. Her bağlantının ses
+    thread'i kendi imleciyle okur; bir çerçeveyi ilk isteyen onu kaynaktan çeker, diğerleri geçmişten alır.
+    Kaynaktan okuma ayrı bir kilitle sıraya girer; geçmiş ve sayaçlar sadece kısa süre kilitlenir, böylece
+    ağda takılan okuma geçmişten okuyan dinleyicileri ve yeni abonelikleri bekletmez."""
+    def __init__(self, key, source, history_frames, on_close=None):
+        self.key = key
+        self.source = source
+        self.opus = source.is_opus()
+        self.frames = collections.deque(maxlen=history_frames)
+        self.produced = 0  # Kaynaktan okunan toplam çerçeve
+        self.finished = False
+        self.closed = False  # Son dinleyici ayrıldı; ffmpeg kapatıldı ya da kapatılıyor
+        self.subscribers = 0
+        self.shared_frames = 0  # Kaynağa gitmeden geçmişten verilen çerçeveler
+        self._lock = threading.Lock()  # frames, produced, subscribers ve durum bayrakları
+        self._producer = threading.Lock()  # source.read() sadece bu kilitle çağrılır (cleanup hariç)
+        self._on_close = on_close
+
+    @property
+    def oldest(self):
+        """Geçmişte tutulan en eski çerçevenin sırası"""
+        return self.produced - len(self.frames)
+
+    def read_frame(self, index):
+        """(çerçeve, gerçek sıra) döndürür. İmleç geçmişin gerisinde kaldıysa en eski çerçeveye atlanır."""
+        fresh = False
+        while True:
+            with self._lock:
+                if index < self.produced:
+                    index = max(index, self.oldest)
+                    if not fresh:
+                        self.shared_frames += 1
+                    return self.frames[index - self.oldest], index
+                if self.finished or self.closed:
+                    return b'', index
+            with self._producer:
+                with self._lock:
+                    # Kilit beklenirken başka bir dinleyici bu çerçeveyi okumuş olabilir
+                    if index < self.produced or self.finished or self.closed:
+                        continue
+                try:
+                    data = self.source.read()
+                except Exception:
+                    # Son dinleyici ayrılırken ffmpeg okuma sürerken öldürülmüş olabilir
+                    if not self.closed:
+                        raise
+                    data = b''
+                with self._lock:
+                    if data:
+                        self.frames.append(data)
+                        self.produced += 1
+                        fresh = True
+                    else:
+                        self.finished = True
+
+    def subscribe(self, start_index):
+        """Yeni bir imleç döndürür; yayın kapandıysa ya da bittiyse None"""
+        with self._lock:
+            if self.closed or self.finished or self.subscribers <= 0:
+                return None
+            self.subscribers += 1
+        return BroadcastSubscriber(self, start_index)
+
+    def unsubscribe(self):
+        with self._lock:
+            self.subscribers -= 1
+            closing = self.subscribers <= 0 and not self.closed
+            if closing:
+                # Kapanmadan önce işaretlenir ki kimse ffmpeg'i kapatılan yayına katılmasın
+                self.closed = True
+        if closing:
+            if self._on_close is not None:
+                self._on_close(self)
+            # Son dinleyici de ayrıldı; ffmpeg kapatılır. Üretici kilidi beklenmez: ağda takılı bir okuma
+            # varsa süreç öldürülünce kendiliğinden döner
+            self.source.cleanup()
+            with self._lock:
+                self.frames.clear()
+
+
+class BroadcastSubscriber(discord.AudioSource):
+    """Bir ses bağlantısının yayındaki imleci"""
+    def __init__(self, broadcast, start_index):
+        self.broadcast = broadcast
+        self.start_index = start_index
+        self.cursor = start_index
+        self.skipped_frames = 0  # Geride kalınca atlanan çerçeveler; konum hesabında sayılır
+        self._closed = False
+
+    def read(self):
+        data, index = self.broadcast.read_frame(self.cursor)
+        if data:
+            self.skipped_frames += index - self.cursor
+            self.cursor = index + 1
+        return data
+
+    def is_opus(self):
+        return self.broadcast.opus
+
+    def cleanup(self):
+        if not self._closed:
+            self._closed = True
+            self.broadcast.unsubscribe()
+
+
+class BroadcastRegistry:
+    """(video ID, filtre zinciri, başlangıç konumu) anahtarıyla açık yayınlar. Aynı şarkı aynı ayarlarla
+    birden fazla sunucuda çalınırsa ses tek sefer indirilip kodlanır."""
+    def __init__(self, history_ms=BROADCAST_HISTORY_MS, late_join=BROADCAST_LATE_JOIN):
+        self.history_frames = max(1, history_ms // 20)
+        self.late_join = late_join
+        self.broadcasts = {}
+        self.started = 0
+        self.joined = 0  # Var olan bir yayına katılan dinleyiciler (tasarruf edilen ffmpeg süreçleri)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.broadcasts)
+
+    def subscribers(self):
+        return sum(broadcast.subscribers for broadcast in list(self.broadcasts.values()))
+
+    def shared_frames(self):
+        return sum(broadcast.shared_frames for broadcast in list(self.broadcasts.values()))
+
+    def subscribe(self, key, factory):
+        """Yayına katılır ya da factory() ile yenisini açar; (BroadcastSubscriber, ek bilgi) döndürür.
+        factory (kaynak, ek bilgi) döndürmelidir; katılınan yayında ek bilgi yayını açanınkidir.
+        Yayının başı geçmişten çıktıysa BROADCAST_LATE_JOIN'e göre canlıya katılınır ya da None döner."""
+        with self._lock:
+            entry = self.broadcasts.get(key)
+            if entry is not None and not (entry[0].finished or entry[0].closed):
+                broadcast, extra = entry
+                if broadcast.oldest == 0:
+                    # Baştan itibaren her şey hâlâ bellekte
+                    start = 0
+                elif self.late_join == 'live':
+                    start = max(broadcast.produced - 1, 0)
+                else:
+                    return None, None
+                # Biten, kapanan ya da dinleyicisi kalmayan yayına katılınmaz; yerine yenisi açılır
+                subscriber = broadcast.subscribe(start)
+                if subscriber is not None:
+                    self.joined += 1
+                    logger.info(f"Broadcast joined: {key[0]} ({broadcast.subscribers} dinleyici, çerçeve {start})")
+                    return subscriber, extra
+            source, extra = factory()
+            broadcast = Broadcast(key, source, self.history_frames, on_close=self._remove)
+            # İlk dinleyici doğrudan eklenir; subscribe() dinleyicisi olmayan yayını reddeder
+            broadcast.subscribers = 1
+            self.broadcasts[key] = (broadcast, extra)
+            self.started += 1
+            return BroadcastSubscriber(broadcast, 0), extra
+
+    def _remove(self, broadcast):
+        with self._lock:
+            entry = self.broadcasts.get(broadcast.key)
+            if entry is not None and entry[0] is broadcast:
+                del self.broadcasts[broadcast.key]
@@ -0,0 +1,322 @@
+import asyncio
+import collections
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from urllib.parse import urlparse, parse_qs
+
+logger = logging.getLogger('sezar.music')
+
+# Önbellekte saklanan alanlar; yt-dlp'nin döndürdüğü sözlüğün geri kalanı (formats, thumbnails...) atılır
+INFO_KEYS = ('id', 'title', 'thumbnail', 'duration', 'webpage_url', 'url',
+             'ext', 'acodec', 'abr', 'asr', 'http_headers')
+
+# Ses dosyası önbelleği: boşsa cog'un geçici klasörü kullanılır; Docker'da /app/data/... verilirse yeniden başlatmada korunur
+AUDIO_CACHE_DIR = os.getenv('SEZAR_AUDIO_CACHE_DIR', '')
+AUDIO_CACHE_MB = int(os.getenv('SEZAR_AUDIO_CACHE_MB', '512'))
+AUDIO_CACHE_AFTER_PLAYS = int(os.getenv('SEZAR_AUDIO_CACHE_AFTER_PLAYS', '2'))  # Bundan fazla çalınan şarkılar saklanır
+
+VIDEO_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{11}$')
+PLAYLIST_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{2,64}$')
+YOUTUBE_HOSTS = ('youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com')
+
+
+def video_id_from_url(link):
+    """YouTube linkinden 11 karakterlik video ID'sini çıkarır; tanınmazsa None"""
+    try:
+        parsed = urlparse(link)
+    except ValueError:
+        return None
+    host = (parsed.hostname or '').lower()
+    candidate = None
+    if host == 'youtu.be':
+        candidate = parsed.path.lstrip('/').split('/')[0]
+    elif host in YOUTUBE_HOSTS:
+        if parsed.path == '/watch':
+            candidate = parse_qs(parsed.query).get('v', [None])[0]
+        else:
+            parts = parsed.path.strip('/').split('/')
+            if len(parts) >= 2 and parts[0] in ('shorts', 'embed', 'live', 'v'):
+                candidate = parts[1]
+    if candidate and VIDEO_ID_PATTERN.match(candidate):
+        return candidate
+    return None
+
+
+def playlist_id_from_url(link):
+    """youtube.com/playlist?list=... linkinden liste ID'sini çıkarır. watch?v=...&list=... linkleri tek video sayılır."""
+    try:
+        parsed = urlparse(link)
+    except ValueError:
+        return None
+    if (parsed.hostname or '').lower() not in YOUTUBE_HOSTS or parsed.path.rstrip('/') != '/playlist':
+        return None
+    candidate = parse_qs(parsed.query).get('list', [None])[0]
+    if candidate and PLAYLIST_ID_PATTERN.match(candidate):
+        return candidate
+    return None
+
+
+def stream_url_expiry(url):
+    """googlevideo stream URL'sinin geçerlilik bitişini (epoch saniye) döndürür; bilinmiyorsa None"""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    value = parse_qs(parsed.query).get('expire', [None])[0]
+    if value is None:
+        # Manifest URL'lerinde parametreler yolun içinde /expire/<ts>/ şeklinde gelir
+        parts = parsed.path.split('/')
+        if 'expire' in parts:
+            index = parts.index('expire')
+            if index + 1 < len(parts):
+                value = parts[index + 1]
+    try:
+        return int(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def trim_info(info):
+    """yt-dlp bilgi sözlüğünden sadece çalma için gereken alanları bırakır"""
+    trimmed = {key: info[key] for key in INFO_KEYS if info.get(key) is not None}
+    if 'url' not in trimmed:
+        # Seçilen format üst seviyeye yazılmadıysa ilk sesli formatı kullan
+        for fmt in info.get('formats') or ():
+            if fmt.get('acodec') != 'none' and fmt.get('url'):
+                for key in ('url', 'ext', 'acodec', 'abr', 'asr', 'http_headers'):
+                    if fmt.get(key) is not None:
+                        trimmed[key] = fmt[key]
+                break
+    return trimmed
+
+
+class SongInfoCache:
+    """Video ID'ye göre LRU + TTL bilgi önbelleği.
+    Başlık gibi bilgiler uzun süre saklanır; stream URL'si ise expire= süresi dolmadan kısa süre
+    önce geçersiz sayılır ve sadece URL yeniden çözülür."""
+    def __init__(self, max_entries=256, ttl=6 * 3600, refresh_margin=300, default_stream_ttl=1800):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self.default_stream_ttl = default_stream_ttl  # expire= içermeyen URL'ler için
+        self.entries = collections.OrderedDict()  # video_id -> (kaydedilme zamanı, bilgi, URL bitişi)
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self.guild_stats = {}  # guild_id -> [isabet, ıska]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _count(self, guild_id, hit):
+        if guild_id is None:
+            return
+        stats = self.guild_stats.setdefault(guild_id, [0, 0])
+        stats[0 if hit else 1] += 1
+
+    def get(self, video_id, guild_id=None):
+        """(bilgi, durum) döndürür. Durum 'hit' (doğrudan kullanılabilir), 'refresh' (bilgi geçerli ama
+        stream URL'si yenilenmeli) veya 'miss' olur."""
+        now = time.time()
+        entry = self.entries.get(video_id)
+        if entry is None or now - entry[0] > self.ttl:
+            if entry is not None:
+                del self.entries[video_id]
+            self.misses += 1
+            self._count(guild_id, False)
+            return None, 'miss'
+
+        self.entries.move_to_end(video_id)
+        stored_at, info, url_expires = entry
+        if url_expires - now <= self.refresh_margin:
+            self.refreshes += 1
+            self._count(guild_id, False)
+            return dict(info), 'refresh'
+        self.hits += 1
+        self._count(guild_id, True)
+        return dict(info), 'hit'
+
+    def put(self, info):
+        """Bilgiyi kırpıp saklar ve kırpılmış kopyayı döndürür"""
+        trimmed = trim_info(info)
+        video_id = trimmed.get('id')
+        if not video_id:
+            return trimmed
+        now = time.time()
+        url_expires = stream_url_expiry(trimmed.get('url')) or now + self.default_stream_ttl
+        self.entries[video_id] = (now, trimmed, url_expires)
+        self.entries.move_to_end(video_id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return dict(trimmed)
+
+    def fresh(self, video_id):
+        """Kayıt doğrudan kullanılabilir mi; get()'ten farklı olarak sayaçlara ve LRU sırasına dokunmaz"""
+        entry = self.entries.get(video_id)
+        now = time.time()
+        return entry is not None and now - entry[0] <= self.ttl and entry[2] - now > self.refresh_margin
+
+    def stream_valid(self, video_id):
+        """Saklanan stream URL'si henüz kullanılabilir mi; expire= yoksa default_stream_ttl geçerlidir"""
+        entry = self.entries.get(video_id)
+        return entry is not None and entry[2] > time.time()
+
+    def hit_ratio(self):
+        total = self.hits + self.misses + self.refreshes
+        return self.hits / total if total else 0.0
+
+
+def normalize_query(text):
+    """Arama metnini önbellek anahtarına çevirir: büyük/küçük harf, aksan, noktalama ve boşluk farkları yok sayılır"""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch)).casefold()
+    text = text.replace('ı', 'i')  # Türkçe klavyesiz yazılan aramalar da aynı anahtara düşsün
+    text = ''.join(ch if ch.isalnum() else ' ' for ch in text)
+    return ' '.join(text.split())
+
+
+class SingleFlight:
+    """Aynı anahtar için eşzamanlı istekleri tek bir işte birleştirir; sonradan gelenler
+    devam eden işin sonucunu bekler. Bekleyenlerden biri iptal edilirse iş diğerleri için sürer."""
+    def __init__(self):
+        self.inflight = {}  # anahtar -> asyncio.Future
+        self.started = 0
+        self.coalesced = 0  # Birleştirilerek tasarruf edilen iş sayısı
+
+    async def run(self, key, factory):
+        future = self.inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.ensure_future(factory())
+            self.inflight[key] = future
+            self.started += 1
+            future.add_done_callback(lambda done, key=key: self._finish(key, done))
+        return await asyncio.shield(future)
+
+    def _finish(self, key, done):
+        if self.inflight.get(key) is done:
+            del self.inflight[key]
+        # Bekleyen kalmadıysa "exception was never retrieved" uyarısı çıkmasın
+        if not done.cancelled():
+            done.exception()
+
+
+class AudioFileCache:
+    """Sık çalınan şarkıların Ogg/Opus dosyaları. Dosyalar bir kez oluşturulur ve ağ ya da yt-dlp
+    olmadan çalınır; toplam boyut max_bytes'ı aşınca en uzun süredir çalınmayanlar silinir.
+    Her dosyanın yanında başlık/süre bilgisini tutan küçük bir .json dosyası bulunur."""
+    def __init__(self, directory, max_bytes=AUDIO_CACHE_MB * 1024 * 1024, after_plays=AUDIO_CACHE_AFTER_PLAYS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.after_plays = after_plays
+        self.entries = collections.OrderedDict()  # video_id -> dosya boyutu; en eski kullanılan başta
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.evictions = 0
+        self.transcoding = set()
+        self._lock = asyncio.Lock()  # Aynı anda tek dönüştürme; çalan şarkıların bant genişliğini paylaşmasın
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Kalıcı klasörde önceki çalışmadan kalan dosyaları son kullanım sırasıyla yükler"""
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.part'):
+                os.remove(path)
+            elif name.endswith('.ogg'):
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, video_id, size in sorted(files):
+            self.entries[video_id] = size
+            self.total_bytes += size
+        self._evict()
+
+    def _path(self, video_id, suffix='.ogg'):
+        return os.path.join(self.directory, video_id + suffix)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, video_id):
+        return video_id in self.entries
+
+    def lookup(self, video_id):
+        """Önbellekteyse çalınabilir bilgi sözlüğü (url yerel dosyadır), değilse None"""
+        size = self.entries.get(video_id)
+        if size is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(video_id)
+        self.hits += 1
+        self.bytes_served += size
+        path = self._path(video_id)
+        try:
+            os.utime(path)  # Son kullanım yeniden başlatmadan sonra da bilinsin
+            with open(self._path(video_id, '.json'), encoding='utf-8') as f:
+                meta = json.load(f)
+        except OSError:
+            meta = {}
+        return {**meta, 'id': video_id, 'url': path, 'acodec': 'opus', 'ext': 'ogg'}
+
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def should_cache(self, video_id, plays):
+        return plays > self.after_plays and video_id not in self.entries and video_id not in self.transcoding
+
+    async def store(self, info, executable):
+        """Stream URL'sinden Ogg/Opus dosyası oluşturur. Kaynak zaten Opus ise paketler yeniden kodlanmaz."""
+        video_id = info['id']
+        if video_id in self.entries or video_id in self.transcoding:
+            return False
+        self.transcoding.add(video_id)
+        part = self._path(video_id, '.part')
+        try:
+            async with self._lock:
+                codec = ['-c:a', 'copy'] if info.get('acodec') == 'opus' else ['-c:a', 'libopus', '-b:a', '128k']
+                process = await asyncio.create_subprocess_exec(
+                    executable, '-nostdin', '-loglevel', 'error',
+                    '-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5',
+                    '-i', info['url'], '-vn', '-map_metadata', '-1', *codec, '-f', 'ogg', part,
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
+                _, stderr = await process.communicate()
+                if process.returncode != 0:
+                    logger.warning(f"Ses önbelleği için dönüştürme başarısız ({video_id}): "
+                                   f"{stderr.decode('utf-8', errors='replace')[-300:]}")
+                    return False
+            with open(self._path(video_id, '.json'), 'w', encoding='utf-8') as f:
+                json.dump({key: info.get(key) for key in ('title', 'duration', 'thumbnail', 'webpage_url')}, f)
+            os.replace(part, self._path(video_id))
+            size = os.path.getsize(self._path(video_id))
+            self.entries[video_id] = size
+            self.total_bytes += size
+            self._evict()
+            logger.info(f"Ses önbelleğine eklendi: {video_id} ({size / 1024:.0f} KB)")
+            return True
+        finally:
+            self.transcoding.discard(video_id)
+            if os.path.exists(part):
+                os.remove(part)
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self.entries:
+            video_id, size = self.entries.popitem(last=False)
+            self.total_bytes -= size
+            self.evictions += 1
+            for suffix in ('.ogg', '.json'):
+                try:
+                    os.remove(self._path(video_id, suffix))
+                except OSError:
+                    # Windows'ta çalan dosya silinemez; bir sonraki başlatmada yeniden yüklenip değerlendirilir
+                    pass
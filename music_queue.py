@@ -0,0 +1,104 @@
+import asyncio
+import collections
+import random
+
+MAX_QUEUE_LENGTH = 100
+
+
+class QueuedTrack:
+    """Sıradaki bir şarkı ve çalınacağı ayarlar. info arka planda çözüldüğünde, source ise ffmpeg
+    önceden başlatıldığında dolar."""
+    def __init__(self, link, *, title=None, video_id=None, duration=None, requester=None, channel=None,
+                 volume=1.0, speed=1.0, bas=100, tizlik=100, info=None):
+        self.link = link
+        self.title = title or link
+        self.video_id = video_id
+        self.duration = duration
+        self.requester = requester
+        self.channel = channel  # Şarkı başladığında bilgi mesajının gideceği kanal
+        self.volume = volume
+        self.speed = speed
+        self.bas = bas
+        self.tizlik = tizlik
+        self.info = info
+        self.source = None  # Önceden başlatılmış ve ilk çerçevesi okunmuş kaynak (TrackedAudio)
+        self.mode = None
+
+    @property
+    def settings(self):
+        return {'volume': self.volume, 'speed': self.speed, 'bas': self.bas, 'tizlik': self.tizlik}
+
+    def discard_source(self):
+        """Önceden başlatılan ffmpeg sürecini kapatır"""
+        if self.source is not None:
+            self.source.cleanup()
+            self.source = None
+            self.mode = None
+
+
+class GuildQueue:
+    """Bir sunucunun çalma sırası. Çalan şarkı burada değil, YoutubeMusic.currently_playing'de tutulur."""
+    def __init__(self, max_length=MAX_QUEUE_LENGTH):
+        self.tracks = collections.deque()
+        self.max_length = max_length
+        self.prefetch_task = None  # Sıradaki şarkıyı hazırlayan görev
+        self.feeds = collections.deque()  # Sıraya tembel şarkı sağlayan çalma listeleri (async generator)
+        self.filling = False
+        self.tasks = set()  # Liste doldurma ve şarkı çözme görevleri; clear() ile iptal edilir
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def __iter__(self):
+        return iter(self.tracks)
+
+    def add(self, track):
+        """Şarkıyı sona ekler ve sırasını (1'den başlayarak) döndürür; sıra doluysa None"""
+        if len(self.tracks) >= self.max_length:
+            return None
+        self.tracks.append(track)
+        return len(self.tracks)
+
+    def peek(self):
+        return self.tracks[0] if self.tracks else None
+
+    def next(self):
+        return self.tracks.popleft() if self.tracks else None
+
+    def requeue(self, track):
+        """Sıradan alınıp çalınamayan şarkıyı yeniden başa koyar (sıra sınırına bakılmaz)"""
+        self.tracks.appendleft(track)
+
+    def remove(self, position):
+        """Verilen sıradaki (1'den başlayarak) şarkıyı çıkarır; yoksa None"""
+        if not 1 <= position <= len(self.tracks):
+            return None
+        track = self.tracks[position - 1]
+        del self.tracks[position - 1]
+        track.discard_source()
+        return track
+
+    def shuffle(self):
+        tracks = list(self.tracks)
+        random.shuffle(tracks)
+        self.tracks = collections.deque(tracks)
+
+    def spawn(self, coro):
+        """Sıraya bağlı arka plan görevi başlatır; görev bitene kadar referansı burada tutulur"""
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def clear(self):
+        for track in self.tracks:
+            track.discard_source()
+        self.tracks.clear()
+        self.feeds.clear()
+        if self.prefetch_task is not None:
+            self.prefetch_task.cancel()
+            self.prefetch_task = None
+        current = asyncio.current_task() if self.tasks else None
+        for task in list(self.tasks):
+            if task is not current:
+                task.cancel()
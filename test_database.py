@@ -0,0 +1,118 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = database.SQLiteStorage(str(tmp_path / 'bot.db'))
+    storage.start()
+    yield storage
+    storage.close()
+
+
+def user_version(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute('PRAGMA user_version').fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_readonly_storage_skips_migrations_and_writes(tmp_path):
+    path = str(tmp_path / 'bot.db')
+    storage = database.SQLiteStorage(path)
+    storage.start()
+    asyncio.run(storage.add_moderation_action(1, 2, 'warn', 'spam'))
+    storage.close()
+    conn = sqlite3.connect(path)
+    conn.execute(f'PRAGMA user_version={len(database.MIGRATIONS) - 1}')
+    conn.commit()
+    conn.close()
+
+    readonly = database.SQLiteStorage(path, readonly=True)
+    readonly.start()
+    try:
+        columns, rows = readonly.iter_export('moderation_actions', 1, 10)
+        assert len(list(rows)) == 1
+        with pytest.raises(RuntimeError):
+            readonly.db.submit_write(database._migrate)
+    finally:
+        readonly.close()
+    assert user_version(path) == len(database.MIGRATIONS) - 1
+
+
+def test_readonly_storage_does_not_create_a_missing_file(tmp_path):
+    path = tmp_path / 'missing.db'
+    with pytest.raises(sqlite3.OperationalError):
+        database.SQLiteStorage(str(path), readonly=True).start()
+    assert not path.exists()
+
+
+def test_warning_search_is_scoped_to_the_guild(storage):
+    async def scenario():
+        await storage.add_moderation_action(1, 10, 'warn', 'Küfürlü mesaj')
+        await storage.add_moderation_action(2, 20, 'warn', 'küfür ve spam')
+        await storage.add_moderation_action(1, 11, 'warn', 'spam')
+        return (await storage.search_moderation_actions(1, 'kufur', 10),
+                await storage.search_moderation_actions(2, 'SPAM', 10))
+
+    first, second = asyncio.run(scenario())
+    assert [row[1] for row in first] == [10]
+    assert '**Küfürlü**' in first[0][4]
+    assert [row[1] for row in second] == [20]
+
+
+def test_migrations_upgrade_a_baseline_database(tmp_path):
+    # İlk sürümün şeması ve verisi: user_version 0, moderation_actions'ta guild_id yok
+    path = str(tmp_path / 'bot.db')
+    conn = sqlite3.connect(path)
+    database._migration_initial_schema(conn)
+    conn.execute("INSERT INTO message_stats (user_id, message_count, last_active) VALUES (7, 42, '2024-01-01')")
+    conn.execute("INSERT INTO moderation_actions (user_id, action_type, reason) VALUES (7, 'warn', 'eski uyarı')")
+    conn.commit()
+    conn.close()
+
+    for _ in range(2):  # İkinci açılışta göç tekrar çalışmamalı
+        storage = database.SQLiteStorage(path)
+        storage.start()
+        try:
+            assert asyncio.run(storage.get_user_stats(7))[0] == 42
+        finally:
+            storage.close()
+    assert user_version(path) == database.MIGRATIONS[-1][0]
+
+    conn = sqlite3.connect(path)
+    try:
+        assert conn.execute('SELECT guild_id FROM moderation_actions').fetchall() == [(None,)]
+        # Mevcut kayıtlar FTS indeksine eklenmiş olmalı
+        assert conn.execute("SELECT rowid FROM moderation_fts WHERE moderation_fts MATCH 'eski'").fetchall() == [(1,)]
+    finally:
+        conn.close()
+
+
+def test_keyset_pagination_walks_every_action_once(storage):
+    async def scenario():
+        for i in range(25):
+            await storage.add_moderation_action(1, 5, 'warn', f'uyarı {i}')
+        await storage.add_moderation_action(1, 6, 'warn', 'başka kullanıcı')
+        await storage.add_moderation_action(2, 5, 'warn', 'başka sunucu')
+        pages = []
+        before = None
+        while True:
+            page = await storage.get_moderation_actions(1, 5, before, 10)
+            if not page:
+                break
+            pages.append(page)
+            before = (page[-1][3], page[-1][0])
+        return pages, await storage.count_moderation_actions(1, 5)
+
+    pages, count = asyncio.run(scenario())
+    assert [len(page) for page in pages] == [10, 10, 5]
+    ids = [row[0] for page in pages for row in page]
+    # Aynı saniyedeki kayıtlarda sıra action_id ile belirlenir
+    assert ids == sorted(ids, reverse=True) and len(set(ids)) == 25 == count
+    assert {row[2] for page in pages for row in page} == {f'uyarı {i}' for i in range(25)}
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from leaderboard import Leaderboard, RankIndex
+
+
+def test_rank_index_matches_a_sorted_list():
+    rng = random.Random(3)
+    index = RankIndex()
+    keys = []
+    for _ in range(2000):
+        if keys and rng.random() < 0.4:
+            key = keys.pop(rng.randrange(len(keys)))
+            index.remove(key)
+        else:
+            key = (rng.randrange(-50, 0), rng.randrange(10 ** 6))
+            if key in keys:
+                continue
+            keys.append(key)
+            index.insert(key)
+    keys.sort()
+    assert len(index) == len(keys)
+    assert index.first(len(keys) + 5) == keys
+    for key in keys[::7]:
+        assert index.count_less(key) == keys.index(key)
+
+
+def test_rank_index_remove_missing_key():
+    index = RankIndex()
+    index.insert((1, 1))
+    with pytest.raises(KeyError):
+        index.remove((2, 2))
+
+
+def test_leaderboard_ranks_and_ties():
+    leaderboard = Leaderboard.from_rows([(1, 10, 5), (1, 11, 9), (1, 12, 5), (2, 10, 100)])
+    assert leaderboard.top(1) == [(11, 9), (10, 5), (12, 5)]
+    assert leaderboard.rank(1, 12) == (2, 5, 3)  # Eşit sayılar aynı sırayı paylaşır
+    leaderboard.increment(1, 12, 10)
+    assert leaderboard.top(1, 1) == [(12, 15)]
+    assert leaderboard.rank(1, 11) == (2, 9, 3)
+    assert leaderboard.rank(1, 99) is None and leaderboard.top(3) == []
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+import pytest
+
+import database
+import maintenance
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = database.init_db(str(tmp_path / 'bot.db'), backend='sqlite')
+    yield storage
+    database.close_db()
+
+
+def add_action(storage, guild_id, days_ago):
+    def insert(conn):
+        conn.execute('''INSERT INTO moderation_actions (guild_id, user_id, action_type, reason, timestamp)
+                        VALUES (?, 1, 'warn', 'spam', datetime('now', ?))''', (guild_id, f'-{days_ago} days'))
+    storage.db.submit_write(insert).result()
+
+
+def count_actions(storage, guild_id):
+    return asyncio.run(storage.count_moderation_actions(guild_id, 1))
+
+
+def test_retention_policy_purges_in_batches(storage, monkeypatch):
+    monkeypatch.setattr(maintenance, 'PURGE_BATCH_SIZE', 2)
+    monkeypatch.setattr(maintenance, 'BATCH_PAUSE', 0)
+    for _ in range(5):
+        add_action(storage, 1, days_ago=40)
+    add_action(storage, 1, days_ago=5)
+    add_action(storage, 2, days_ago=40)  # Politikası olmayan sunucu (varsayılan: silme)
+    asyncio.run(database.set_retention_policy(1, 30, None))
+
+    report = asyncio.run(maintenance.run_maintenance([1, 2]))
+    assert report.finished
+    assert report.deleted['moderation_actions'] == 5
+    assert count_actions(storage, 1) == 1 and count_actions(storage, 2) == 1
+    # Silinen kayıtlar arama indeksinden de çıkmalı
+    assert len(asyncio.run(storage.search_moderation_actions(1, 'spam', 10))) == 1
+
+
+def test_expired_deadline_leaves_work_for_the_next_run(storage):
+    add_action(storage, 1, days_ago=40)
+    asyncio.run(database.set_retention_policy(1, 30, None))
+    report = asyncio.run(maintenance.run_maintenance([1], deadline=time.perf_counter()))
+    assert not report.finished
+    assert count_actions(storage, 1) == 1
+    assert 'süre doldu' in report.summary()
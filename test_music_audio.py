@@ -0,0 +1,176 @@
+import io
+import threading
+
+import discord
+import numpy as np
+import pytest
+
+import music_audio
+from music_audio import create_audio_source
+
+
+class FakeProcess:
+    """ffmpeg'i başlatmadan verilen argümanları yakalar"""
+    pid = 1
+
+    def __init__(self, args, **kwargs):
+        self.args = args
+        self.stdout = io.BytesIO()
+        self.stdin = io.BytesIO() if kwargs.get('stdin') is not None else None
+        self.returncode = 0
+
+    def poll(self):
+        return self.returncode
+
+    def kill(self):
+        pass
+
+    def wait(self, timeout=None):
+        return self.returncode
+
+    def communicate(self, timeout=None):
+        return b'', b''
+
+
+@pytest.fixture
+def spawned(monkeypatch):
+    processes = []
+
+    def spawn(self, args, **kwargs):
+        process = FakeProcess(args, **kwargs)
+        processes.append(process)
+        return process
+
+    monkeypatch.setattr(discord.FFmpegAudio, '_spawn_process', spawn)
+    return processes
+
+
+def codec_arg(args):
+    return args[args.index('-c:a') + 1]
+
+
+def test_passthrough_copies_opus_packets(spawned):
+    source, mode = create_audio_source('https://example.com/a.webm', source_codec='opus')
+    args = spawned[0].args
+    assert mode == 'passthrough'
+    assert codec_arg(args) == 'copy'
+    assert '-af' not in args
+    assert '-reconnect' in args
+    source.cleanup()
+
+
+@pytest.mark.parametrize('settings', [
+    {'source_codec': 'opus', 'volume': 0.5},
+    {'source_codec': 'aac'},
+    {'source_codec': 'opus', 'bas': 200, 'tizlik': 50, 'speed': 1.25},
+])
+def test_encode_uses_libopus_with_filter_graph(spawned, settings):
+    source, mode = create_audio_source('/tmp/a.webm', **settings)
+    args = spawned[0].args
+    assert mode == 'encode'
+    # Filtre zinciri -c:a copy ile birlikte kullanılamaz
+    assert codec_arg(args) == 'libopus'
+    graph = args[args.index('-af') + 1]
+    assert 'volume@gain' in graph and graph.endswith(music_audio.LIMITER)
+    assert '-reconnect' not in args  # Yerel dosya
+    assert isinstance(source, music_audio.ControlledOpusAudio)
+    source.cleanup()
+
+
+def test_live_volume_is_sent_to_the_gain_filter(spawned):
+    source, _ = create_audio_source('/tmp/a.webm', source_codec='opus', volume=0.5)
+    process = spawned[0]
+    process.returncode = None  # Süreç çalışıyor
+    assert source.set_volume(3.0)
+    assert process.stdin.getvalue() == b'cvolume@gain -1 volume 3.000\n'
+    process.returncode = 0
+    assert not source.set_volume(1.0)  # Süreç kapandıysa komut gönderilmez
+
+
+def test_start_offset_seeks_before_input(spawned):
+    create_audio_source('/tmp/a.webm', source_codec='aac', start=12.5)
+    args = spawned[0].args
+    assert args.index('-ss') < args.index('-i')
+    assert args[args.index('-ss') + 1] == '12.500'
+
+
+def reference_biquads(bands, samples):
+    """Biquad'ları örnek örnek uygulayan (direct form I) karşılaştırma filtresi"""
+    output = samples.astype(np.float64)
+    for band in bands:
+        b, a = music_audio.biquad_coefficients(*band)
+        filtered = np.zeros_like(output)
+        for channel in range(output.shape[1]):
+            x1 = x2 = y1 = y2 = 0.0
+            for i, x in enumerate(output[:, channel]):
+                y = b[0] * x + b[1] * x1 + b[2] * x2 - a[1] * y1 - a[2] * y2
+                x2, x1, y2, y1 = x1, x, y1, y
+                filtered[i, channel] = y
+        output = filtered
+    return output
+
+
+@pytest.mark.parametrize('bas, tizlik', [(150, 100), (100, 40), (60, 180)])
+def test_block_equalizer_matches_sample_by_sample_filter(bas, tizlik):
+    bands = music_audio.eq_bands(bas, tizlik)
+    equalizer = music_audio.BlockEqualizer(bands, frame_samples=64)
+    samples = np.random.default_rng(1).uniform(-0.3, 0.3, (64 * 4, 2)).astype(np.float32)
+    state = equalizer.new_state()
+    frames = []
+    for start in range(0, len(samples), 64):
+        output, state = equalizer.process(samples[start:start + 64], state)
+        frames.append(output)
+    # Durum çerçeveler arasında taşındığı için sınırlarda süreksizlik olmamalı
+    np.testing.assert_allclose(np.concatenate(frames), reference_biquads(bands, samples), atol=1e-3)
+
+
+def test_block_equalizer_without_bands_is_identity():
+    equalizer = music_audio.BlockEqualizer([])
+    samples = np.ones((music_audio.FRAME_SAMPLES, 2), dtype=np.float32)
+    output, state = equalizer.process(samples, equalizer.new_state())
+    assert equalizer.order == 0 and output is samples
+
+
+def test_soft_limit_only_touches_samples_above_threshold():
+    samples = np.array([0.5, -0.9, 0.97, -1.0, 3.0], dtype=np.float32)
+    limited = music_audio.soft_limit(samples.copy())
+    assert limited[0] == 0.5 and limited[1] == pytest.approx(-0.9)
+    assert 0.95 < limited[2] < 0.97 and -1.0 < limited[3] < -0.95
+    assert limited[4] <= 1.0
+
+
+def test_ring_buffer_returns_frames_in_order_and_short_tail():
+    frame = 8
+    data = bytes(range(frame * 5 + 3))
+    buffer = music_audio.PCMRingBuffer(frame_size=frame, buffer_ms=40)  # İki yuva: yazar okuyucuyu bekler
+    buffer.start(io.BytesIO(data))
+    frames = []
+    while True:
+        chunk = buffer.pop()
+        if not chunk:
+            break
+        frames.append(chunk)
+    assert b''.join(frames) == data
+    assert [len(chunk) for chunk in frames] == [frame] * 5 + [3]
+    assert buffer.frames_read == 6
+
+
+def test_ring_buffer_stop_releases_a_waiting_reader():
+    class SilentStream:
+        def __init__(self):
+            self.release = threading.Event()
+
+        def readinto(self, view):
+            self.release.wait()
+            return 0
+
+    stream = SilentStream()
+    buffer = music_audio.PCMRingBuffer(frame_size=8, buffer_ms=40)
+    buffer.start(stream)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(buffer.pop()), daemon=True)
+    reader.start()
+    buffer.stop()
+    reader.join(1)
+    stream.release.set()
+    assert result == [b'']
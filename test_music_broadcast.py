@@ -0,0 +1,116 @@
+import threading
+import time
+
+from music_broadcast import BroadcastRegistry
+
+KEY = ('abcdefghijk', 'copy', 0.0)
+
+
+class FakeSource:
+    """Sıralı çerçeveler üretir; stall verilirse o çerçevede cleanup() çağrılana kadar bekler"""
+    def __init__(self, frames=100, stall=None):
+        self.frames = frames
+        self.stall = stall
+        self.reads = 0
+        self.killed = threading.Event()
+
+    def read(self):
+        if self.reads == self.stall:
+            self.killed.wait()
+        if self.killed.is_set() or self.reads >= self.frames:
+            return b''
+        self.reads += 1
+        return self.reads.to_bytes(4, 'big')
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        self.killed.set()
+
+
+def opener(source):
+    return lambda: (source, 'passthrough')
+
+
+def test_followers_share_one_source():
+    source = FakeSource(frames=50)
+    registry = BroadcastRegistry(history_ms=2000)
+    first, _ = registry.subscribe(KEY, opener(source))
+    second, mode = registry.subscribe(KEY, opener(FakeSource()))
+    assert mode == 'passthrough' and registry.joined == 1
+    first_frames = [first.read() for _ in range(50)]
+    second_frames = [second.read() for _ in range(50)]
+    assert first_frames == second_frames and source.reads == 50
+    assert first.read() == b'' and second.read() == b''
+
+
+def test_late_join_policy():
+    source = FakeSource(frames=500)
+    registry = BroadcastRegistry(history_ms=200, late_join='own')  # 10 çerçeve geçmiş
+    first, _ = registry.subscribe(KEY, opener(source))
+    for _ in range(30):
+        first.read()
+    assert registry.subscribe(KEY, opener(FakeSource())) == (None, None)
+    registry.late_join = 'live'
+    live, _ = registry.subscribe(KEY, opener(FakeSource()))
+    assert live.start_index == 29 and live.read() == (30).to_bytes(4, 'big')
+
+
+def test_lagging_subscriber_skips_to_oldest_frame():
+    registry = BroadcastRegistry(history_ms=200)
+    leader, _ = registry.subscribe(KEY, opener(FakeSource(frames=100)))
+    follower, _ = registry.subscribe(KEY, opener(FakeSource()))
+    for _ in range(40):
+        leader.read()
+    assert follower.read() == (31).to_bytes(4, 'big')
+    assert follower.skipped_frames == 30
+
+
+def test_last_unsubscribe_closes_and_refuses_new_subscribers():
+    source = FakeSource()
+    registry = BroadcastRegistry()
+    only, _ = registry.subscribe(KEY, opener(source))
+    broadcast = only.broadcast
+    only.cleanup()
+    assert source.killed.is_set() and len(registry) == 0
+    assert broadcast.subscribe(0) is None
+    replacement, _ = registry.subscribe(KEY, opener(FakeSource()))
+    assert replacement.broadcast is not broadcast
+
+
+def test_cleanup_does_not_wait_for_a_stalled_read():
+    source = FakeSource(stall=3)
+    registry = BroadcastRegistry()
+    subscriber, _ = registry.subscribe(KEY, opener(source))
+    for _ in range(3):
+        subscriber.read()
+    results = []
+    reader = threading.Thread(target=lambda: results.append(subscriber.read()), daemon=True)
+    reader.start()
+    time.sleep(0.05)
+    # Oynatıcı kaynak değiştirirken eski kaynağı event loop'tan kapatır; okuma hâlâ takılı
+    closer = threading.Thread(target=subscriber.cleanup, daemon=True)
+    closer.start()
+    closer.join(0.5)
+    assert not closer.is_alive()
+    reader.join(1)
+    assert results == [b'']
+
+
+def test_history_reads_do_not_wait_for_the_producer():
+    source = FakeSource(stall=5)
+    registry = BroadcastRegistry(history_ms=2000)
+    leader, _ = registry.subscribe(KEY, opener(source))
+    follower, _ = registry.subscribe(KEY, opener(FakeSource()))
+    for _ in range(5):
+        leader.read()
+    stalled = threading.Thread(target=leader.read, daemon=True)
+    stalled.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    assert [follower.read() for _ in range(5)] == [i.to_bytes(4, 'big') for i in range(1, 6)]
+    assert registry.subscribe(KEY, opener(FakeSource()))[0] is not None
+    assert time.perf_counter() - started < 0.5
+    source.cleanup()
+    stalled.join(1)
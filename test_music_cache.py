@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+
+from music_cache import SingleFlight, SongInfoCache, stream_url_expiry
+
+
+def info(video_id, url):
+    return {'id': video_id, 'title': 'Şarkı', 'url': url}
+
+
+def test_stream_url_expiry_from_query_and_path():
+    assert stream_url_expiry('https://r1.googlevideo.com/videoplayback?expire=1700000000&id=x') == 1700000000
+    assert stream_url_expiry('https://manifest.googlevideo.com/api/manifest/expire/1700000000/ei/x') == 1700000000
+    assert stream_url_expiry('https://example.com/a.webm') is None
+
+
+def test_refresh_before_expire_and_hit_otherwise():
+    cache = SongInfoCache(refresh_margin=300)
+    now = int(time.time())
+    cache.put(info('soon', f'https://x/videoplayback?expire={now + 60}'))
+    cache.put(info('later', f'https://x/videoplayback?expire={now + 3600}'))
+    assert cache.get('soon')[1] == 'refresh'
+    assert cache.get('later')[1] == 'hit'
+    assert cache.get('missing') == (None, 'miss')
+    assert (cache.hits, cache.misses, cache.refreshes) == (1, 1, 1)
+
+
+def test_info_ttl_drops_entry(monkeypatch):
+    cache = SongInfoCache(ttl=10)
+    cache.put(info('a', 'https://x/a.webm'))
+    stored = time.time()
+    monkeypatch.setattr(time, 'time', lambda: stored + 11)
+    assert cache.get('a') == (None, 'miss')
+    assert len(cache) == 0
+
+
+def test_stream_valid_uses_default_ttl_without_expire(monkeypatch):
+    cache = SongInfoCache(default_stream_ttl=1800)
+    cache.put(info('a', 'https://x/a.webm'))
+    stored = time.time()
+    assert cache.stream_valid('a')
+    monkeypatch.setattr(time, 'time', lambda: stored + 1801)
+    assert not cache.stream_valid('a')
+    assert not cache.stream_valid('missing')
+
+
+def test_lru_eviction():
+    cache = SongInfoCache(max_entries=2)
+    for video_id in 'abc':
+        cache.put(info(video_id, 'https://x/a.webm'))
+    assert list(cache.entries) == ['b', 'c'] and cache.evictions == 1
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+        release = asyncio.Event()
+
+        async def work():
+            calls.append(1)
+            await release.wait()
+            return 'bilgi'
+
+        waiters = [asyncio.create_task(flight.run('a', work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert results == ['bilgi'] * 3 and len(calls) == 1
+    assert (flight.started, flight.coalesced) == (1, 2) and not flight.inflight
+
+
+def test_single_flight_survives_a_cancelled_waiter_and_propagates_errors():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return 'bilgi'
+
+        first = asyncio.create_task(flight.run('a', work))
+        second = asyncio.create_task(flight.run('a', work))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        assert await second == 'bilgi'
+
+        async def fail():
+            raise ValueError('yok')
+
+        with pytest.raises(ValueError):
+            await flight.run('b', fail)
+        return flight
+
+    flight = asyncio.run(scenario())
+    assert not flight.inflight
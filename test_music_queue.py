@@ -0,0 +1,80 @@
+import asyncio
+
+from music_queue import GuildQueue, QueuedTrack
+
+
+class FakeSource:
+    def __init__(self):
+        self.cleaned = False
+
+    def cleanup(self):
+        self.cleaned = True
+
+
+def track(name):
+    return QueuedTrack(f'https://www.youtube.com/watch?v={name}', title=name)
+
+
+def test_add_respects_max_length_and_requeue_ignores_it():
+    queue = GuildQueue(max_length=2)
+    assert queue.add(track('a')) == 1
+    assert queue.add(track('b')) == 2
+    assert queue.add(track('c')) is None
+    first = queue.next()
+    queue.requeue(first)
+    queue.requeue(track('x'))
+    assert [t.title for t in queue] == ['x', 'a', 'b']
+
+
+def test_remove_discards_the_prepared_source():
+    queue = GuildQueue()
+    queue.add(track('a'))
+    removed = queue.add(track('b')) and queue.tracks[1]
+    removed.source = source = FakeSource()
+    assert queue.remove(3) is None
+    assert queue.remove(2) is removed
+    assert source.cleaned and removed.source is None
+    assert [t.title for t in queue] == ['a']
+
+
+def test_clear_cancels_spawned_tasks():
+    async def scenario():
+        queue = GuildQueue()
+        started = asyncio.Event()
+
+        async def fill():
+            started.set()
+            await asyncio.sleep(3600)
+
+        async def done():
+            return 'ok'
+
+        finished = queue.spawn(done())
+        pending = queue.spawn(fill())
+        await started.wait()
+        assert await finished == 'ok'
+        await asyncio.sleep(0)  # Tamamlanma geri çağrısı
+        assert queue.tasks == {pending}
+        queue.add(track('a'))
+        queue.feeds.append(object())
+        queue.clear()
+        await asyncio.gather(pending, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert pending.cancelled()
+        assert not queue.tasks and not queue.feeds and len(queue) == 0
+
+    asyncio.run(scenario())
+
+
+def test_clear_from_a_spawned_task_does_not_cancel_itself():
+    async def scenario():
+        queue = GuildQueue()
+
+        async def stop():
+            queue.clear()
+            await asyncio.sleep(0)
+            return 'stopped'
+
+        assert await queue.spawn(stop()) == 'stopped'
+
+    asyncio.run(scenario())
@@ -0,0 +1,55 @@
+import asyncio
+
+from cogs import statistics
+from cogs.statistics import MessageStatsBuffer
+
+
+def test_failed_flush_restores_counters_and_merges_new_messages(monkeypatch):
+    batches = []
+    fail = [True]
+
+    async def apply(rows, activity_rows, guild_rows):
+        if fail[0]:
+            raise RuntimeError('disk dolu')
+        batches.append((sorted(rows), sorted(activity_rows), sorted(guild_rows)))
+
+    monkeypatch.setattr(statistics, 'apply_message_stats_batch', apply)
+
+    async def scenario():
+        buffer = MessageStatsBuffer(max_pending=1000)
+        buffer.add(1, '2024-01-01 10:00:00', guild_id=9, channel_id=3, bucket=100)
+        buffer.add(1, '2024-01-01 10:05:00', guild_id=9, channel_id=3, bucket=100)
+        await buffer.flush()
+        assert buffer.failed_flushes == 1 and buffer.pending_messages == 2
+        # Başarısız yazmadan sonra gelen mesajlar geri eklenen sayaçlarla birleşir
+        buffer.add(1, '2024-01-01 10:01:00', guild_id=9, channel_id=3, bucket=100)
+        buffer.add(2, '2024-01-01 10:02:00')
+        fail[0] = False
+        await buffer.flush()
+        return buffer
+
+    buffer = asyncio.run(scenario())
+    assert buffer.pending == {} and buffer.activity == {} and buffer.pending_messages == 0
+    assert buffer.flushed_messages == 4 and buffer.flush_count == 1
+    rows, activity_rows, guild_rows = batches[0]
+    assert rows == [(1, 3, '2024-01-01 10:05:00'), (2, 1, '2024-01-01 10:02:00')]
+    assert activity_rows == [(9, 'channel', 3, 100, 3), (9, 'guild', 0, 100, 3), (9, 'user', 1, 100, 3)]
+    assert guild_rows == [(9, 1, 3)]
+
+
+def test_threshold_triggers_a_flush(monkeypatch):
+    batches = []
+
+    async def apply(rows, activity_rows, guild_rows):
+        batches.append(rows)
+
+    monkeypatch.setattr(statistics, 'apply_message_stats_batch', apply)
+
+    async def scenario():
+        buffer = MessageStatsBuffer(max_pending=2)
+        for user_id in range(2):
+            buffer.add(user_id, '2024-01-01 10:00:00')
+        await buffer._flush_task
+
+    asyncio.run(scenario())
+    assert len(batches) == 1 and len(batches[0]) == 2
@@ -0,0 +1,60 @@
+import yt_dlp as youtube_dl
+from yt_dlp.extractor.common import InfoExtractor
+
+from ytdl_pool import PlaylistCursor, YDL_PROFILES
+
+PAGE = 10  # Sahte listenin devam sayfası boyutu
+
+
+class FakePlaylistIE(InfoExtractor):
+    """YouTube gibi girdileri zincirleme devam sayfalarıyla üreten sahte liste"""
+    _VALID_URL = r'https://fake\.invalid/list'
+    IE_NAME = 'fakeplaylist'
+    fetches = []
+
+    def _real_extract(self, url):
+        def entries():
+            for page in range(3):
+                FakePlaylistIE.fetches.append(page)
+                for i in range(PAGE):
+                    n = page * PAGE + i
+                    yield self.url_result(f'https://www.youtube.com/watch?v=video{n:06d}', 'Youtube',
+                                          f'video{n:06d}', f'Şarkı {n}', duration=n)
+        return self.playlist_result(entries(), 'fake', 'Sahte liste')
+
+
+def fake_factory(options):
+    ydl = youtube_dl.YoutubeDL(options)
+    ydl._ies = {'fakeplaylist': FakePlaylistIE(ydl), **ydl._ies}
+    ydl._ies_instances['fakeplaylist'] = ydl._ies['fakeplaylist']
+    return ydl
+
+
+def test_cursor_fetches_each_continuation_once():
+    FakePlaylistIE.fetches = []
+    options = {**YDL_PROFILES['playlist'], 'cachedir': False}
+    cursor = PlaylistCursor('https://fake.invalid/list', options, factory=fake_factory)
+    pages = []
+    while True:
+        tracks, consumed = cursor.next_page(7)
+        pages.append(tracks)
+        # Sadece okunan kayıtları kapsayan devam sayfaları indirilir
+        assert FakePlaylistIE.fetches == list(range(min(3, (7 * len(pages)) // PAGE + 1)))
+        if consumed < 7:
+            break
+    ids = [video_id for page in pages for video_id, _, _ in page]
+    assert ids == [f'video{n:06d}' for n in range(3 * PAGE)]
+    assert pages[0][1] == ('video000001', 'Şarkı 1', 1)
+    assert FakePlaylistIE.fetches == [0, 1, 2]
+    assert cursor.exhausted and cursor._ydl is None
+    assert cursor.next_page(7) == ([], 0)
+
+
+def test_cursor_does_not_touch_shared_options():
+    options = {**YDL_PROFILES['playlist'], 'cachedir': False}
+    cursor = PlaylistCursor('https://fake.invalid/list', options, factory=fake_factory)
+    cursor.next_page(5)
+    assert 'playlist_items' not in cursor._ydl.params
+    assert 'playlist_items' not in YDL_PROFILES['playlist']
+    cursor.close()
+    assert cursor._ydl is None and cursor.next_page(5) == ([], 0)
@@ -0,0 +1,262 @@
+import asyncio
+import collections
+import functools
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import yt_dlp as youtube_dl
+
+import database
+from music_cache import trim_info, video_id_from_url, VIDEO_ID_PATTERN
+
+logger = logging.getLogger('sezar.music')
+
+# İmza/nsig çözümleri ve player JS burada saklanır; Docker'da bot-data volume'ünde kalır
+YTDL_CACHE_DIR = os.getenv('SEZAR_YTDL_CACHE_DIR', os.path.join(os.path.dirname(database.DB_PATH) or '.', 'yt-dlp-cache'))
+# 'process' ile çözümleme ayrı süreçlerde yapılır ve GIL'i event loop ile paylaşmaz
+YTDL_BACKEND = os.getenv('SEZAR_YTDL_BACKEND', 'thread')
+
+BASE_OPTIONS = {
+    'quiet': True,
+    'no_warnings': True,
+    'noplaylist': True,
+    'default_search': 'auto',
+    'source_address': '0.0.0.0',
+    'geo_bypass': True,
+    'nocheckcertificate': True,
+    'cachedir': YTDL_CACHE_DIR,
+}
+
+# Her profil için ayrı YoutubeDL örneği tutulur; seçenekler örnek oluşturulduktan sonra değişmez
+YDL_PROFILES = {
+    # WebM/Opus tercih edilir; bu akışlar yeniden kodlanmadan Discord'a aktarılabilir
+    'info': {**BASE_OPTIONS, 'format': 'bestaudio[acodec=opus]/bestaudio[ext=webm]/bestaudio[ext=m4a]/bestaudio/best',
+             'ignoreerrors': False},
+    # Düz (flat) çıkarım: arama sonuçları listelenir, formatlar sadece seçilen video için çözülür
+    'search': {**BASE_OPTIONS, 'extract_flat': 'in_playlist'},
+    # Çalma listeleri düz ve tembel listelenir; videolar sırası yaklaştıkça 'info' ile çözülür
+    'playlist': {**BASE_OPTIONS, 'noplaylist': False, 'extract_flat': 'in_playlist', 'lazy_playlist': True},
+}
+
+
+def create_youtube_dl(options):
+    ydl = youtube_dl.YoutubeDL(options)
+    # Extractor sınıfları ilk kullanımda yüklenir; bu maliyet işçi başlarken ödenir
+    ydl.get_info_extractor('Youtube')
+    ydl.get_info_extractor('YoutubeSearch')
+    return ydl
+
+
+# İşçi tarafı: her işçi thread'i ya da süreci kendi örneklerini burada tutar
+_worker = threading.local()
+
+def _init_worker(profiles, factory, max_uses):
+    _worker.profiles = profiles
+    _worker.factory = factory
+    _worker.max_uses = max_uses
+    _worker.instances = {}
+    for profile in profiles:
+        _worker_instance(profile)
+
+def _worker_instance(profile):
+    entry = _worker.instances.get(profile)
+    if entry is None or entry[1] >= _worker.max_uses:
+        # Çerez kavanozu ve önbellekler sınırsız büyümesin diye örnek belirli kullanımdan sonra yenilenir
+        if entry is not None:
+            entry[0].close()
+        entry = _worker.instances[profile] = [_worker.factory(_worker.profiles[profile]), 0]
+    entry[1] += 1
+    return entry[0]
+
+def _run_task(profile, fn, args):
+    try:
+        return fn(_worker_instance(profile), *args)
+    except youtube_dl.utils.DownloadError as e:
+        # exc_info içindeki traceback süreçler arasında taşınamaz; sadece mesaj korunur
+        raise youtube_dl.utils.DownloadError(str(e)) from None
+
+def _ping():
+    return os.getpid()
+
+
+# Görevler modül seviyesinde tanımlanır ki süreç havuzuna gönderilebilsin; sonuçlar küçük ve picklable'dır
+def extract_song_info(ydl, url, **kwargs):
+    info = ydl.extract_info(url, download=False, **kwargs)
+    return trim_info(info) if info else None
+
+def search_candidates(ydl, search_url, limit=5):
+    """Arama sonuçlarını çözmeden [(video_id, başlık, süre)] döndürür ('search' profiliyle çağrılmalı)"""
+    search_results = ydl.extract_info(search_url, download=False)
+    candidates = []
+    for entry in (search_results or {}).get('entries') or ():
+        # Kanal ve oynatma listesi sonuçları atlanır
+        video_id = entry.get('id') or video_id_from_url(entry.get('url') or '')
+        if video_id and VIDEO_ID_PATTERN.match(video_id):
+            candidates.append((video_id, entry.get('title'), entry.get('duration')))
+            if len(candidates) >= limit:
+                break
+    return candidates
+
+
+class PlaylistCursor:
+    """Bir çalma listesinin tembel girdi akışı; sayfalar kaldığı yerden okunur. YouTube listeleri zincirleme
+    devam sayfalarından oluştuğu için baştan yeniden okumak her seferinde önceki sayfaları da indirirdi;
+    akış açık tutulduğunda her devam sayfası bir kez indirilir.
+    Akış kendi YoutubeDL örneğine bağlıdır (havuzdaki örnekler paylaşılmaz, seçenekleri değiştirilmez);
+    next_page engelleyicidir, event loop dışında çağrılmalıdır."""
+    def __init__(self, url, options=None, factory=create_youtube_dl):
+        self.url = url
+        self.options = options or YDL_PROFILES['playlist']
+        self.factory = factory
+        self.position = 0  # Okunan toplam kayıt
+        self.exhausted = False
+        self._ydl = None
+        self._entries = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self._ydl = self.factory(self.options)
+        result = self._ydl.extract_info(self.url, download=False, process=False)
+        # Bazı bağlantılar asıl listeye yönlendirir
+        for _ in range(3):
+            if not result or result.get('_type') not in ('url', 'url_transparent'):
+                break
+            result = self._ydl.extract_info(result['url'], download=False, process=False, ie_key=result.get('ie_key'))
+        self._entries = iter((result or {}).get('entries') or ())
+
+    def next_page(self, count):
+        """Sonraki en fazla count kaydı çözmeden listeler. ([(video_id, başlık, süre)], okunan kayıt sayısı)
+        döndürür; okunan sayı count'tan azsa liste bitmiştir ve akış kapatılır."""
+        with self._lock:
+            if self.exhausted:
+                return [], 0
+            if self._entries is None:
+                self._open()
+            tracks = []
+            consumed = 0
+            for entry in itertools.islice(self._entries, count):
+                consumed += 1
+                # Silinmiş/gizli videolar ve video olmayan girdiler atlanır
+                video_id = (entry or {}).get('id') or video_id_from_url((entry or {}).get('url') or '')
+                if video_id and VIDEO_ID_PATTERN.match(video_id):
+                    tracks.append((video_id, entry.get('title'), entry.get('duration')))
+            self.position += consumed
+            if consumed < count:
+                self.exhausted = True
+                self._close()
+            return tracks, consumed
+
+    def _close(self):
+        self._entries = None
+        if self._ydl is not None:
+            self._ydl.close()
+            self._ydl = None
+
+    def close(self):
+        with self._lock:
+            self.exhausted = True
+            self._close()
+
+
+class YoutubeDLPool:
+    """Uzun ömürlü YoutubeDL örnekleri. YoutubeDL thread-safe olmadığı için her işçi (thread ya da
+    süreç) her profil için kendi örneğine sahiptir. Aynı anda en fazla workers iş çalışır; bekleyen
+    işler sunucu bazında kuyruklanır ve sunucular arasında sırayla dağıtılır, böylece tek bir
+    sunucunun art arda istekleri diğerlerini bekletmez.
+    background=True ile gönderilen düşük öncelikli işler sadece bekleyen kullanıcı isteği yokken ve
+    en az bir işçi boşta kalacak şekilde, aynı anda en fazla bir tane çalışır."""
+    def __init__(self, profiles=None, workers=3, max_uses=500, backend=None, factory=create_youtube_dl):
+        self.profiles = profiles or YDL_PROFILES
+        self.workers = workers
+        self.backend = backend or YTDL_BACKEND
+        initargs = (self.profiles, factory, max_uses)
+        if self.backend == 'process':
+            # fork, botun açık thread'lerini ve soketlerini kopyalar; temiz süreçler için spawn kullanılır
+            self._executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                                 initializer=_init_worker, initargs=initargs)
+        elif self.backend == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sezar-ytdl',
+                                                initializer=_init_worker, initargs=initargs)
+        else:
+            raise ValueError(f"Bilinmeyen YoutubeDL arka ucu: {self.backend}")
+        self._queues = {}  # guild_id -> bekleyen işler
+        self._rotation = collections.deque()  # Sırası gelen sunucular
+        self._background = collections.deque()  # Düşük öncelikli bekleyen işler
+        self.active = 0
+        self.background_active = 0
+        self.calls = 0
+
+    def queued(self):
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def run(self, profile, fn, *args, guild_id=None, background=False):
+        """fn(ydl, *args) çağrısını bir işçide, o işçinin profil örneğiyle çalıştırır"""
+        future = asyncio.get_running_loop().create_future()
+        if background:
+            self._background.append((future, profile, fn, args))
+            self._dispatch()
+            return await future
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = collections.deque()
+            self._rotation.append(guild_id)
+        queue.append((future, profile, fn, args))
+        self._dispatch()
+        return await future
+
+    def _dispatch(self):
+        while self.active < self.workers and self._rotation:
+            guild_id = self._rotation.popleft()
+            queue = self._queues[guild_id]
+            future, profile, fn, args = queue.popleft()
+            if queue:
+                self._rotation.append(guild_id)
+            else:
+                del self._queues[guild_id]
+            if future.cancelled():
+                continue
+            self._submit(future, profile, fn, args, False)
+        # Kullanıcı isteklerine her zaman en az bir boş işçi bırakılır
+        while (self._background and not self._rotation and self.background_active == 0
+               and self.active < self.workers - 1):
+            future, profile, fn, args = self._background.popleft()
+            if not future.cancelled():
+                self._submit(future, profile, fn, args, True)
+
+    def _submit(self, future, profile, fn, args, background):
+        self.active += 1
+        self.background_active += background
+        self.calls += 1
+        running = asyncio.wrap_future(self._executor.submit(_run_task, profile, fn, args))
+        running.add_done_callback(lambda done: self._finish(done, future, background))
+
+    def _finish(self, done, future, background=False):
+        self.active -= 1
+        self.background_active -= background
+        if not future.done():
+            if done.cancelled():
+                future.cancel()
+            elif done.exception() is not None:
+                future.set_exception(done.exception())
+            else:
+                future.set_result(done.result())
+        self._dispatch()
+
+    async def extract_info(self, profile, url, guild_id=None, background=False, **kwargs):
+        """Kırpılmış bilgi sözlüğünü döndürür"""
+        task = functools.partial(extract_song_info, **kwargs) if kwargs else extract_song_info
+        return await self.run(profile, task, url, guild_id=guild_id, background=background)
+
+    async def warm(self):
+        """İşçileri başlatır; her işçi açılırken profil örneklerini oluşturur"""
+        loop = asyncio.get_running_loop()
+        workers = await asyncio.gather(*(loop.run_in_executor(self._executor, _ping) for _ in range(self.workers)))
+        logger.info(f"YoutubeDL havuzu ısındı: {self.backend}, {self.workers} işçi, {len(self.profiles)} profil "
+                    f"({len(set(workers))} süreç)")
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)